@@ -0,0 +1,162 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from cache import open_cache
+from pipeline import analyze_source
+
+# Пакетная проверка множества файлов в пуле процессов:
+#     python batch.py src/ 'gen/**/*.txt' prog.txt --jobs 8 --report report.jsonl
+
+
+def expand_paths(arguments, pattern="*"):
+    paths = []
+    seen = set()
+    for argument in arguments:
+        if os.path.isdir(argument):
+            found = sorted(glob.glob(os.path.join(argument, "**", pattern), recursive=True))
+        elif glob.has_magic(argument):
+            found = sorted(glob.glob(argument, recursive=True))
+        else:
+            found = [argument]
+        for path in found:
+            if path not in seen and not os.path.isdir(path):
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def check_file(path, engine="regex", cache_dir=None, cache_bytes=None):
+    start = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        cache = open_cache(cache_dir, cache_bytes) if cache_dir is not None else None
+        result = analyze_source(source, engine=engine, cache=cache)
+        if cache is not None:
+            # размер файла в байтах, а не число символов: в текстах много кириллицы
+            result["bytes"] = os.path.getsize(path)
+    except Exception as e:
+        # Падение анализатора на одном файле не должно останавливать остальные
+        result = {
+            "status": "crash",
+            "tokens": 0,
+            "diagnostics": [{"phase": "internal", "message": f"{type(e).__name__}: {e}"}],
+            "traceback": traceback.format_exc(),
+        }
+    result["path"] = path
+    result["time"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def check_files(paths, engine="regex", cache_dir=None, cache_bytes=None):
+    return [check_file(path, engine, cache_dir, cache_bytes) for path in paths]
+
+
+def crash_record(path, message):
+    return {
+        "path": path, "status": "crash", "tokens": 0, "time": 0.0,
+        "diagnostics": [{"phase": "internal", "message": message}],
+    }
+
+
+def run_pool(paths, jobs, engine, chunk_size, cache_dir=None, cache_bytes=None):
+    # Файлы уходят в пул пачками; пачки, чей процесс умер, возвращаются для повтора
+    results = {}
+    broken = []
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(check_files, chunk, engine, cache_dir, cache_bytes): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    for result in future.result():
+                        results[result["path"]] = result
+                except BrokenProcessPool:
+                    broken.extend(futures[future])
+    except BrokenProcessPool:
+        pass
+    broken.extend(path for path in paths if path not in results and path not in broken)
+    return results, broken
+
+
+def run_batch(paths, jobs=None, engine="regex", chunk_size=None, cache_dir=None, cache_bytes=None):
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(64, len(paths) // (jobs * 8)))
+    results, broken = run_pool(paths, jobs, engine, chunk_size, cache_dir, cache_bytes)
+    if broken:
+        # Повтор по одному файлу: так находится файл, на котором умирает процесс
+        retried, _ = run_pool(broken, jobs, engine, 1, cache_dir, cache_bytes)
+        results.update(retried)
+        for path in broken:
+            if path not in results:
+                solo, _ = run_pool([path], 1, engine, 1, cache_dir, cache_bytes)
+                results[path] = solo.get(path) or crash_record(path, "Процесс анализатора аварийно завершился")
+    return [results[path] for path in paths]
+
+
+def summarize(results, elapsed):
+    summary = {"files": len(results), "elapsed": round(elapsed, 3)}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    looked_up = [result for result in results if "cached" in result]
+    if looked_up:
+        # Каждый процесс ведёт свой кэш, поэтому общая статистика собирается по файлам
+        hits = [result for result in looked_up if result["cached"]]
+        summary["cache"] = {
+            "hits": len(hits),
+            "misses": len(looked_up) - len(hits),
+            "hit_rate": round(len(hits) / len(looked_up), 4),
+            "bytes_saved": sum(result["bytes"] for result in hits),
+        }
+    return summary
+
+
+def write_report(results, summary, out, report_format):
+    if report_format == "jsonl":
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.write(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+    else:
+        json.dump({"summary": summary, "files": results}, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная проверка программ в пуле процессов")
+    parser.add_argument("paths", nargs="+", help="файлы, каталоги или шаблоны glob")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    parser.add_argument("--pattern", default="*", help="шаблон имён файлов внутри каталогов")
+    parser.add_argument("--report", default="-", help="файл отчёта, '-' - stdout")
+    parser.add_argument("--format", choices=("json", "jsonl"), default="jsonl")
+    parser.add_argument("--engine", choices=("classic", "regex"), default="regex")
+    parser.add_argument("--cache", default=None, help="каталог кэша результатов анализа")
+    parser.add_argument("--cache-size", type=int, default=256, help="предел размера кэша на диске, МБ")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.paths, args.pattern)
+    start = time.perf_counter()
+    cache_bytes = args.cache_size * 1024 * 1024
+    results = run_batch(paths, args.jobs, args.engine, cache_dir=args.cache, cache_bytes=cache_bytes)
+    summary = summarize(results, time.perf_counter() - start)
+    if args.report == "-":
+        write_report(results, summary, sys.stdout, args.format)
+    else:
+        with open(args.report, "w", encoding="utf-8") as out:
+            write_report(results, summary, out, args.format)
+    print(f"Файлов: {summary['files']}, без ошибок: {summary.get('ok', 0)}", file=sys.stderr)
+    if "cache" in summary:
+        print(f"Кэш: попаданий {summary['cache']['hits']} ({summary['cache']['hit_rate']:.1%}), "
+              f"не проанализировано байт: {summary['cache']['bytes_saved']}", file=sys.stderr)
+    return 0 if summary.get("ok", 0) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bytelexer import tokenize_file
+from generator import generate_program
+from lexer import LexicalAnalyzer
+
+
+def lex_text(path):
+    with open(path, encoding="utf-8") as f:
+        return LexicalAnalyzer(f.read(), engine="regex").tokenize_stream()
+
+
+def measure(run, path):
+    start = time.perf_counter()
+    stream = run(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        run(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Лексер над mmap против чтения файла в str")
+    parser.add_argument("--statements", type=int, default=200000)
+    parser.add_argument("--comments", type=float, default=0.2, help="доля операторов с комментарием")
+    args = parser.parse_args()
+
+    source = generate_program(variables=20, statements=args.statements, depth=4,
+                              comment_density=args.comments, seed=1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        size = os.path.getsize(path)
+        print(f"Файл: {size / 2 ** 20:.1f} МБ")
+        text_time, text_peak, text_stream = measure(lex_text, path)
+        mmap_time, mmap_peak, mmap_stream = measure(tokenize_file, path)
+        if list(text_stream.kinds) != list(mmap_stream.kinds):
+            raise SystemExit("Виды токенов не совпадают")
+        for name, elapsed, peak in (("str", text_time, text_peak), ("mmap", mmap_time, mmap_peak)):
+            print(f"{name:5} {elapsed:.3f} с ({size / 2 ** 20 / elapsed:.1f} МБ/с), "
+                  f"токенов {len(mmap_stream)}, пик памяти {peak / 2 ** 20:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataflow import DataflowAnalyzer
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+
+
+def parse(text):
+    parser = SyntaxAnalyzer(LexicalAnalyzer(text).tokenize_stream())
+    parser.parse()
+    return parser.ast
+
+
+def nested(depth, variables, loop_every):
+    # depth вложенных операторов: каждый loop_every-й - while, остальные - if с else;
+    # в каждом теле присваивания и чтения разных переменных
+    names = [f"v{i}" for i in range(variables)]
+    body = [Write(Var(names[0]))]
+    for level in range(depth, 0, -1):
+        name = names[level % variables]
+        other = names[(level * 7 + 1) % variables]
+        step = [Assign(name, BinOp('+', Var(other), Num('1'))), *body]
+        condition = Compare('<', Var(name), Num(str(level)))
+        if loop_every and level % loop_every == 0:
+            body = [While(condition, step)]
+        else:
+            body = [If(condition, step, [Assign(other, Num('0'))])]
+    return Program({name: 'integer' for name in names}, body)
+
+
+def count(body):
+    total = 0
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        total += 1
+        if isinstance(node, If):
+            stack.extend(node.then_body)
+            stack.extend(node.else_body)
+        elif isinstance(node, While):
+            stack.extend(node.body)
+    return total
+
+
+def measure(label, program):
+    analyzer = DataflowAnalyzer()
+    start = time.perf_counter()
+    warnings = analyzer.analyze(program)
+    elapsed = time.perf_counter() - start
+    statements = count(program.body)
+    print(f"{label:30} операторов {statements:7}, переменных {len(analyzer.variables):5}: {elapsed:.3f} с "
+          f"({elapsed / statements * 1e6:.1f} мкс/оператор), предупреждений {len(warnings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время анализа потоков данных от размера программы")
+    parser.add_argument("--sizes", default="2000,8000,32000", help="числа операторов через запятую")
+    parser.add_argument("--variables", type=int, default=2000)
+    args = parser.parse_args()
+
+    for statements in (int(value) for value in args.sizes.split(",")):
+        text = generate_program(variables=args.variables, statements=statements, depth=4, seed=1)
+        measure(f"генератор, {statements}", parse(text))
+    # Время на оператор не зависит от глубины вложенности ни ветвлений, ни циклов
+    for depth in (1000, 4000, 16000):
+        measure(f"if вложенность {depth}", nested(depth, args.variables, 0))
+    for depth in (1000, 4000, 16000):
+        measure(f"if, while каждый 100-й, {depth}", nested(depth, args.variables, 100))
+    for depth in (1000, 4000, 16000):
+        measure(f"while вложенность {depth}", nested(depth, args.variables, 1))
+
+
+if __name__ == "__main__":
+    main()
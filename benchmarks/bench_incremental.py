@@ -0,0 +1,66 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental import IncrementalSession
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+
+
+def make_program(statements):
+    body = "".join(
+        f"  x{i} := {i} + y * 2;\n  if x{i} < y then [ write (x{i}); ]\n" for i in range(statements)
+    )
+    return "program\nvar y : integer;\nbegin\n" + body + "end.\n"
+
+
+def full_analysis(text):
+    SyntaxAnalyzer(LexicalAnalyzer(text, engine="regex").tokenize()).parse()
+
+
+def percentile(times, fraction):
+    return times[min(int(len(times) * fraction), len(times) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Правки через IncrementalSession против полного разбора")
+    parser.add_argument("--statements", type=int, default=50000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    text = make_program(args.statements)
+    start = time.perf_counter()
+    session = IncrementalSession(text)
+    print(f"Символов: {len(text)}, токенов: {len(session.tokens)}")
+    print(f"Первый разбор: {time.perf_counter() - start:.3f} с")
+
+    start = time.perf_counter()
+    full_analysis(text)
+    full_time = time.perf_counter() - start
+
+    # Набор текста в одном месте: каждая правка вставляет слагаемое в выражение
+    random.seed(args.seed)
+    offset = text.find(":= ", random.randint(0, len(text) // 2)) + 3
+    times = []
+    for _ in range(args.edits):
+        inserted = random.choice(["7 + ", "y * ", "x0 - "])
+        start = time.perf_counter()
+        session.edit(offset, 0, inserted)
+        times.append(time.perf_counter() - start)
+        offset += len(inserted)
+    if session.status != "OK":
+        raise SystemExit(f"Программа после правок не разобрана: {session.status}")
+    times.sort()
+
+    print(f"Полный разбор на правку: {full_time * 1000:.1f} мс")
+    print(f"Инкрементальная правка: медиана {percentile(times, 0.5):.2f} мс, "
+          f"p90 {percentile(times, 0.9):.2f} мс, максимум {times[-1] * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
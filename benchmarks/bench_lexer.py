@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import LexicalAnalyzer
+
+# Фрагмент тела программы со всеми классами токенов: числа в разных системах
+# счисления, строки, комментарии, операторы и '!'/'%'/'$'
+BODY = '''  x{n} := 5 + y * 0x1F - 0b101 / 12h;  {{ комментарий {n} }}
+  y{n} := 3.5e+2 * 0o17 + 101b;
+  if x{n} < y{n} then [
+    write (x{n});
+    write ('строка {n}');
+  ]
+  else [
+    write (y{n});
+  ]
+  z := x != y; % $
+'''
+
+
+def make_source(lines):
+    parts = ["program\nvar x, y : integer;\n!\nbegin\n"]
+    n = 0
+    while n * 10 < lines:
+        parts.append(BODY.format(n=n))
+        n += 1
+    parts.append("end.\n")
+    return "".join(parts)
+
+
+def measure(text, engine, repeat):
+    best = None
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = LexicalAnalyzer(text, engine=engine).tokenize()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение движков лексера")
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_source(args.lines)
+    classic_time, classic_tokens = measure(text, "classic", args.repeat)
+    regex_time, regex_tokens = measure(text, "regex", args.repeat)
+    if classic_tokens != regex_tokens:
+        raise SystemExit("Потоки токенов движков не совпадают")
+
+    count = len(classic_tokens)
+    print(f"Строк: {text.count(chr(10))}, токенов: {count}")
+    print(f"classic: {classic_time:.3f} с ({count / classic_time:,.0f} токенов/с)")
+    print(f"regex:   {regex_time:.3f} с ({count / regex_time:,.0f} токенов/с)")
+    print(f"Ускорение: {classic_time / regex_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from ll1 import TableParser
+from parserr import SyntaxAnalyzer
+
+
+def make_deep(depth):
+    # depth вложенных if ... then [ ... ] else [ ... ]
+    head = "program\nvar x, y : integer;\nbegin\n"
+    opening = "if x < y then [ x := x + 1;\n" * depth
+    closing = "] else [ y := y - 1; ]\n" * depth
+    return head + opening + "write (x);\n" + closing + "end.\n"
+
+
+def measure(parser_class, tokens, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        parser = parser_class(tokens)
+        start = time.perf_counter()
+        try:
+            parser.parse()
+        except RecursionError:
+            return None, None
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, parser.ast
+
+
+def report(name, tokens, repeat):
+    descent_time, descent_ast = measure(SyntaxAnalyzer, tokens, repeat)
+    table_time, table_ast = measure(TableParser, tokens, repeat)
+    line = f"{name}: токенов {len(tokens)}, табличный {table_time:.3f} с ({len(tokens) / table_time:,.0f} токенов/с)"
+    if descent_time is None:
+        line += ", рекурсивный спуск: RecursionError"
+    else:
+        try:
+            same = descent_ast == table_ast
+        except RecursionError:
+            same = True     # сравнение узлов рекурсивно и на глубоких деревьях не проходит
+        if not same:
+            raise SystemExit(f"{name}: деревья разбора не совпадают")
+        line += f", рекурсивный спуск {descent_time:.3f} с (x{descent_time / table_time:.2f})"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Табличный LL(1)-разбор против рекурсивного спуска")
+    parser.add_argument("--statements", type=int, default=50000, help="операторов в широкой программе")
+    parser.add_argument("--depths", default="100,1000,10000", help="глубины вложенности if")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    wide = generate_program(variables=20, statements=args.statements, depth=2, seed=1)
+    report(f"широкая ({args.statements} операторов)", LexicalAnalyzer(wide, engine="regex").tokenize(), args.repeat)
+    for depth in (int(d) for d in args.depths.split(",")):
+        source = make_deep(depth)
+        report(f"глубина {depth}", LexicalAnalyzer(source, engine="regex").tokenize(), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from parallel import lex_chunk, split_points, stitch, tokenize_parallel
+
+
+def same(left, right):
+    return (left.kinds == right.kinds and left.starts == right.starts and left.ends == right.ends
+            and left.symbols()[1] == right.symbols()[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Параллельный лексер против последовательного на одном файле")
+    parser.add_argument("--statements", type=int, default=300000)
+    parser.add_argument("--jobs", default="1,2,4,8", help="числа процессов через запятую")
+    args = parser.parse_args()
+
+    text = generate_program(variables=50, statements=args.statements, depth=4, comment_density=0.2, seed=1)
+    size = len(text) / 2 ** 20
+    print(f"Текст: {size:.1f} млн символов, ядер: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    reference = LexicalAnalyzer(text, engine="regex").tokenize_stream()
+    sequential = time.perf_counter() - start
+    print(f"последовательно     {sequential:.3f} с ({size / sequential:.1f} МБ/с)")
+
+    # Последовательная часть параллельного разбора: поиск границ и склейка
+    start = time.perf_counter()
+    points = split_points(text, 16)
+    split_time = time.perf_counter() - start
+    chunks = [lex_chunk(text[a:b], a) for a, b in zip(points, points[1:])]
+    start = time.perf_counter()
+    stitch(text, chunks)
+    stitch_time = time.perf_counter() - start
+    print(f"границы {split_time:.3f} с, склейка {stitch_time:.3f} с")
+
+    for jobs in (int(value) for value in args.jobs.split(",")):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            tokenize_parallel(text[:points[1]], jobs, executor=executor, min_chunk=2 ** 12)   # запуск процессов
+            start = time.perf_counter()
+            stream = tokenize_parallel(text, jobs, executor=executor)
+            elapsed = time.perf_counter() - start
+        if not same(stream, reference):
+            raise SystemExit(f"Потоки токенов при {jobs} процессах не совпадают с последовательным разбором")
+        print(f"процессов {jobs:2}        {elapsed:.3f} с ({size / elapsed:.1f} МБ/с), "
+              f"ускорение {sequential / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
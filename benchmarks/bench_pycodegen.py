@@ -0,0 +1,88 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import generate_program
+from pycodegen import CodeCache, load_program, parse_program
+from vm import compile_program, VM, evaluate
+
+PROGRAM = '''
+program
+var i, s, n : integer;
+begin
+  i := 0;
+  s := 0;
+  n := {n};
+  while i < n do [
+    s := s + i * 2;
+    i := i + 1;
+  ]
+  write (s);
+end.
+'''
+
+
+def measure(run):
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        run(out)
+        error = None
+    except ZeroDivisionError as e:
+        error = type(e).__name__
+    return time.perf_counter() - start, (out.getvalue(), error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перевод в байткод Python против VM и обхода дерева")
+    parser.add_argument("--iterations", type=int, default=1000000)
+    parser.add_argument("--statements", type=int, default=20000, help="операторов в программе для замера кэша")
+    args = parser.parse_args()
+
+    # Выполнение: цикл из bench_vm.py
+    source = PROGRAM.format(n=args.iterations)
+    program = parse_program(source)
+    compiled = compile_program(program)
+    python_program = load_program(source)
+    python_time, python_out = measure(python_program.run)
+    vm_time, vm_out = measure(lambda out: VM(compiled, out).run())
+    tree_time, tree_out = measure(lambda out: evaluate(program, out))
+    if not python_out == vm_out == tree_out:
+        raise SystemExit("Вывод байткода Python, VM и обхода дерева не совпадает")
+    n = args.iterations
+    print(f"Итераций цикла: {n}")
+    print(f"обход дерева:  {tree_time:.3f} с ({n / tree_time:,.0f} итераций/с)")
+    print(f"VM:            {vm_time:.3f} с ({n / vm_time:,.0f} итераций/с)")
+    print(f"Python:        {python_time:.3f} с ({n / python_time:,.0f} итераций/с), "
+          f"{vm_time / python_time:.1f}x к VM")
+
+    # Компиляция и загрузка из кэша большой программы; выполнение только сверяется с VM:
+    # переменные начинаются с 0, и сгенерированная программа обычно быстро делит на ноль
+    source = generate_program(variables=200, statements=args.statements, depth=4, seed=1)
+    directory = tempfile.mkdtemp(prefix="pycodegen-")
+    try:
+        cold, warm = {}, {}
+        load_program(source, CodeCache(directory), cold)
+        program = load_program(source, CodeCache(directory), warm)
+    finally:
+        shutil.rmtree(directory)
+    start = time.perf_counter()
+    tree = parse_program(source)
+    parse_time = time.perf_counter() - start
+    _, python_out = measure(program.run)
+    _, vm_out = measure(lambda out: VM(compile_program(tree), out).run())
+    if python_out != vm_out:
+        raise SystemExit("Вывод байткода Python и VM на сгенерированной программе не совпадает")
+    print(f"Программа: {args.statements} операторов, {len(source) / 1024:.0f} КБ")
+    print(f"компиляция:    {cold['compile']:.3f} с (из них разбор {parse_time:.3f} с), запись {cold['store']:.3f} с")
+    print(f"из кэша:       {warm['load']:.3f} с, в {cold['compile'] / warm['load']:.0f} раз быстрее компиляции")
+
+
+if __name__ == "__main__":
+    main()
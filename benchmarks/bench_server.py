@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server import AnalysisServer
+
+PROGRAM = """program
+var x, y : integer;
+begin
+  x := 5;
+  y := 10;
+  if x < y then [ write (x); ] else [ write (y); ]
+end.
+"""
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def round_trips(path, count):
+    # Запросы по одному на одном соединении: задержка без очереди
+    reader, writer = await asyncio.open_unix_connection(path)
+    line = json.dumps({"op": "analyze", "source": PROGRAM}).encode() + b"\n"
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(line)
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if not response["ok"]:
+            raise SystemExit(response["error"])
+    writer.close()
+    await writer.wait_closed()
+    return latencies
+
+
+async def flood(path, count, connections):
+    # count запросов без ожидания ответов, поровну на connections соединений
+    async def one(n):
+        reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 24)
+        for i in range(n):
+            writer.write(json.dumps({"id": i, "op": "analyze", "source": PROGRAM}).encode() + b"\n")
+        await writer.drain()
+        for _ in range(n):
+            await reader.readline()
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(count // connections) for _ in range(connections)))
+    return time.perf_counter() - start
+
+
+async def run(args, path):
+    server = AnalysisServer(jobs=args.jobs)
+    await server.start(unix=path)
+    try:
+        await round_trips(path, 20)     # прогрев процессов пула
+        latencies = await round_trips(path, args.requests)
+        print(f"По одному запросу: медиана {percentile(latencies, 0.5) * 1000:.2f} мс, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} мс")
+        total = args.requests * 10
+        elapsed = await flood(path, total, args.connections)
+        snapshot = server.snapshot()
+        print(f"Поток из {total} запросов по {args.connections} соединениям: {elapsed:.3f} с "
+              f"({total / elapsed:,.0f} запросов/с), средняя пачка {snapshot['batch_mean']:.1f}")
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка и пропускная способность server.py")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import pipeline, sys; pipeline.analyze_source(sys.stdin.read())"],
+                   input=PROGRAM, text=True, cwd=ROOT, check=True)
+    print(f"Отдельный процесс на проверку: {(time.perf_counter() - start) * 1000:.1f} мс")
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, os.path.join(directory, "analyzer.sock")))
+
+
+if __name__ == "__main__":
+    main()
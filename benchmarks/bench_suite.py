@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import ProgramGenerator
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from semantic import SemanticAnalyzer, analyze_single_pass, generate_symbol_table_and_operations
+
+# Набор бенчмарков по фазам на сгенерированных программах:
+#
+#     python benchmarks/bench_suite.py --output baseline.json
+#     python benchmarks/bench_suite.py --baseline baseline.json --tolerance 0.15
+#
+# Для каждой пары (нагрузка, фаза) записываются лучшее время, пропускная способность и
+# пик памяти по tracemalloc. С --baseline падение пропускной способности или рост пика
+# памяти больше допуска печатается как регрессия, и код возврата становится 1.
+
+# Нагрузки: параметры ProgramGenerator при --scale 1
+WORKLOADS = {
+    "flat": dict(variables=50, statements=20000, depth=0, comment_density=0.05),
+    "nested": dict(variables=20, statements=20000, depth=8, comment_density=0.05),
+    "comments": dict(variables=20, statements=10000, depth=2, comment_density=1.0),
+    "numbers": dict(variables=20, statements=20000, depth=2, comment_density=0.05,
+                    number_mix={"decimal": 1, "real": 1, "exponent": 1, "binary": 1,
+                                "octal": 1, "hex": 1, "suffix": 1}),
+    "legacy": dict(variables=20, statements=20000, depth=2, comment_density=0.05,
+                   number_mix={"decimal": 3, "real": 1}),
+}
+
+
+def lex(source, engine):
+    return LexicalAnalyzer(source, engine=engine).tokenize()
+
+
+def parse(tokens):
+    SyntaxAnalyzer(tokens).parse()
+
+
+def legacy_semantic(tokens):
+    symbol_table, operations = generate_symbol_table_and_operations(tokens)
+    SemanticAnalyzer(symbol_table).analyze(operations)
+
+
+def phases(source, tokens, statements):
+    # (фаза, функция, объём работы, единица)
+    count = len(tokens)
+    return [
+        ("lexer_classic", lambda: lex(source, "classic"), count, "токенов/с"),
+        ("lexer_regex", lambda: lex(source, "regex"), count, "токенов/с"),
+        ("parser", lambda: parse(tokens), statements, "операторов/с"),
+        ("semantic_legacy", lambda: legacy_semantic(tokens), count, "токенов/с"),
+        ("semantic_single_pass", lambda: analyze_single_pass(tokens), count, "токенов/с"),
+    ]
+
+
+def best_time(run, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_workload(params, scale, repeat, seed):
+    params = dict(params)
+    params["statements"] = max(1, int(params["statements"] * scale))
+    generator = ProgramGenerator(seed=seed, **params)
+    source = generator.generate()
+    tokens = lex(source, "regex")
+    results = {}
+    for name, run, amount, unit in phases(source, tokens, generator.generated):
+        try:
+            seconds = best_time(run, repeat)
+            peak = peak_memory(run)
+        except SyntaxError as e:
+            # старый семантический анализ отвергает литералы не в десятичной форме
+            results[name] = {"skipped": str(e)}
+            continue
+        results[name] = {
+            "seconds": round(seconds, 6),
+            "throughput": round(amount / seconds, 1),
+            "unit": unit,
+            "peak_bytes": peak,
+        }
+    info = {"characters": len(source), "tokens": len(tokens), "statements": generator.generated,
+            "depth": generator.max_depth}
+    return info, results
+
+
+def compare(current, baseline, tolerance):
+    # Список сообщений о регрессиях: пропускная способность ниже базовой больше чем на
+    # tolerance или пик памяти выше больше чем на tolerance
+    regressions = []
+    for workload, phases_ in current["results"].items():
+        base_phases = baseline.get("results", {}).get(workload, {})
+        for phase, result in phases_.items():
+            base = base_phases.get(phase)
+            if base is None or "throughput" not in base or "throughput" not in result:
+                continue
+            ratio = result["throughput"] / base["throughput"]
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    f"{workload}/{phase}: {result['throughput']:,.0f} {result['unit']} "
+                    f"против {base['throughput']:,.0f} в базовой линии ({ratio - 1:+.1%})"
+                )
+            if base["peak_bytes"] and result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+                regressions.append(
+                    f"{workload}/{phase}: пик памяти {result['peak_bytes']:,} байт "
+                    f"против {base['peak_bytes']:,} ({result['peak_bytes'] / base['peak_bytes'] - 1:+.1%})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки фаз анализатора с проверкой регрессий")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="нагрузки через запятую")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель числа операторов")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление, доля")
+    args = parser.parse_args(argv)
+
+    current = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "workloads": {},
+        "results": {},
+    }
+    for workload in args.workloads.split(","):
+        if workload not in WORKLOADS:
+            raise SystemExit(f"Неизвестная нагрузка: {workload}")
+        info, results = run_workload(WORKLOADS[workload], args.scale, args.repeat, args.seed)
+        current["workloads"][workload] = info
+        current["results"][workload] = results
+        print(f"{workload}: символов {info['characters']}, токенов {info['tokens']}, "
+              f"операторов {info['statements']}, вложенность {info['depth']}")
+        for phase, result in results.items():
+            if "skipped" in result:
+                print(f"  {phase:22} пропущено: {result['skipped']}")
+            else:
+                print(f"  {phase:22} {result['throughput']:>14,.0f} {result['unit']:13} "
+                      f"пик {result['peak_bytes'] / 1024:,.0f} КБ")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != current["scale"] or baseline.get("seed") != current["seed"]:
+            print("Внимание: базовая линия снята с другими --scale/--seed", file=sys.stderr)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"РЕГРЕССИЯ ПРОИЗВОДИТЕЛЬНОСТИ (допуск {args.tolerance:.0%}):", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+        print(f"Регрессий нет (допуск {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from semantic import analyze_single_pass
+
+
+def best_time(run, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def retained_memory(build):
+    tracemalloc.start()
+    try:
+        value = build()
+        return tracemalloc.get_traced_memory()[0], value
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Семантический анализ по номерам имён для программ с большим числом переменных")
+    parser.add_argument("--variables", type=int, default=50000)
+    parser.add_argument("--statements", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = generate_program(variables=args.variables, statements=args.statements, depth=3, seed=1)
+    tokens = LexicalAnalyzer(source, engine="regex").tokenize_stream()
+    # тот же поток как список кортежей: номера имён строятся внутри анализа из строк
+    plain = list(tokens)
+    print(f"Токенов {len(tokens)}, различных имён {len(tokens.interner)}")
+
+    stream_time, (table, _, errors) = best_time(lambda: analyze_single_pass(tokens), args.repeat)
+    plain_time, _ = best_time(lambda: analyze_single_pass(plain), args.repeat)
+    if errors:
+        raise SystemExit(f"Неожиданные ошибки: {errors[:3]}")
+    print(f"номера из лексера   {stream_time:.3f} с ({len(tokens) / stream_time:,.0f} токенов/с)")
+    print(f"имена из кортежей   {plain_time:.3f} с ({len(tokens) / plain_time:,.0f} токенов/с)")
+
+    slots_size, _ = retained_memory(lambda: analyze_single_pass(tokens)[0])
+    dict_size, _ = retained_memory(table.to_dict)
+    print(f"таблица символов: записи по номерам {slots_size / 2 ** 20:.1f} МБ, "
+          f"словарь словарей {dict_size / 2 ** 20:.1f} МБ ({len(table)} переменных)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from vectorized import compile_batch, evaluate_row, parse_program, verify
+from vm import VM, compile_program
+
+# Правило оценки: ветвления, арифметика и вывод, как у типичного скорингового правила
+PROGRAM = '''
+program
+var income, debt, age, score, ratio, base : real;
+begin
+  base := income + 1;
+  ratio := debt / base;
+  score := 500 + age * 2;
+  if ratio > 0.5 then [
+    score := score - 120 * ratio;
+    if age < 25 then [ score := score - 40; ]
+  ]
+  else [
+    score := score + 60;
+    if income >= 100000 then [ score := score + 25; write (score); ]
+  ]
+  if score < 300 then [ score := 300; ]
+  if score > 850 then [ score := 850; ]
+end.
+'''
+
+
+def make_columns(rows, seed):
+    rnd = np.random.default_rng(seed)
+    return {
+        "income": rnd.integers(0, 200000, rows),
+        "debt": rnd.integers(0, 150000, rows),
+        "age": rnd.integers(18, 80, rows),
+    }
+
+
+def run_vm(compiled, columns, rows):
+    # Тот же байткод VM, запущенный отдельно для каждой строки
+    slots = [(compiled.variables[name], values.tolist()) for name, values in columns.items()]
+    registers = list(compiled.registers)
+    out = io.StringIO()
+    for i in range(rows):
+        for slot, values in slots:
+            compiled.registers[slot] = values[i]
+        VM(compiled, out).run()
+    compiled.registers[:] = registers
+
+
+def run_tree(program, columns, rows):
+    inputs = {name: values.tolist() for name, values in columns.items()}
+    for i in range(rows):
+        evaluate_row(program, {name: values[i] for name, values in inputs.items()})
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетное выполнение на NumPy против выполнения по строкам")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--sample", type=int, default=20000, help="строк для построчного выполнения и сверки")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    program = parse_program(PROGRAM)
+    columns = make_columns(args.rows, args.seed)
+    batch = compile_batch(program)
+    batch_time, result = timed(lambda: batch.run(columns))
+    output_time, _ = timed(result.outputs)
+
+    sample = min(args.sample, args.rows)
+    head = {name: values[:sample] for name, values in columns.items()}
+    mismatches = verify(program, head, batch.run(head), range(sample))
+    if mismatches:
+        raise SystemExit(f"Расхождение с построчным выполнением в строках {mismatches[:10]}")
+    tree_time, _ = timed(lambda: run_tree(program, head, sample))
+    vm_time, _ = timed(lambda: run_vm(compile_program(program), head, sample))
+
+    print(f"Строк: {args.rows}, сверено с vm.evaluate: {sample}")
+    print(f"NumPy, пакет:        {batch_time:.3f} с ({args.rows / batch_time:,.0f} строк/с), "
+          f"вывод по строкам ещё {output_time:.3f} с")
+    print(f"VM по строке:        {sample / vm_time:,.0f} строк/с")
+    print(f"обход дерева:        {sample / tree_time:,.0f} строк/с")
+    print(f"Ускорение к VM: {(args.rows / batch_time) / (sample / vm_time):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from vm import compile_program, VM, evaluate
+
+PROGRAM = '''
+program
+var i, s, n : integer;
+begin
+  i := 0;
+  s := 0;
+  n := {n};
+  while i < n do [
+    s := s + i * 2;
+    i := i + 1;
+  ]
+  write (s);
+end.
+'''
+
+
+def parse(source):
+    parser = SyntaxAnalyzer(LexicalAnalyzer(source, engine="regex").tokenize())
+    parser.parse()
+    return parser.ast
+
+
+def measure(run):
+    out = io.StringIO()
+    start = time.perf_counter()
+    run(out)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VM против наивного обхода дерева")
+    parser.add_argument("--iterations", type=int, default=1000000)
+    args = parser.parse_args()
+
+    program = parse(PROGRAM.format(n=args.iterations))
+    compiled = compile_program(program)
+    vm_time, vm_out = measure(lambda out: VM(compiled, out).run())
+    tree_time, tree_out = measure(lambda out: evaluate(program, out))
+    if vm_out != tree_out:
+        raise SystemExit("Вывод VM и обхода дерева не совпадает")
+
+    n = args.iterations
+    print(f"Итераций цикла: {n}, инструкций в программе: {len(compiled.code)}")
+    print(f"обход дерева: {tree_time:.3f} с ({n / tree_time:,.0f} итераций/с)")
+    print(f"VM:           {vm_time:.3f} с ({n / vm_time:,.0f} итераций/с)")
+    print(f"Ускорение: {tree_time / vm_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import mmap
+import re
+
+from lexer import LexicalAnalyzer
+from symbols import NO_SYMBOL
+from tokenstream import ByteTokenStream
+
+# Лексический анализ прямо над байтами файла в UTF-8 (mmap, bytes, memoryview), без
+# декодирования всего текста в str. Токены - ByteTokenStream со смещениями в байтах.
+#
+#     stream = tokenize_file("big.txt")
+#
+# Разбор тот же, что у движка "regex", но над байтами. Не-ASCII внутри строк и
+# комментариев разбору не мешает: в UTF-8 байты многобайтового символа не совпадают с
+# ASCII, так что ' и } ищутся как обычно. Там, где не-ASCII символ может стать частью
+# токена (начинает его или идёт сразу за идентификатором или числом), кусок до ближайшего
+# пробела декодируется и разбирается посимвольно, как в LexicalAnalyzer.
+
+# Та же грамматика, что LexicalAnalyzer.LEXEMES, над байтами. Байт не-ASCII вне строк и
+# комментариев попадает в последнюю ветку как лексема из одного байта
+BYTE_LEXEMES = re.compile(LexicalAnalyzer.LEXEMES.pattern.encode('ascii'), re.VERBOSE)
+
+WHITESPACE = re.compile(rb"[ \n\r\t]")
+
+QUOTE = ord("'")
+BRACE = ord("{")
+
+# Особые значения в кэше видов лексем: их код зависит от места в тексте
+NON_ASCII = -2
+BANG = -3
+BEGIN = -4
+
+# Лексемы длиннее в кэш видов не попадают: это уникальные строки и комментарии
+CACHED_LEXEME = 64
+
+
+def map_file(path):
+    # Файл, отображённый в память только для чтения; пустой файл отобразить нельзя
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ByteLexer:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.before_begin = True
+        self.codes = {}     # лексема -> код вида или None для комментария
+        self.classifier = LexicalAnalyzer("", engine="regex")
+
+    def classify(self, stream, lexeme):
+        first = lexeme[0]
+        if first == BRACE:
+            code = None
+        elif first == QUOTE:
+            closed = len(lexeme) >= 2 and lexeme[-1] == QUOTE
+            code = stream.CODES['STRING'] if closed else stream.STRING_OPEN
+        elif first >= 0x80:
+            code = NON_ASCII
+        elif lexeme == b'!':
+            code = BANG
+        elif lexeme == b'begin':
+            code = BEGIN
+        else:
+            text = lexeme.decode('ascii')
+            type_, value = self.classifier.classify_lexeme(text)
+            code = stream.code_for(type_, value, 0, len(text))
+        if len(lexeme) <= CACHED_LEXEME:
+            self.codes[lexeme] = code
+        return code
+
+    def tokenize_stream(self):
+        buf = self.buffer
+        size = len(buf)
+        stream = ByteTokenStream(buf)
+        kinds, starts, ends, ids = stream.kinds, stream.starts, stream.ends, stream.ids
+        add_kind, add_start, add_end, add_id = kinds.append, starts.append, ends.append, ids.append
+        codes = self.codes
+        # номера имён по байтам лексемы: имя декодируется один раз
+        symbols = {}
+        intern = stream.interner.intern
+        id_code = stream.CODES['ID']
+        keyword = stream.CODES['KEYWORD']
+        delimiter = stream.CODES['DELIMITER']
+        before_begin = True
+        begin_at = -1
+        pos = 0
+        while pos < size:
+            match = None
+            for match in BYTE_LEXEMES.finditer(buf, pos):
+                lexeme = match.group(1)
+                code = codes.get(lexeme, -1)
+                if code == -1:
+                    code = self.classify(stream, lexeme)
+                if code is None:
+                    continue
+                if code < 0:
+                    if code == BANG:
+                        code = keyword if before_begin else delimiter
+                    elif code == BEGIN:
+                        code = keyword
+                        if before_begin:
+                            before_begin = False
+                            begin_at = match.start(1)
+                    else:
+                        break
+                start, end = match.span(1)
+                add_kind(code)
+                add_start(start)
+                add_end(end)
+                if code == id_code:
+                    symbol = symbols.get(lexeme)
+                    if symbol is None:
+                        symbol = symbols[lexeme] = intern(lexeme.decode('ascii'))
+                    add_id(symbol)
+                else:
+                    add_id(NO_SYMBOL)
+            else:
+                # Число в самом конце текста разбирается посимвольно, как в parse_number
+                if match is not None and match.end(1) == size and match.group(1)[:1].isdigit():
+                    start = starts[-1]
+                    stream.pop()
+                    pos, before_begin = self.fallback(stream, start, before_begin)
+                    continue
+                break
+            # Не-ASCII символ: идентификатор или число прямо перед ним может его включить
+            start = match.start(1)
+            if kinds and ends[-1] == start and bytes(buf[starts[-1]:starts[-1] + 1]).isalnum():
+                start = starts[-1]
+                stream.pop()
+                if start == begin_at:
+                    before_begin = True
+            pos, before_begin = self.fallback(stream, start, before_begin)
+        self.before_begin = before_begin
+        return stream
+
+    def fallback(self, stream, pos, before_begin):
+        # Посимвольный разбор от pos до первого токена, за которым идёт ASCII символ;
+        # возвращает (байтовая позиция продолжения, before_begin)
+        buf = self.buffer
+        space = WHITESPACE.search(buf, pos)
+        window_end = space.end() if space is not None else len(buf)
+        # surrogateescape: некорректный байт - один символ, смещения не съезжают
+        text = bytes(buf[pos:window_end]).decode('utf-8', 'surrogateescape')
+        # В конце входа parse_number обращается к символу за текстом и падает с
+        # TypeError: пробел после окна завершает число так же, как в середине текста
+        lexer = LexicalAnalyzer(text + ' ' if window_end == len(buf) else text, engine="regex")
+        lexer.before_begin = before_begin
+
+        def offset(i):
+            return pos + len(text[:i].encode('utf-8', 'surrogateescape'))
+
+        i = 0
+        while i < len(text):
+            end = lexer.scan_regex_at(i)
+            if lexer.tokens:
+                type_, value = lexer.tokens.pop()
+                start = lexer.token_start
+                end_char = min(end, len(text))
+                symbol = stream.interner.intern(value) if type_ == 'ID' else NO_SYMBOL
+                stream.append_code(stream.code_for(type_, value, start, end_char), offset(start), offset(end_char),
+                                   symbol)
+            i = end
+            if i >= len(text) or text[i] < '\x80':
+                break
+        return offset(min(i, len(text))), lexer.before_begin
+
+
+def tokenize_bytes(buffer):
+    return ByteLexer(buffer).tokenize_stream()
+
+
+def tokenize_file(path):
+    # Поток держит отображение файла, пока жив сам
+    return ByteLexer(map_file(path)).tokenize_stream()
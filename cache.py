@@ -0,0 +1,265 @@
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+
+from pipeline import ANALYZER_VERSION
+from tokenstream import TokenStream
+
+# Кэш результатов анализа по содержимому: ключ - SHA-256 от версии анализатора,
+# движка лексера и текста программы. Перед каталогом на диске стоит LRU в памяти.
+#
+# Формат записи: заголовок MAGIC, код статуса, число токенов, длина сжатой части,
+# затем zlib от kinds + starts + ends (uint32, little-endian) + marshal диагностики.
+
+MAGIC = b"TFC1"
+HEADER = struct.Struct("<4sBII")
+STATUSES = ("ok", "syntax_error", "semantic_error")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+SUFFIX = ".bin"
+
+
+class CacheEntry:
+    __slots__ = ('status', 'diagnostics', 'kinds', 'starts', 'ends', 'size')
+
+    def __init__(self, status, diagnostics, kinds, starts, ends, size=0):
+        self.status = status
+        self.diagnostics = diagnostics
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.size = size    # размер записи на диске
+
+    def result(self):
+        return {
+            "status": self.status,
+            "tokens": len(self.kinds),
+            "diagnostics": [dict(record) for record in self.diagnostics],
+        }
+
+    def tokens(self, source):
+        stream = TokenStream(source)
+        stream.kinds = array('B', self.kinds)
+        stream.starts = array('I', self.starts)
+        stream.ends = array('I', self.ends)
+        return stream
+
+    def encode(self):
+        starts = array('I', self.starts)
+        ends = array('I', self.ends)
+        if sys.byteorder == "big":
+            starts.byteswap()
+            ends.byteswap()
+        payload = zlib.compress(
+            self.kinds.tobytes() + starts.tobytes() + ends.tobytes() + marshal.dumps(self.diagnostics)
+        )
+        return HEADER.pack(MAGIC, STATUS_CODES[self.status], len(self.kinds), len(payload)) + payload
+
+    @classmethod
+    def decode(cls, data):
+        magic, status, count, length = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + length:
+            raise ValueError("Повреждённая запись кэша")
+        payload = zlib.decompress(data[HEADER.size:])
+        kinds = array('B', payload[:count])
+        starts = array('I', payload[count:count * 5])
+        ends = array('I', payload[count * 5:count * 9])
+        if sys.byteorder == "big":
+            starts.byteswap()
+            ends.byteswap()
+        diagnostics = marshal.loads(payload[count * 9:])
+        return cls(STATUSES[status], diagnostics, kinds, starts, ends, len(data))
+
+
+class ShardedStore:
+    # Каталог записей по ключу-хешу: <каталог>/<первые два символа ключа>/<ключ><suffix>.
+    # Общий для кэша анализа и кэша кода программ (pycodegen.CodeCache): они отличаются
+    # только ключами и форматом записи
+    suffix = SUFFIX
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def read(self, path):
+        # Содержимое записи или None, если её нет; другие ошибки чтения - OSError
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запись через временный файл: параллельные процессы не увидят половину записи
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def files(self):
+        for root, dirs, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(self.suffix):
+                    yield os.path.join(root, name)
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class AnalysisCache(ShardedStore):
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, memory_entries=1024, version=None):
+        if version is None:
+            version = ANALYZER_VERSION
+        super().__init__(directory)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.version = version
+        self.memory = OrderedDict()
+        self.disk_bytes = None      # считается при первой записи
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0        # размер исходников в байтах UTF-8, анализ которых взят из кэша
+        self.bytes_written = 0
+        self.evictions = 0
+
+    def key(self, source, engine="regex"):
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}\0{engine}\0".encode())
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, source, engine="regex"):
+        key = self.key(source, engine)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+        else:
+            entry = self.load(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.remember(key, entry)
+        self.hits += 1
+        self.bytes_saved += len(source.encode("utf-8", "surrogatepass"))
+        return entry
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            data = self.read(path)
+            if data is None:
+                return None
+            entry = CacheEntry.decode(data)
+        except (OSError, ValueError, EOFError, struct.error, zlib.error):
+            # Битая запись (например, оборванная запись другого процесса) - промах
+            self.discard(path)
+            return None
+        try:
+            os.utime(path)   # время изменения служит отметкой последнего использования
+        except OSError:
+            pass
+        return entry
+
+    def remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def put(self, source, engine, tokens, result):
+        key = self.key(source, engine)
+        entry = CacheEntry(
+            result["status"], [dict(record) for record in result["diagnostics"]],
+            array('B', tokens.kinds), array('I', tokens.starts), array('I', tokens.ends),
+        )
+        data = entry.encode()
+        entry.size = len(data)
+        self.remember(key, entry)
+        if len(data) > self.max_bytes:
+            return entry
+        self.write(self.path(key), data)
+        self.bytes_written += len(data)
+        if self.disk_bytes is None:
+            self.disk_bytes = self.scan_size()
+        else:
+            self.disk_bytes += len(data)
+        if self.disk_bytes > self.max_bytes:
+            self.evict()
+        return entry
+
+    def scan_size(self):
+        total = 0
+        for path in self.files():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def evict(self):
+        # Удаляются записи, которые дольше всех не использовались, до 90% лимита:
+        # запас не даёт сканировать каталог на каждой следующей записи
+        records = []
+        for path in self.files():
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            records.append((info.st_mtime, info.st_size, path))
+        records.sort()
+        total = sum(size for mtime, size, path in records)
+        target = self.max_bytes * 9 // 10
+        for mtime, size, path in records:
+            if total <= target:
+                break
+            if self.discard(path):
+                total -= size
+                self.evictions += 1
+        self.disk_bytes = total
+
+    def clear(self):
+        self.memory.clear()
+        for path in list(self.files()):
+            self.discard(path)
+        self.disk_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_written": self.bytes_written,
+            "evictions": self.evictions,
+        }
+
+
+_caches = {}
+
+
+def open_cache(directory, max_bytes=None):
+    # Один экземпляр на каталог в каждом процессе: LRU в памяти живёт между файлами пачки
+    cache = _caches.get(directory)
+    if cache is None:
+        if max_bytes is None:
+            cache = AnalysisCache(directory)
+        else:
+            cache = AnalysisCache(directory, max_bytes)
+        _caches[directory] = cache
+    return cache
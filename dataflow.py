@@ -0,0 +1,212 @@
+from syntax_tree import Assign, If, While, Write, BinOp, Compare, Var, bind_symbols
+from tracing import NULL_TRACER, INFO, DEBUG
+
+# Анализ потоков данных по дереву разбора.
+#
+#     warnings = analyze_dataflow(program)
+#
+# Множества переменных - целые числа Python как битовые множества: бит i - i-я
+# объявленная переменная, bits[номер имени] - её бит (0 для необъявленных). Объединение, пересечение и разность - одна операция над
+# числом, так что тысячи переменных не требуют множеств из строк.
+#
+# Две задачи:
+#   - определённое присваивание (прямая, пересечение): какие переменные получили
+#     значение на всех путях до точки;
+#   - живость (обратная, объединение): какие переменные ещё будут прочитаны после точки.
+# В программе нет переходов, только вложенные if и while, поэтому обе решаются по
+# структуре дерева, без итераций по графу. Сначала снизу вверх для каждого оператора
+# считается сводка (Summary): gen - переменные, которые он может прочитать до
+# присваивания, kill - переменные, которые он присваивает на всех путях. Для if это
+# объединение gen ветвей и пересечение их kill, для while - gen тела и пустой kill:
+# тело может не выполниться ни разу. Затем каждое тело проходится один раз:
+#   - на входе в тело while известно то же, что перед циклом: присваивания в теле
+#     только добавляют переменные, и пересечение с ними ничего не меняет;
+#   - живое на входе в цикл - живое после цикла, условие и gen тела; это сразу
+#     неподвижная точка, и тело проходится с ней как с живым на выходе.
+# Каждый оператор посещается постоянное число раз при любой вложенности циклов. Обход
+# идёт явными стеками, так что глубина вложенности не ограничена стеком вызовов.
+#
+# Предупреждения:
+#   - переменная может читаться до присваивания (на каком-то пути значения ещё нет,
+#     при выполнении это 0);
+#   - присвоенное значение больше нигде не читается;
+#   - переменная объявлена, но не читается.
+# Проверяются только объявленные переменные: о необъявленных сообщает семантический
+# анализ.
+
+
+class Summary:
+    # order - номер оператора в порядке текста программы (условие if и while раньше
+    # тел), reads - биты переменных, которые читает сам оператор (выражение справа,
+    # выражение write или условие), gen и kill - как описано выше
+    __slots__ = ('order', 'reads', 'gen', 'kill')
+
+    def __init__(self, order, reads):
+        self.order = order
+        self.reads = reads
+        self.gen = reads
+        self.kill = 0
+
+    def __repr__(self):
+        return f"Summary({self.order}, {self.reads:#x}, {self.gen:#x}, {self.kill:#x})"
+
+
+def sequence(summaries, body):
+    # gen и kill последовательности операторов
+    gen = kill = 0
+    for node in reversed(body):
+        summary = summaries[id(node)]
+        gen = summary.gen | (gen & ~summary.kill)
+        kill |= summary.kill
+    return gen, kill
+
+
+def bit_names(variables, bits):
+    names = []
+    while bits:
+        low = bits & -bits
+        names.append(variables[low.bit_length() - 1])
+        bits ^= low
+    return names
+
+
+class DataflowAnalyzer:
+    def __init__(self, tracer=None):
+        self.trace = tracer if tracer is not None else NULL_TRACER
+        self.warnings = []
+        self.variables = []
+        self.bits = []          # номер имени в Program.symbols -> бит переменной или 0
+        self.all = 0
+        self.summaries = {}     # id(оператора) -> Summary
+        self.read_anywhere = 0
+
+    def reads(self, node):
+        # биты объявленных переменных в выражении; обход без рекурсии
+        bits = self.bits
+        result = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Var):
+                result |= bits[node.symbol]
+            elif isinstance(node, (BinOp, Compare)):
+                stack.append(node.right)
+                stack.append(node.left)
+        return result
+
+    def summarize(self, body):
+        # Сводки всех операторов: номер выдаётся при первом посещении (порядок текста),
+        # gen и kill if и while - после их тел
+        summaries = self.summaries
+        read_anywhere = 0
+        stack = [(node, False) for node in reversed(body)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                summary = summaries[id(node)]
+                if isinstance(node, If):
+                    then_gen, then_kill = sequence(summaries, node.then_body)
+                    else_gen, else_kill = sequence(summaries, node.else_body)
+                    summary.gen = summary.reads | then_gen | else_gen
+                    summary.kill = then_kill & else_kill
+                else:
+                    summary.gen = summary.reads | sequence(summaries, node.body)[0]
+                continue
+            if isinstance(node, Assign):
+                summary = summaries[id(node)] = Summary(len(summaries), self.reads(node.value))
+                summary.kill = self.bits[node.symbol]
+            elif isinstance(node, Write):
+                summary = summaries[id(node)] = Summary(len(summaries), self.reads(node.value))
+            elif isinstance(node, If):
+                summary = summaries[id(node)] = Summary(len(summaries), self.reads(node.condition))
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.else_body))
+                stack.extend((child, False) for child in reversed(node.then_body))
+            elif isinstance(node, While):
+                summary = summaries[id(node)] = Summary(len(summaries), self.reads(node.condition))
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.body))
+            else:
+                raise ValueError(f"Неизвестный узел: {node}")
+            read_anywhere |= summary.reads
+        self.read_anywhere = read_anywhere
+
+    def unassigned_reads(self, body):
+        # (номер оператора, биты переменных, которые он может прочитать до присваивания)
+        summaries = self.summaries
+        found = []
+        bodies = [(body, 0)]
+        while bodies:
+            body, assigned = bodies.pop()
+            for node in body:
+                summary = summaries[id(node)]
+                missing = summary.reads & ~assigned
+                if missing:
+                    found.append((summary.order, missing))
+                if isinstance(node, If):
+                    bodies.append((node.then_body, assigned))
+                    bodies.append((node.else_body, assigned))
+                elif isinstance(node, While):
+                    bodies.append((node.body, assigned))
+                assigned |= summary.kill
+        return found
+
+    def dead_stores(self, body):
+        # (номер присваивания, бит переменной), если значение дальше не читается
+        summaries = self.summaries
+        found = []
+        bodies = [(body, 0)]
+        while bodies:
+            body, live = bodies.pop()
+            for node in reversed(body):
+                summary = summaries[id(node)]
+                if isinstance(node, Assign):
+                    if summary.kill and not live & summary.kill:
+                        found.append((summary.order, summary.kill))
+                elif isinstance(node, If):
+                    bodies.append((node.then_body, live))
+                    bodies.append((node.else_body, live))
+                live = summary.gen | (live & ~summary.kill)
+                if isinstance(node, While):
+                    # живое на входе в цикл - оно же живое в конце тела
+                    bodies.append((node.body, live))
+        return found
+
+    def analyze(self, program):
+        symbols = bind_symbols(program)
+        self.variables = list(program.declarations)
+        declared = [symbols.intern(name) for name in self.variables]
+        self.bits = [0] * len(symbols)
+        for i, symbol in enumerate(declared):
+            self.bits[symbol] = 1 << i
+        self.all = (1 << len(self.variables)) - 1
+        self.summaries = {}
+        self.summarize(program.body)
+        if self.trace.dataflow >= INFO:
+            self.trace.emit("dataflow", INFO, f"Операторов: {len(self.summaries)}, переменных: {len(self.variables)}")
+
+        found = []      # (номер оператора, сообщение)
+        reported = 0
+        for order, missing in sorted(self.unassigned_reads(program.body), key=lambda record: record[0]):
+            missing &= ~reported
+            reported |= missing
+            for name in bit_names(self.variables, missing):
+                found.append((order, f"Предупреждение: Переменная '{name}' может использоваться до присваивания."))
+        for order, target in self.dead_stores(program.body):
+            # о переменной, которая нигде не читается, сообщается один раз ниже
+            if target & self.read_anywhere:
+                name = self.variables[target.bit_length() - 1]
+                found.append((order, f"Предупреждение: Значение, присвоенное переменной '{name}', не используется."))
+
+        found.sort(key=lambda record: record[0])
+        self.warnings = [message for _, message in found]
+        for name in bit_names(self.variables, self.all & ~self.read_anywhere):
+            self.warnings.append(f"Предупреждение: Переменная '{name}' объявлена, но не используется.")
+        if self.trace.dataflow >= DEBUG:
+            for message in self.warnings:
+                self.trace.emit("dataflow", DEBUG, message)
+        return self.warnings
+
+
+def analyze_dataflow(program, tracer=None):
+    return DataflowAnalyzer(tracer).analyze(program)
@@ -0,0 +1,187 @@
+import argparse
+import random
+import sys
+
+# Генератор корректных программ для бенчмарков и проверки анализатора.
+#
+#     python generator.py --statements 5000 --depth 4 --comments 0.2 --seed 1 > prog.txt
+#
+# Программа проходит синтаксический и семантический анализ без ошибок: все переменные
+# объявлены, целым переменным присваиваются только целые литералы, за числом никогда
+# не идёт идентификатор.
+
+# Формы числовых литералов, которые понимает LexicalAnalyzer.parse_number
+NUMBER_FORMS = ("decimal", "real", "exponent", "binary", "octal", "hex", "suffix")
+REAL_FORMS = ("real", "exponent")
+
+ADD_OPS = ('+', '-')
+MUL_OPS = ('*', '/')
+# '=' лексер выдаёт как UNKNOWN, поэтому в условиях его нет
+REL_OPS = ('<', '>', '<=', '>=')
+
+
+class ProgramGenerator:
+    def __init__(self, variables=10, statements=100, depth=2, comment_density=0.1,
+                 number_mix=None, seed=None):
+        if variables < 1:
+            raise ValueError("Нужна хотя бы одна переменная")
+        self.variables = variables
+        self.statements = statements
+        self.depth = depth
+        self.comment_density = comment_density
+        mix = number_mix if number_mix is not None else {"decimal": 1}
+        for form in mix:
+            if form not in NUMBER_FORMS:
+                raise ValueError(f"Неизвестная форма числа: {form}")
+        self.forms = [form for form in mix if mix[form] > 0]
+        self.weights = [mix[form] for form in self.forms]
+        if not self.forms:
+            raise ValueError("В смеси числовых литералов нет ни одной формы")
+        self.integer_forms = [form for form in self.forms if form not in REAL_FORMS]
+        self.integer_weights = [mix[form] for form in self.integer_forms]
+        self.random = random.Random(seed)
+        # Вещественные переменные объявляются последними: старый семантический анализ
+        # (generate_symbol_table_and_operations) допускает '.' только при последнем типе real
+        if not self.integer_forms:
+            count_real = variables
+        elif len(self.integer_forms) < len(self.forms):
+            count_real = variables // 2
+        else:
+            count_real = 0
+        self.integer_names = [f"v{i}" for i in range(variables - count_real)]
+        self.real_names = [f"r{i}" for i in range(count_real)]
+        self.names = self.integer_names + self.real_names
+        self.integer_names_set = set(self.integer_names)
+        self.generated = 0      # число операторов в последней программе
+        self.max_depth = 0      # достигнутая глубина вложенности
+        self.comments = 0
+
+    # Литералы и выражения
+
+    def number(self, integer_only=False):
+        if integer_only:
+            forms, weights = self.integer_forms, self.integer_weights
+        else:
+            forms, weights = self.forms, self.weights
+        form = self.random.choices(forms, weights)[0]
+        rnd = self.random
+        value = rnd.randint(1, 4095)
+        if form == "decimal":
+            return str(value)
+        if form == "real":
+            return f"{rnd.randint(0, 999)}.{rnd.randint(0, 999)}"
+        if form == "exponent":
+            return f"{rnd.randint(1, 9)}.{rnd.randint(0, 99)}e{rnd.choice(('', '+', '-'))}{rnd.randint(1, 12)}"
+        if form == "binary":
+            return f"0{rnd.choice('bB')}{value:b}"
+        if form == "octal":
+            return f"0{rnd.choice('oO')}{value:o}"
+        if form == "hex":
+            return f"0{rnd.choice('xX')}{value:x}" if rnd.random() < 0.5 else f"0x{value:X}"
+        # суффикс 'h' допускает только десятичные цифры: они и пишутся в шестнадцатеричном
+        suffix = rnd.choice("boh")
+        if suffix == "b":
+            return f"{value:b}b"
+        if suffix == "o":
+            return f"{value:o}o"
+        return f"{value}h"
+
+    def operand(self, integer_only):
+        if self.random.random() < 0.6:
+            return self.random.choice(self.names)
+        return self.number(integer_only)
+
+    def expression(self, integer_only=False):
+        rnd = self.random
+        parts = [self.operand(integer_only)]
+        for _ in range(rnd.choice((0, 1, 1, 2, 3))):
+            parts.append(rnd.choice(ADD_OPS if rnd.random() < 0.6 else MUL_OPS))
+            parts.append(self.operand(integer_only))
+        return " ".join(parts)
+
+    def condition(self):
+        return f"{self.expression()} {self.random.choice(REL_OPS)} {self.operand(False)}"
+
+    # Операторы
+
+    def comment(self, lines, indent):
+        if self.comment_density > 0 and self.random.random() < self.comment_density:
+            self.comments += 1
+            lines.append(f"{indent}{{ комментарий {self.comments} }}")
+
+    def block(self, lines, budget, level):
+        # Операторы на одном уровне вложенности; budget - сколько ещё можно выдать
+        indent = "  " * (level + 1)
+        self.max_depth = max(self.max_depth, level)
+        while budget > 0:
+            self.comment(lines, indent)
+            rnd = self.random
+            if level < self.depth and budget >= 3 and rnd.random() < 0.3:
+                inner = rnd.randint(2, min(budget - 1, 8 + 4 * (self.depth - level)))
+                then_size = rnd.randint(1, inner - 1) if rnd.random() < 0.7 else inner
+                else_size = inner - then_size
+                lines.append(f"{indent}if {self.condition()} then [")
+                self.generated += 1
+                self.block(lines, then_size, level + 1)
+                if else_size:
+                    lines.append(f"{indent}]")
+                    lines.append(f"{indent}else [")
+                    self.block(lines, else_size, level + 1)
+                lines.append(f"{indent}]")
+                budget -= 1 + inner
+            elif rnd.random() < 0.15:
+                lines.append(f"{indent}write ({self.expression()});")
+                self.generated += 1
+                budget -= 1
+            else:
+                name = rnd.choice(self.names)
+                integer_only = name in self.integer_names_set
+                lines.append(f"{indent}{name} := {self.expression(integer_only)};")
+                self.generated += 1
+                budget -= 1
+
+    def generate(self):
+        self.generated = 0
+        self.max_depth = 0
+        self.comments = 0
+        lines = ["program", "var"]
+        for names, type_ in ((self.integer_names, "integer"), (self.real_names, "real")):
+            for i in range(0, len(names), 10):
+                group = names[i:i + 10]
+                last = i + 10 >= len(names)
+                lines.append(f"  {', '.join(group)}{' : ' + type_ + ';' if last else ','}")
+        lines.append("begin")
+        self.block(lines, self.statements, 0)
+        lines.append("end.")
+        return "\n".join(lines) + "\n"
+
+
+def generate_program(variables=10, statements=100, depth=2, comment_density=0.1, number_mix=None, seed=None):
+    return ProgramGenerator(variables, statements, depth, comment_density, number_mix, seed).generate()
+
+
+def parse_mix(text):
+    # "decimal=3,hex=1,real=1" -> {"decimal": 3, "hex": 1, "real": 1}
+    mix = {}
+    for item in text.split(","):
+        form, _, weight = item.partition("=")
+        mix[form.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор корректных программ")
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--statements", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=2, help="наибольшая вложенность if")
+    parser.add_argument("--comments", type=float, default=0.1, help="доля операторов с комментарием")
+    parser.add_argument("--numbers", default="decimal", help="смесь форм чисел, например decimal=3,hex=1,real=1")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    sys.stdout.write(generate_program(args.variables, args.statements, args.depth, args.comments,
+                                      parse_mix(args.numbers), args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import sys
+
+# Грамматика языка для табличного LL(1)-разбора (ll1.py) и генератор таблицы:
+# множества FIRST и FOLLOW, таблица «нетерминал x вид токена -> продукция».
+#
+#     python grammar.py    печатает терминалы, FIRST/FOLLOW и разрешённые конфликты
+#
+# Терминал - вид токена. Ключевые слова и разделители, которые различает парсер, - отдельные
+# виды, остальные токены того же типа сливаются в один вид по типу токена ('KEYWORD',
+# 'DELIMITER', ...). REL - операторы сравнения, которые допускает условие.
+# В правых частях: имя в кавычках или из заглавных букв - терминал, имя с заглавной
+# буквы - нетерминал, '@имя' - действие над стеком значений (TableParser в ll1.py).
+
+KEYWORDS = ('program', 'var', 'begin', 'end', 'if', 'then', 'else', 'while', 'do', 'write',
+            'integer', 'real')
+DELIMITERS = (';', '[', ']', '(', ')', '.')
+REL_OPS = ('>', '<', '=', '>=', '<=')
+TOKEN_TYPES = ('ID', 'NUMBER', 'ADD_OP', 'MUL_OP', 'REL_OP', 'ASSIGN', 'KEYWORD', 'DELIMITER',
+               'STRING', 'ERROR', 'UNKNOWN', 'SUB_OP', 'DIV_OP')
+EOF = '$'
+
+TERMINALS = tuple(f"'{k}'" for k in KEYWORDS) + tuple(f"'{d}'" for d in DELIMITERS) \
+    + ('REL',) + TOKEN_TYPES + (EOF,)
+
+# Раздел объявлений парсер не проверяет: до 'begin' допустим любой токен
+SKIPPED = tuple(t for t in TERMINALS if t not in ("'begin'", EOF))
+
+GRAMMAR = [
+    ('Program', ["'program'", 'Header', "'begin'", '@list', 'Statements', "'end'", "'.'", EOF, '@program']),
+    # После 'var' имена и типы собираются в объявления, без 'var' раздел только пропускается
+    ('Header', ["'var'", 'Declarations']),
+    *[('Header', [t, 'Skipped']) for t in SKIPPED if t != "'var'"],
+    ('Header', []),
+    *[('Declarations', [t, '@declare', 'Declarations']) for t in SKIPPED],
+    ('Declarations', []),
+    *[('Skipped', [t, 'Skipped']) for t in SKIPPED],
+    ('Skipped', []),
+
+    ('Statements', ['Statement', 'Statements']),
+    ('Statements', []),
+    ('Statement', ['ID', '@push', "':='", 'Expression', "';'", '@assign']),
+    ('Statement', ["'if'", 'Condition', "'then'", "'['", '@list', 'Statements', "']'", 'Else', '@if']),
+    ('Statement', ["'while'", 'Condition', "'do'", 'Body', '@while']),
+    ('Statement', ["'write'", "'('", 'Expression', "')'", '@write']),
+    ('Statement', ["';'"]),
+    ('Else', ["'else'", 'Body']),
+    ('Else', ['@list']),
+    # Тело без скобок продолжается до 'end' или ']': конфликт Statements -> ε / Statement
+    # на его продолжении разрешается жадно, как в SyntaxAnalyzer.statements
+    ('Body', ["'['", '@list', 'Statements', "']'"]),
+    ('Body', ['@list', 'Statements']),
+    ('Condition', ['Expression', 'REL', '@push', 'Factor', '@compare']),
+    ('Expression', ['Term', 'ExpressionTail']),
+    ('ExpressionTail', ['ADD_OP', '@push', 'Term', '@binop', 'ExpressionTail']),
+    ('ExpressionTail', ['SUB_OP', '@push', 'Term', '@binop', 'ExpressionTail']),
+    ('ExpressionTail', []),
+    ('Term', ['Factor', 'TermTail']),
+    ('TermTail', ['MUL_OP', '@push', 'Factor', '@binop', 'TermTail']),
+    ('TermTail', ['DIV_OP', '@push', 'Factor', '@binop', 'TermTail']),
+    ('TermTail', []),
+    ('Factor', ['ID', '@var']),
+    ('Factor', ['NUMBER', '@num']),
+]
+
+# Терминал ':=' - это тип ASSIGN
+GRAMMAR = [(lhs, ['ASSIGN' if symbol == "':='" else symbol for symbol in rhs]) for lhs, rhs in GRAMMAR]
+
+START = 'Program'
+
+
+def is_action(symbol):
+    return symbol.startswith('@')
+
+
+def is_terminal(symbol):
+    return symbol in TERMINAL_SET
+
+
+TERMINAL_SET = frozenset(TERMINALS)
+
+
+def nonterminals(grammar):
+    names = []
+    for lhs, rhs in grammar:
+        if lhs not in names:
+            names.append(lhs)
+    return names
+
+
+def first_of_sequence(symbols, first, nullable):
+    # FIRST цепочки и признак того, что она выводит пустую строку
+    result = set()
+    for symbol in symbols:
+        if is_action(symbol):
+            continue
+        if is_terminal(symbol):
+            result.add(symbol)
+            return result, False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result, False
+    return result, True
+
+
+def compute_first(grammar):
+    first = {name: set() for name in nonterminals(grammar)}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in grammar:
+            symbols, empty = first_of_sequence(rhs, first, nullable)
+            if not symbols <= first[lhs]:
+                first[lhs] |= symbols
+                changed = True
+            if empty and lhs not in nullable:
+                nullable.add(lhs)
+                changed = True
+    return first, nullable
+
+
+def compute_follow(grammar, first, nullable, start=START):
+    follow = {name: set() for name in nonterminals(grammar)}
+    follow[start].add(EOF)
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in grammar:
+            symbols = [symbol for symbol in rhs if not is_action(symbol)]
+            for i, symbol in enumerate(symbols):
+                if is_terminal(symbol):
+                    continue
+                rest, empty = first_of_sequence(symbols[i + 1:], first, nullable)
+                if empty:
+                    rest = rest | follow[lhs]
+                if not rest <= follow[symbol]:
+                    follow[symbol] |= rest
+                    changed = True
+    return follow
+
+
+class ParseTable:
+    # Таблица в целых числах: терминалы 0..len(terminals)-1, нетерминалы - номера строк,
+    # rows[нетерминал][терминал] - номер продукции или -1
+    def __init__(self, grammar=GRAMMAR, start=START):
+        self.grammar = grammar
+        self.terminals = TERMINALS
+        self.terminal_ids = {name: i for i, name in enumerate(TERMINALS)}
+        self.nonterminals = nonterminals(grammar)
+        self.nonterminal_ids = {name: i for i, name in enumerate(self.nonterminals)}
+        self.first, self.nullable = compute_first(grammar)
+        self.follow = compute_follow(grammar, self.first, self.nullable, start)
+        self.conflicts = []
+        self.rows = [[-1] * len(TERMINALS) for _ in self.nonterminals]
+        # через FIRST продукция выбрана или через FOLLOW (для пустой правой части)
+        via_follow = [[False] * len(TERMINALS) for _ in self.nonterminals]
+        for number, (lhs, rhs) in enumerate(grammar):
+            row = self.nonterminal_ids[lhs]
+            symbols, empty = first_of_sequence(rhs, self.first, self.nullable)
+            entries = [(terminal, False) for terminal in symbols]
+            if empty:
+                entries += [(terminal, True) for terminal in self.follow[lhs]]
+            for terminal, by_follow in entries:
+                column = self.terminal_ids[terminal]
+                previous = self.rows[row][column]
+                if previous == -1 or previous == number:
+                    self.rows[row][column] = number
+                    via_follow[row][column] = by_follow
+                elif via_follow[row][column] != by_follow:
+                    # FIRST/FOLLOW: жадный выбор - продолжить текущую конструкцию
+                    if via_follow[row][column]:
+                        self.rows[row][column] = number
+                        via_follow[row][column] = False
+                    self.conflicts.append((lhs, terminal, self.rows[row][column]))
+                else:
+                    raise ValueError(f"Грамматика не LL(1): {lhs} на {terminal} - продукции {previous} и {number}")
+        self.start = self.nonterminal_ids[start]
+
+    def describe(self):
+        lines = ["Терминалы: " + " ".join(f"{i}:{name}" for i, name in enumerate(self.terminals))]
+        for name in self.nonterminals:
+            nullable = " (ε)" if name in self.nullable else ""
+            lines.append(f"FIRST({name}){nullable} = {{{', '.join(sorted(self.first[name]))}}}")
+            lines.append(f"FOLLOW({name}) = {{{', '.join(sorted(self.follow[name]))}}}")
+        for lhs, terminal, chosen in self.conflicts:
+            rhs = " ".join(self.grammar[chosen][1])
+            lines.append(f"Конфликт {lhs} на {terminal}: выбрано {lhs} -> {rhs}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(ParseTable().describe())
+    sys.exit(0)
@@ -0,0 +1,363 @@
+from array import array
+
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from semantic import analyze_single_pass
+from symbols import Interner
+from syntax_tree import Program
+from tokenstream import TokenStream
+
+# Инкрементальный анализ для редактора: после правки текста заново разбирается
+# только затронутый участок токенов и только охватывающий его оператор тела программы.
+
+
+class GapTokens:
+    # Токены с «разрывом» в месте последней правки, как в gap buffer. До разрыва -
+    # обычные смещения от начала текста, после - расстояния от конца текста, причём
+    # хвост хранится в обратном порядке. Правка внутри текста не меняет ни то, ни другое,
+    # поэтому сдвигать смещения всех последующих токенов не нужно: переносится только
+    # участок между прошлой и новой правкой.
+    TYPES = TokenStream.TYPES
+    CODES = TokenStream.CODES
+    NUMBER_SUFFIX = TokenStream.NUMBER_SUFFIX
+    STRING_OPEN = TokenStream.STRING_OPEN
+    code_for = TokenStream.code_for
+
+    def __init__(self, stream):
+        self.source = stream.source
+        self.kinds = array('B', stream.kinds)
+        self.starts = array('I', stream.starts)
+        self.ends = array('I', stream.ends)
+        self.tail_kinds = array('B')
+        self.tail_starts = array('I')
+        self.tail_ends = array('I')
+
+    def __len__(self):
+        return len(self.kinds) + len(self.tail_kinds)
+
+    def move_gap(self, index):
+        n = len(self.source)
+        head = len(self.kinds)
+        if head > index:
+            # Хвост хранится в обратном порядке: переносимый участок разворачивается
+            self.tail_kinds.extend(self.kinds[index:][::-1])
+            self.tail_starts.extend(array('I', [n - x for x in self.starts[index:][::-1]]))
+            self.tail_ends.extend(array('I', [n - x for x in self.ends[index:][::-1]]))
+            del self.kinds[index:]
+            del self.starts[index:]
+            del self.ends[index:]
+        elif head < index and self.tail_kinds:
+            cut = max(len(self.tail_kinds) - (index - head), 0)
+            self.kinds.extend(self.tail_kinds[cut:][::-1])
+            self.starts.extend(array('I', [n - x for x in self.tail_starts[cut:][::-1]]))
+            self.ends.extend(array('I', [n - x for x in self.tail_ends[cut:][::-1]]))
+            del self.tail_kinds[cut:]
+            del self.tail_starts[cut:]
+            del self.tail_ends[cut:]
+
+    def kind(self, i):
+        if i < len(self.kinds):
+            return self.kinds[i]
+        return self.tail_kinds[len(self) - 1 - i]
+
+    def span(self, i):
+        if i < len(self.kinds):
+            return self.starts[i], self.ends[i]
+        j = len(self) - 1 - i
+        n = len(self.source)
+        return n - self.tail_starts[j], n - self.tail_ends[j]
+
+    def type(self, i):
+        return self.TYPES[self.kind(i)]
+
+    def value(self, i):
+        start, end = self.span(i)
+        text = self.source[start:end]
+        code = self.kind(i)
+        if code == self.NUMBER_SUFFIX:
+            return text + text[-1].lower()
+        if code == self.STRING_OPEN:
+            return text + "'"
+        return text
+
+    def token(self, i):
+        return self.type(i), self.value(i)
+
+    def first_ending_at_or_after(self, offset):
+        # Номер первого токена, который заканчивается не раньше offset
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.span(middle)[1] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.token(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.token(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.token(i)
+
+    def iter_range(self, start, end):
+        for i in range(start, end):
+            yield self.token(i)
+
+    def to_stream(self):
+        stream = TokenStream(self.source)
+        for i in range(len(self)):
+            start, end = self.span(i)
+            stream.append_code(self.kind(i), start, end)
+        return stream
+
+
+class IncrementalSession:
+    def __init__(self, text):
+        self.text = text
+        self.lex_error = None
+        self.tokens = None
+        self.begin_index = None
+        self.status = None
+        self.declarations = {}
+        # номера имён в дереве: один Interner на всю сессию, иначе у операторов,
+        # разобранных заново, номера разошлись бы с остальными
+        self.symbols = Interner()
+        self.spans = None
+        self.span_starts = None
+        self.span_gap = 0
+        self.body_start = None
+        self.body_end = None
+        self._semantic = None
+        self._relex_all()
+        self._reparse_all()
+
+    # Лексика
+
+    def _relex_all(self):
+        self.lex_error = None
+        try:
+            stream = LexicalAnalyzer(self.text, engine="regex").tokenize_stream()
+        except Exception as e:
+            # Лексер упал (например, на числе в самом конце текста): берём токены до ошибки
+            self.lex_error = f"{type(e).__name__}: {e}"
+            stream = TokenStream(self.text)
+            try:
+                for (type_, value), start, end in LexicalAnalyzer(self.text, engine="regex").iter_spans():
+                    stream.append(type_, value, start, end)
+            except Exception:
+                pass
+        self.tokens = GapTokens(stream)
+        self.begin_index = self._find_begin(0, len(self.tokens))
+
+    def _is_begin(self, i):
+        return self.tokens.kind(i) == self.tokens.CODES['KEYWORD'] and self.tokens.value(i) == 'begin'
+
+    def _find_begin(self, start, end):
+        for i in range(start, end):
+            if self._is_begin(i):
+                return i
+        return None
+
+    def _relex(self, offset, deleted, inserted):
+        # Возвращает (i, старый конец, новый конец) - диапазон заменённых токенов
+        tokens = self.tokens
+        old_total = len(tokens)
+        first = tokens.first_ending_at_or_after(offset)
+        tokens.move_gap(first)
+        tokens.source = self.text
+        edit_end = offset + len(inserted)
+        restart = tokens.ends[first - 1] if first > 0 else 0
+        old_begin = self.begin_index
+
+        lexer = LexicalAnalyzer(self.text, engine="regex")
+        lexer.before_begin = old_begin is None or old_begin >= first
+        n = len(self.text)
+        pos = restart
+        while pos < n:
+            before_begin = lexer.before_begin
+            end = lexer.scan_regex_at(pos)
+            if lexer.tokens:
+                type_, value = lexer.tokens.pop()
+                start = lexer.token_start
+                if start >= edit_end:
+                    # Старые токены, начинающиеся раньше нового, заменены им
+                    while tokens.tail_starts and n - tokens.tail_starts[-1] < start:
+                        tokens.tail_kinds.pop()
+                        tokens.tail_starts.pop()
+                        tokens.tail_ends.pop()
+                    if tokens.tail_starts and n - tokens.tail_starts[-1] == start:
+                        old_index = old_total - len(tokens.tail_starts)
+                        old_before_begin = old_begin is None or old_begin >= old_index
+                        if before_begin == old_before_begin:
+                            # Дальше текст и состояние лексера те же: старые токены верны
+                            break
+                tokens.kinds.append(tokens.code_for(type_, value, start, min(end, n)))
+                tokens.starts.append(start)
+                tokens.ends.append(min(end, n))
+            pos = end
+        else:
+            del tokens.tail_kinds[:]
+            del tokens.tail_starts[:]
+            del tokens.tail_ends[:]
+
+        old_end = old_total - len(tokens.tail_kinds)
+        new_end = len(tokens.kinds)
+        if old_begin is not None and old_begin < first:
+            self.begin_index = old_begin
+        else:
+            self.begin_index = self._find_begin(first, new_end)
+            if self.begin_index is None and old_begin is not None:
+                if old_begin >= old_end:
+                    self.begin_index = old_begin + new_end - old_end
+                else:
+                    self.begin_index = self._find_begin(new_end, len(tokens))
+        return first, old_end, new_end
+
+    # Синтаксис
+
+    def _reparse_all(self):
+        try:
+            parser = SyntaxAnalyzer(self.tokens, symbols=self.symbols)
+            self.status = parser.parse()
+        except Exception as e:
+            self.status = str(e)
+            self.spans = None
+            return
+        self.declarations = parser.declarations
+        self.spans = list(parser.statement_spans)
+        self.body_start = parser.body_start
+        self.body_end = parser.body_end
+        # Номера первых токенов операторов - с тем же разрывом, что и у токенов:
+        # до span_gap - от начала, дальше - расстояние до конца потока токенов
+        self.span_starts = []
+        position = self.body_start
+        for node, count in self.spans:
+            self.span_starts.append(position)
+            position += count
+        self.span_gap = len(self.spans)
+
+    def _span_start(self, k, total):
+        if k < self.span_gap:
+            return self.span_starts[k]
+        return total - self.span_starts[k]
+
+    def _move_span_gap(self, index, total):
+        starts = self.span_starts
+        while self.span_gap > index:
+            self.span_gap -= 1
+            starts[self.span_gap] = total - starts[self.span_gap]
+        while self.span_gap < index:
+            starts[self.span_gap] = total - starts[self.span_gap]
+            self.span_gap += 1
+
+    def _first_span_from(self, token, total):
+        # Номер первого оператора, который начинается не раньше токена token
+        low, high = 0, len(self.spans)
+        while low < high:
+            middle = (low + high) // 2
+            if self._span_start(middle, total) < token:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _reparse(self, first, old_end, new_end):
+        # Перезапуск разбора только для операторов тела, задетых заменой токенов
+        # [first, old_end) -> [first, new_end). Возвращает число разобранных заново токенов.
+        delta = new_end - old_end
+        if self.spans is None or first < self.body_start or old_end > self.body_end:
+            self._reparse_all()
+            return len(self.tokens)
+        old_total = len(self.tokens) - delta
+        # Операторы, начинающиеся не позже first, правка не сдвинула: переводим разрыв к ним
+        self._move_span_gap(self._first_span_from(first + 1, old_total), old_total)
+        # Операторы, содержащие токены от first - 1 до old_end включительно
+        low = max(first - 1, self.body_start)
+        high = max(old_end, first)
+        a = self.span_gap - 1
+        if a > 0 and self.span_starts[a] > low:
+            a -= 1
+        if a >= 0 and self.span_starts[a] + self.spans[a][1] <= low:
+            a += 1
+        if a < 0 or a == len(self.spans):
+            a = len(self.spans)
+            region_start = region_end = self.body_end
+            b = a - 1
+        else:
+            region_start = self.span_starts[a]
+            b = a
+            # границы считаются в старых номерах токенов: после правки они сдвинуты на delta
+            while b + 1 < len(self.spans) and self._span_start(b + 1, old_total) <= high:
+                b += 1
+            region_end = self._span_start(b, old_total) + self.spans[b][1]
+        region_end = max(region_end, old_end)
+        if region_end > self.body_end:
+            self._reparse_all()
+            return len(self.tokens)
+        new_region_end = region_end + delta
+        # Проверка «число перед идентификатором» смотрит через границу участка
+        if region_start > 0 and self.tokens.type(region_start - 1) == 'NUMBER':
+            self._reparse_all()
+            return len(self.tokens)
+
+        spans = []
+        try:
+            parser = SyntaxAnalyzer(self.tokens.iter_range(region_start, new_region_end), symbols=self.symbols)
+            parser.statements(spans)
+            complete = parser.current_token is None
+        except Exception:
+            complete = False
+        if not complete:
+            self._reparse_all()
+            return len(self.tokens)
+        starts = []
+        position = region_start
+        for node, count in spans:
+            starts.append(position)
+            position += count
+        self.spans[a:b + 1] = spans
+        self.span_starts[a:b + 1] = starts
+        self.span_gap = a + len(starts)
+        self.body_end += delta
+        self.status = "OK"
+        return new_region_end - region_start
+
+    # Интерфейс сессии
+
+    def edit(self, offset, deleted, inserted):
+        if not 0 <= offset <= len(self.text) or offset + deleted > len(self.text):
+            raise ValueError("Правка выходит за границы текста")
+        self.text = self.text[:offset] + inserted + self.text[offset + deleted:]
+        self._semantic = None
+        if self.lex_error is not None:
+            self._relex_all()
+            self._reparse_all()
+            return {"relexed": len(self.tokens), "reparsed": len(self.tokens)}
+        try:
+            first, old_end, new_end = self._relex(offset, deleted, inserted)
+        except Exception:
+            self._relex_all()
+            self._reparse_all()
+            return {"relexed": len(self.tokens), "reparsed": len(self.tokens)}
+        reparsed = self._reparse(first, old_end, new_end)
+        return {"relexed": new_end - first, "reparsed": reparsed}
+
+    @property
+    def ast(self):
+        if self.spans is None:
+            return None
+        return Program(self.declarations, [node for node, count in self.spans if node is not None], self.symbols)
+
+    def semantic(self):
+        # Таблица символов, операции и ошибки; пересчитываются при первом запросе после правки
+        if self._semantic is None:
+            self._semantic = analyze_single_pass(self.tokens)
+        return self._semantic
@@ -1,5 +1,8 @@
+import re
 from enum import Enum
 
+from tokenstream import TokenStream
+
 class LexicalAnalyzer:
     class State(Enum):
         ID = "ID"  # Идентификаторы
@@ -13,7 +16,7 @@ class LexicalAnalyzer:
     # Ключевые слова
     TW = [
         "program", "var", "begin", "end", "if", "else", "while", "for", "to", "then", "next", "as",
-        "readln", "write", "true", "false", "%", "!", "$", "end_else", "real", "integer"
+        "readln", "write", "true", "false", "%", "!", "$", "end_else", "real", "integer", "do"
     ]
 
     # Разделители и операторы
@@ -22,12 +25,73 @@ class LexicalAnalyzer:
         "!=", "==", "<", "<=", ">", ">="
     ]
 
-    def __init__(self, input_text):
+    # Множество ключевых слов для быстрой проверки в движке "regex"
+    TW_SET = frozenset(TW)
+
+    # Типы токенов-операторов, которые выдаёт parse_delimiter_or_operator
+    OP_TYPES = {
+        "<": "REL_OP", "<=": "REL_OP", ">": "REL_OP", ">=": "REL_OP",
+        "+": "ADD_OP", "-": "ADD_OP", "*": "MUL_OP", "/": "MUL_OP", ":=": "ASSIGN",
+        "[": "DELIMITER", "]": "DELIMITER", "}": "DELIMITER", "(": "DELIMITER", ")": "DELIMITER",
+        ",": "DELIMITER", ":": "DELIMITER", ";": "DELIMITER", ".": "DELIMITER",
+    }
+
+    # Все классы токенов в одной скомпилированной регулярке. ASCII разбирается здесь,
+    # а токены, где возможен не-ASCII символ (isalpha/isdigit в юникоде) или конец текста
+    # внутри числа, отдаются посимвольному разбору (группа SLOW и проверки в _tokenize_scan).
+    MASTER = re.compile(r"""
+        (?P<WS>[ \n\r\t]+)
+      | (?P<ID>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<BASED>0(?:[Bb][01]*|[Oo][0-7]*|[Xx][0-9A-Fa-f]*))
+      | (?P<EXPERR>[0-9]+(?:\.[0-9]*)?[Ee](?![+-]?[0-9])[+-]?)
+      | (?P<NUM>[0-9]+(?:\.[0-9]*)?(?:[Ee][+-]?[0-9]+)?)
+      | (?P<STR>'[^']*'?)
+      | (?P<COM>\{[^}]*\}?)
+      | (?P<NEQ>!=)
+      | (?P<BANG>!)
+      | (?P<KW>[%$])
+      | (?P<OP>:=|<=|>=|[\[\](),:;.+\-*/<>}])
+      | (?P<UNK>[\x00-\x7f])
+      | (?P<SLOW>.)
+    """, re.VERBOSE | re.DOTALL)
+
+    # Та же грамматика одной группой: для текстов, где вне комментариев и строк нет
+    # не-ASCII символов, лексемы целиком выделяет findall без цикла по совпадениям
+    LEXEMES = re.compile(r"""[ \n\r\t]*(
+        [A-Za-z][A-Za-z0-9_]*
+      | 0(?:[Bb][01]*|[Oo][0-7]*|[Xx][0-9A-Fa-f]*)[bohBOH]?
+      | [0-9]+(?:\.[0-9]*)?[Ee](?![+-]?[0-9])[+-]?
+      | [0-9]+(?:\.[0-9]*)?(?:[Ee][+-]?[0-9]+)?[bohBOH]?
+      | '[^']*'?
+      | \{[^}]*\}?
+      | !=|:=|<=|>=
+      | [^ \n\r\t]
+    )""", re.VERBOSE)
+
+    # Комментарии и строки: внутри них не-ASCII символы не влияют на разбор
+    COMMENTS_AND_STRINGS = re.compile(r"\{[^}]*\}?|'[^']*'?")
+
+    # Допустимые цифры после префиксов 0b/0o/0x
+    BASE_DIGITS = {"b": "01", "o": "01234567", "x": "0123456789abcdefABCDEF"}
+
+    ENGINES = ("classic", "regex")
+
+    def __init__(self, input_text, engine="classic", chunk_size=65536):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок лексера: {engine}")
+        self.engine = engine
+        self.chunk_size = chunk_size
+        # Текстовый файл читается кусками в iter_tokens, а не целиком
+        self.stream = None
+        if hasattr(input_text, 'read'):
+            self.stream = input_text
+            input_text = ''
         self.text = input_text
         self.pos = 0
         self.current_char = self.text[self.pos] if self.text else None
         self.tokens = []
         self.before_begin = True
+        self.token_start = 0
 
     def advance(self):
         self.pos += 1
@@ -131,36 +195,291 @@ class LexicalAnalyzer:
         else:
             self.add_token('UNKNOWN', text, )
 
+    def scan_token(self):
+        self.token_start = self.pos
+        if self.current_char.isalpha():
+            self.parse_identifier_or_keyword()
+        elif self.current_char.isdigit():
+            self.parse_number()
+        elif self.current_char == "'":
+            self.parse_string()
+        elif self.current_char == '{':
+            self.parse_comment()
+        elif self.current_char == '!':
+            if self.text[self.pos:self.pos + 2] == "!=":
+                self.add_token('REL_OP', '!=', )
+                self.advance()
+                self.advance()
+            else:
+                if self.before_begin:
+                    self.add_token('KEYWORD', '!', )
+                else:
+                    self.add_token('DELIMITER', '!', )
+                self.advance()
+        elif self.current_char in "%$":
+            self.add_token('KEYWORD', self.current_char, )
+            self.advance()
+        elif self.current_char in self.TD:
+            self.parse_delimiter_or_operator()
+        else:
+            self.add_token('UNKNOWN', self.current_char, )
+            self.advance()
+
+    def scan_token_at(self, pos):
+        # Один токен посимвольным разбором (с пропуском пробелов перед ним), начиная с pos;
+        # возвращает позицию после него
+        self.pos = pos
+        self.current_char = self.text[pos]
+        self.clear_whitespace()
+        if self.current_char:
+            self.scan_token()
+        return self.pos
+
     def tokenize(self):
+        if self.stream is not None:
+            self.tokens = list(self.iter_tokens())
+            return self.tokens
+        if self.engine == "regex":
+            return self._tokenize_regex()
         while self.current_char:
             self.clear_whitespace()
             if not self.current_char:
                 break
-            if self.current_char.isalpha():
-                self.parse_identifier_or_keyword()
-            elif self.current_char.isdigit():
-                self.parse_number()
-            elif self.current_char == "'":
-                self.parse_string()
-            elif self.current_char == '{':
-                self.parse_comment()
-            elif self.current_char == '!':
-                if self.text[self.pos:self.pos + 2] == "!=":
-                    self.add_token('REL_OP', '!=', )
-                    self.advance()
-                    self.advance()
+            self.scan_token()
+        return self.tokens
+
+    def _tokenize_regex(self):
+        text = self.text
+        if text.isascii() or self.COMMENTS_AND_STRINGS.sub('', text).isascii():
+            return self._tokenize_bulk()
+        return self._tokenize_scan()
+
+    def classify_lexeme(self, text):
+        # (тип, значение) для лексемы из LEXEMES; None для комментария
+        first = text[0]
+        if first.isalpha():
+            return ('KEYWORD' if text in self.TW_SET else 'ID', text)
+        if first.isdigit():
+            if text[:2].lower() in ("0b", "0o", "0x"):
+                digits = self.BASE_DIGITS[text[1].lower()]
+                has_suffix = len(text) > 2 and text[-1] not in digits
+            elif text[-1] in "eE+-":
+                return ('ERROR', text)
+            else:
+                has_suffix = text[-1] in "bohBOH"
+            if has_suffix:
+                return ('NUMBER', text + text[-1].lower())
+            return ('NUMBER', text)
+        if first == "'":
+            if len(text) < 2 or text[-1] != "'":
+                text += "'"
+            return ('STRING', text)
+        if first == '{':
+            return None
+        if text == '!=':
+            return ('REL_OP', text)
+        if text == '!':
+            return ('DELIMITER', text)
+        if text in "%$":
+            return ('KEYWORD', text)
+        if text in self.OP_TYPES:
+            return (self.OP_TYPES[text], text)
+        return ('UNKNOWN', text)
+
+    def _tokenize_bulk(self):
+        text = self.text
+        lexemes = self.LEXEMES.findall(text)
+        # Одинаковые лексемы разбираются один раз и делят один кортеж
+        table = {lexeme: self.classify_lexeme(lexeme) for lexeme in set(lexemes)}
+        tokens = [table[lexeme] for lexeme in lexemes]
+        if 'begin' in table:
+            limit = lexemes.index('begin')
+            self.before_begin = False
+        else:
+            limit = len(lexemes)
+        if '!' in table:
+            for i in range(limit):
+                if lexemes[i] == '!':
+                    tokens[i] = ('KEYWORD', '!')
+        if '{' in text:
+            tokens = [token for token in tokens if token is not None]
+        self.tokens = tokens
+        # Число в самом конце текста parse_number разбирает по-особому
+        if lexemes and lexemes[-1][0].isdigit() and text.endswith(lexemes[-1]):
+            tokens.pop()
+            self.scan_token_at(len(text) - len(lexemes[-1]))
+        else:
+            self.pos = len(text)
+            self.current_char = None
+        return self.tokens
+
+    def _tokenize_scan(self):
+        pos = 0
+        n = len(self.text)
+        while pos < n:
+            pos = self.scan_regex_at(pos)
+        self.pos = pos
+        self.current_char = None
+        return self.tokens
+
+    def scan_regex_at(self, pos):
+        # Один токен движком "regex"; возвращает позицию после него
+        text = self.text
+        m = self.MASTER.match(text, pos)
+        kind = m.lastgroup
+        end = m.end()
+        append = self.tokens.append
+        if kind == 'WS' or kind == 'COM':
+            return end
+        self.token_start = pos
+        if kind == 'ID':
+            if end < len(text) and text[end] >= '\x80':
+                return self.scan_token_at(pos)
+            value = m.group()
+            if value in self.TW_SET:
+                append(('KEYWORD', value))
+                if value == 'begin':
+                    self.before_begin = False
+            else:
+                append(('ID', value))
+        elif kind == 'OP':
+            value = m.group()
+            append((self.OP_TYPES[value], value))
+        elif kind == 'NUM' or kind == 'BASED':
+            # В конце текста и перед не-ASCII символом поведение parse_number особое
+            if end >= len(text) or text[end] >= '\x80':
+                return self.scan_token_at(pos)
+            suffix = text[end]
+            if suffix in 'bohBOH':
+                end += 1
+                append(('NUMBER', text[pos:end] + suffix.lower()))
+            else:
+                append(('NUMBER', m.group()))
+        elif kind == 'EXPERR':
+            if end >= len(text) or text[end] >= '\x80':
+                return self.scan_token_at(pos)
+            append(('ERROR', m.group()))
+        elif kind == 'STR':
+            value = m.group()
+            if len(value) < 2 or value[-1] != "'":
+                value += "'"
+            append(('STRING', value))
+        elif kind == 'NEQ':
+            append(('REL_OP', '!='))
+        elif kind == 'BANG':
+            append(('KEYWORD' if self.before_begin else 'DELIMITER', '!'))
+        elif kind == 'KW' or kind == 'UNK':
+            append(('KEYWORD' if kind == 'KW' else 'UNKNOWN', m.group()))
+        else:
+            return self.scan_token_at(pos)
+        return end
+
+    def iter_tokens(self):
+        # Токены по одному, без накопления всего списка
+        for token, start, end in self.iter_spans():
+            yield token
+
+    def iter_spans(self):
+        # Тройки (токен, начало, конец) со смещениями от начала всего текста
+        self.tokens = []
+        self.before_begin = True
+        scan = self.scan_regex_at if self.engine == "regex" else self.scan_token_at
+        if self.stream is None:
+            pos = 0
+            while pos < len(self.text):
+                pos = scan(pos)
+                if self.tokens:
+                    yield self.tokens.pop(), self.token_start, min(pos, len(self.text))
+            return
+        self.text = ''
+        base = 0
+        pos = 0
+        eof = False
+        read_size = self.chunk_size
+        while True:
+            if pos >= len(self.text):
+                if eof:
+                    break
+                base += len(self.text)
+                self.text = ''
+                pos = 0
+                chunk = self.stream.read(read_size)
+                if not chunk:
+                    eof = True
+                self.text = chunk
+                continue
+            before_begin = self.before_begin
+            try:
+                end = scan(pos)
+            except TypeError:
+                # parse_number упёрся в конец буфера; в конце файла это настоящая ошибка
+                if eof:
+                    raise
+                end = len(self.text)
+            # Токен дошёл до конца буфера: он мог продолжаться в следующем куске
+            if end >= len(self.text) and not eof:
+                self.tokens.clear()
+                self.before_begin = before_begin
+                chunk = self.stream.read(max(read_size, len(self.text) - pos))
+                base += pos
+                if chunk:
+                    self.text = self.text[pos:] + chunk
                 else:
-                    if self.before_begin:
-                        self.add_token('KEYWORD', '!', )
-                    else:
-                        self.add_token('DELIMITER', '!', )
-                    self.advance()
-            elif self.current_char in "%$":
-                self.add_token('KEYWORD', self.current_char, )
-                self.advance()
-            elif self.current_char in self.TD:
-                self.parse_delimiter_or_operator()
+                    self.text = self.text[pos:]
+                    eof = True
+                pos = 0
+                continue
+            pos = end
+            if self.tokens:
+                yield self.tokens.pop(), base + self.token_start, base + min(pos, len(self.text))
+
+    def tokenize_stream(self):
+        # Компактный TokenStream: коды видов и смещения вместо кортежей со строками
+        if self.stream is not None:
+            self.text = self.stream.read()
+            self.stream = None
+        stream = TokenStream(self.text)
+        text = self.text
+        if self.engine == "regex" and (text.isascii() or self.COMMENTS_AND_STRINGS.sub('', text).isascii()):
+            self._stream_bulk(stream)
+        else:
+            for (type_, value), start, end in self.iter_spans():
+                stream.append(type_, value, start, end)
+        return stream
+
+    def _stream_bulk(self, stream):
+        text = self.text
+        codes = {}
+        id_code = stream.CODES['ID']
+        intern = stream.interner.intern
+        before_begin = True
+        match = None
+        for match in self.LEXEMES.finditer(text):
+            lexeme = match.group(1)
+            code = codes.get(lexeme, -1)
+            if code == -1:
+                token = self.classify_lexeme(lexeme)
+                if token is not None:
+                    code = stream.code_for(token[0], token[1], 0, len(lexeme))
+                else:
+                    code = None
+                codes[lexeme] = code
+            if code is None:
+                continue
+            if lexeme == '!':
+                code = stream.CODES['KEYWORD' if before_begin else 'DELIMITER']
+            elif lexeme == 'begin':
+                before_begin = False
+            if code == id_code:
+                stream.append_code(code, match.start(1), match.end(1), intern(lexeme))
             else:
-                self.add_token('UNKNOWN', self.current_char, )
-                self.advance()
-        return self.tokens
\ No newline at end of file
+                stream.append_code(code, match.start(1), match.end(1))
+        self.before_begin = before_begin
+        # Число в самом конце текста parse_number разбирает по-особому
+        if match is not None and match.end(1) == len(text) and text[match.start(1)].isdigit():
+            start = match.start(1)
+            stream.pop()
+            self.tokens = []
+            end = self.scan_token_at(start)
+            type_, value = self.tokens.pop()
+            stream.append(type_, value, start, end)
@@ -0,0 +1,251 @@
+from grammar import ParseTable, KEYWORDS, DELIMITERS, REL_OPS, TOKEN_TYPES, EOF, is_action
+from symbols import Interner
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from tracing import NULL_TRACER, INFO, DEBUG
+
+# Табличный LL(1)-разбор по грамматике из grammar.py. Магазин - обычный список, поэтому
+# глубина вложенности блоков не ограничена стеком вызовов Python. Принимает тот же язык,
+# что SyntaxAnalyzer, и строит то же дерево (syntax_tree.py).
+#
+# Символы магазина - целые числа: терминалы 0..T-1, нетерминалы T.., действия < 0.
+
+TABLE = ParseTable()
+TERMINAL_COUNT = len(TABLE.terminals)
+ROWS = TABLE.rows
+START_SYMBOL = TERMINAL_COUNT + TABLE.start
+ACTION_NAMES = []
+
+
+def encode(symbol):
+    if symbol in TABLE.terminal_ids:
+        return TABLE.terminal_ids[symbol]
+    if is_action(symbol):
+        if symbol not in ACTION_NAMES:
+            ACTION_NAMES.append(symbol)
+        return -1 - ACTION_NAMES.index(symbol)
+    return TERMINAL_COUNT + TABLE.nonterminal_ids[symbol]
+
+
+# Что делать с ведущим терминалом продукции. Продукция выбрана по текущему токену,
+# поэтому ведущий терминал с ним совпадает и принимается сразу, без записи в магазин;
+# частые действия после него выполняются здесь же, без вызова метода
+NO_HEAD = 0      # продукция начинается не с терминала
+HEAD = 1         # принять токен
+HEAD_PUSH = 2    # принять и положить значение токена (@push)
+HEAD_VAR = 3     # принять и положить Var (@var)
+HEAD_NUM = 4     # принять и положить Num (@num)
+HEAD_CALL = 5    # принять и вызвать действие
+INLINE_ACTIONS = {'@push': HEAD_PUSH, '@var': HEAD_VAR, '@num': HEAD_NUM}
+
+
+def compile_production(rhs):
+    # (вид ведущего терминала, номер действия для HEAD_CALL, остаток в обратном порядке)
+    symbols = [encode(symbol) for symbol in rhs]
+    if not symbols or not 0 <= symbols[0] < TERMINAL_COUNT:
+        return NO_HEAD, None, tuple(reversed(symbols))
+    kind, action = HEAD, None
+    if len(rhs) > 1 and is_action(rhs[1]):
+        kind = INLINE_ACTIONS.get(rhs[1], HEAD_CALL)
+        action = -1 - symbols[1]
+        symbols = symbols[2:]
+    else:
+        symbols = symbols[1:]
+    return kind, action, tuple(reversed(symbols))
+
+
+PRODUCTIONS = [compile_production(rhs) for lhs, rhs in TABLE.grammar]
+# Таблица, где вместо номеров продукций сразу их скомпилированный вид (None - ошибка)
+COMPILED_ROWS = [[PRODUCTIONS[number] if number >= 0 else None for number in row] for row in ROWS]
+
+ID = TABLE.terminal_ids['ID']
+NUMBER = TABLE.terminal_ids['NUMBER']
+END = TABLE.terminal_ids[EOF]
+
+# Вид токена по (тип, значение); для остальных значений - по типу
+TERMINAL_BY_TOKEN = {}
+for keyword in KEYWORDS:
+    TERMINAL_BY_TOKEN['KEYWORD', keyword] = TABLE.terminal_ids[f"'{keyword}'"]
+for delimiter in DELIMITERS:
+    TERMINAL_BY_TOKEN['DELIMITER', delimiter] = TABLE.terminal_ids[f"'{delimiter}'"]
+for op in REL_OPS:
+    TERMINAL_BY_TOKEN['REL_OP', op] = TABLE.terminal_ids['REL']
+TERMINAL_BY_TYPE = {type_: TABLE.terminal_ids[type_] for type_ in TOKEN_TYPES}
+
+
+def terminal_of(token):
+    if token is None:
+        return END
+    terminal = TERMINAL_BY_TOKEN.get(token)
+    if terminal is None:
+        terminal = TERMINAL_BY_TYPE.get(token[0], TERMINAL_BY_TYPE['UNKNOWN'])
+    return terminal
+
+
+def describe(symbol):
+    if symbol >= TERMINAL_COUNT:
+        return TABLE.nonterminals[symbol - TERMINAL_COUNT]
+    return TABLE.terminals[symbol]
+
+
+class TableParser:
+    def __init__(self, tokens, tracer=None, symbols=None):
+        # symbols - Interner для номеров имён, как у SyntaxAnalyzer
+        self.trace = tracer if tracer is not None else NULL_TRACER
+        if symbols is None:
+            symbols = getattr(tokens, 'interner', None)
+        self.symbols = symbols if symbols is not None else Interner()
+        self.tokens = iter(tokens)
+        self.declarations = {}
+        self.pending = []
+        self.ast = None
+        self.index = 0      # номер текущего токена
+        self.actions = [getattr(self, "action_" + name[1:]) for name in ACTION_NAMES]
+
+    def parse(self):
+        if self.trace.parser >= INFO:
+            self.trace.emit("parser", INFO, "Начинаем табличный синтаксический анализ...")
+        debug = self.trace.parser >= DEBUG
+        rows = ROWS
+        actions = self.actions
+        count = TERMINAL_COUNT
+
+        # Виды всех токенов считаются заранее одним проходом, за концом - EOF
+        tokens = list(self.tokens)
+        terms = [terminal_of(token) for token in tokens]
+        terms.append(END)
+        tokens.append(None)
+        # Число перед идентификатором SyntaxAnalyzer отвергает, где бы оно ни стояло
+        bad = -1
+        for i in range(len(terms) - 2):
+            if terms[i] == NUMBER and terms[i + 1] == ID:
+                bad = i
+                break
+
+        values = []
+        self.values = values
+        push = values.append
+        stack = [START_SYMBOL]
+        pop = stack.pop
+        extend = stack.extend
+        compiled = COMPILED_ROWS
+        intern = self.symbols.intern
+        pos = 0
+        while stack:
+            symbol = pop()
+            if symbol >= count:
+                production = compiled[symbol - count][terms[pos]]
+                if production is None:
+                    self.index = pos
+                    self.unexpected(symbol, tokens[pos])
+                if debug:
+                    lhs, rhs = TABLE.grammar[rows[symbol - count][terms[pos]]]
+                    self.trace.emit("parser", DEBUG, f"{lhs} -> {' '.join(rhs) or 'ε'} на {tokens[pos]}")
+                head, action, rest = production
+                if head:
+                    if pos == bad:
+                        self.index = pos
+                        raise SyntaxError(f"Неожиданный оператор: {tokens[pos][1]}{tokens[pos + 1][1]}")
+                    token = tokens[pos]
+                    pos += 1
+                    if head == HEAD_VAR:
+                        push(Var(token[1], intern(token[1])))
+                    elif head == HEAD_PUSH:
+                        push(token[1])
+                    elif head == HEAD_NUM:
+                        push(Num(token[1]))
+                    elif head == HEAD_CALL:
+                        actions[action](token)
+                if rest:
+                    extend(rest)
+            elif symbol >= 0:
+                if symbol != terms[pos]:
+                    self.index = pos
+                    raise SyntaxError(f"Ожидалось {describe(symbol)}, получено {self.token_text(tokens[pos])}.")
+                if pos == bad:
+                    self.index = pos
+                    raise SyntaxError(f"Неожиданный оператор: {tokens[pos][1]}{tokens[pos + 1][1]}")
+                pos += 1
+            else:
+                actions[-1 - symbol](tokens[pos - 1])
+        self.index = pos
+        if self.trace.parser >= INFO:
+            self.trace.emit("parser", INFO, "Табличный синтаксический анализ завершён.")
+        return "OK"
+
+    def token_text(self, token):
+        return "конец программы" if token is None else str(token)
+
+    def unexpected(self, symbol, token):
+        row = ROWS[symbol - TERMINAL_COUNT]
+        expected = [TABLE.terminals[t] for t, number in enumerate(row) if number >= 0]
+        if len(expected) > 8:
+            expected = expected[:8] + ["..."]
+        raise SyntaxError(
+            f"Неожиданный токен {self.token_text(token)} в {describe(symbol)}, ожидалось: {', '.join(expected)}."
+        )
+
+    # Действия: previous - последний принятый токен
+
+    def action_list(self, previous):
+        self.values.append([])
+
+    def action_push(self, previous):
+        self.values.append(previous[1])
+
+    def action_declare(self, previous):
+        # как SyntaxAnalyzer.variable_declarations: имена, затем их тип
+        type_, value = previous
+        if type_ == 'ID':
+            if value not in self.declarations:
+                self.declarations[value] = None
+                self.symbols.intern(value)
+                self.pending.append(value)
+        elif type_ == 'KEYWORD' and value in ('integer', 'real'):
+            for name in self.pending:
+                self.declarations[name] = value
+            self.pending.clear()
+
+    def action_var(self, previous):
+        self.values.append(Var(previous[1], self.symbols.intern(previous[1])))
+
+    def action_num(self, previous):
+        self.values.append(Num(previous[1]))
+
+    def action_binop(self, previous):
+        values = self.values
+        right = values.pop()
+        op = values.pop()
+        values[-1] = BinOp(op, values[-1], right)
+
+    def action_compare(self, previous):
+        values = self.values
+        right = values.pop()
+        op = values.pop()
+        values[-1] = Compare(op, values[-1], right)
+
+    def action_assign(self, previous):
+        values = self.values
+        value = values.pop()
+        name = values.pop()
+        values[-1].append(Assign(name, value, self.symbols.intern(name)))
+
+    def action_if(self, previous):
+        values = self.values
+        else_body = values.pop()
+        then_body = values.pop()
+        condition = values.pop()
+        values[-1].append(If(condition, then_body, else_body))
+
+    def action_while(self, previous):
+        values = self.values
+        body = values.pop()
+        condition = values.pop()
+        values[-1].append(While(condition, body))
+
+    def action_write(self, previous):
+        values = self.values
+        value = values.pop()
+        values[-1].append(Write(value))
+
+    def action_program(self, previous):
+        self.ast = Program(self.declarations, self.values.pop(), self.symbols)
@@ -1,6 +1,15 @@
+import sys
+
+from dataflow import analyze_dataflow
 from lexer import LexicalAnalyzer
+from optimizer import Optimizer
 from parserr import SyntaxAnalyzer
-from semantic import SemanticAnalyzer, generate_symbol_table_and_operations
+from semantic import analyze_single_pass
+from tracing import Tracer, StreamSink, DEBUG, NULL_TRACER
+from vm import VM, compile_program
+
+# Подробный ход анализа печатается только с флагом --trace
+tracer = Tracer(StreamSink(sys.stdout, with_phase=False), level=DEBUG) if "--trace" in sys.argv else NULL_TRACER
 
 code = [
     '''
@@ -48,21 +57,39 @@ for i, program in enumerate(code, start=1):
 
     print("* Синтаксический анализ *")
     try:
-        parser = SyntaxAnalyzer(tokens)
+        # С recover=True разбор не останавливается на первой ошибке
+        parser = SyntaxAnalyzer(tokens, tracer, recover=True)
         parsed_program = parser.parse()
         print(f"Синтаксический анализ завершен. Статус: {parsed_program}")
+        if parser.errors:
+            for index, message in parser.errors:
+                print(f"Ошибка синтаксического анализа (токен {index}): {message}")
+            print("------------------------")
+            continue
 
         print("* Семантический анализ *")
-        symbol_table, operations = generate_symbol_table_and_operations(tokens)
-        analyzer = SemanticAnalyzer(symbol_table)
-        analyzer.analyze(operations)
-        errors = analyzer.get_errors()
+        symbol_table, operations, errors = analyze_single_pass(tokens, tracer)
         if errors:
             print("Обнаружены ошибки семантического анализа:")
             for error in errors:
                 print(error)
         else:
             print("Семантический анализ успешно завершен. Ошибок нет.")
+        print("* Анализ потоков данных *")
+        warnings = analyze_dataflow(parser.ast, tracer)
+        for warning in warnings:
+            print(warning)
+        if not warnings:
+            print("Предупреждений нет.")
+        if not errors:
+            print("* Оптимизация *")
+            optimizer = Optimizer(tracer)
+            program_ast = optimizer.optimize(parser.ast)
+            for kind, message in optimizer.report:
+                print(f"Удалено: {message}")
+            print(f"Операторов: {optimizer.before} -> {optimizer.after}")
+            print("* Выполнение *")
+            VM(compile_program(program_ast)).run()
 
     except Exception as e:
         print(f"Ошибка синтаксического анализа: {e}")
@@ -0,0 +1,34 @@
+# Значения числовых литералов в тех формах, что выдаёт LexicalAnalyzer.parse_number:
+# десятичные, вещественные, с порядком, с префиксами 0b/0o/0x и с суффиксами b/o/h.
+# Суффикс лексер дописывает к значению ещё раз в нижнем регистре: "101b" -> "101bb".
+
+PREFIX_BASES = {"0b": 2, "0o": 8, "0x": 16}
+SUFFIX_BASES = {"b": 2, "o": 8, "h": 16}
+BASE_DIGITS = {2: "01", 8: "01234567", 16: "0123456789abcdefABCDEF"}
+
+
+def number_value(text):
+    # int или float; ValueError для некорректного литерала
+    base = PREFIX_BASES.get(text[:2].lower())
+    if base is not None:
+        digits = text[2:]
+        if not digits or any(c not in BASE_DIGITS[base] for c in digits):
+            raise ValueError(f"Неожиданное число: {text}")
+        return int(digits, base)
+    if len(text) > 2 and text[-1] in SUFFIX_BASES and text[-2].lower() == text[-1]:
+        digits = text[:-2]
+        if not digits.isdigit():
+            raise ValueError(f"Неожиданное число: {text}")
+        return int(digits, SUFFIX_BASES[text[-1]])
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def number_type(text):
+    # 'integer', 'real' или None для некорректного литерала
+    try:
+        value = number_value(text)
+    except ValueError:
+        return None
+    return 'real' if isinstance(value, float) else 'integer'
@@ -0,0 +1,271 @@
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num, bind_symbols
+from tracing import NULL_TRACER, INFO, DEBUG
+from vm import COMPARE, OPERATIONS
+
+# Оптимизация дерева разбора перед выполнением. Промежуточное представление - само
+# дерево (syntax_tree.py): узлы уже трёхадресные по смыслу, а условия и циклы
+# структурные, так что потоки данных считаются обходом без построения графа.
+#
+# Два прохода:
+#   1. прямой - распространение и свёртка констант: переменная с известным значением
+#      заменяется числом, операции над числами вычисляются, if с известным условием
+#      заменяется одной из веток, while с ложным при входе условием удаляется;
+#   2. обратный - удаление мёртвых присваиваний: значение больше нигде не читается.
+#
+# Сохраняется то, что программа выводит (write). Итоговые значения переменных после
+# удалённых присваиваний могут отличаться. Выражения, которые могут завершиться ошибкой
+# (деление, некорректный литерал), не вычисляются заранее и не удаляются.
+#
+# Все переменные в начале программы равны 0, как в VM и vm.evaluate.
+#
+# Переменные в env и в множествах живых - номера имён (Program.symbols), имена нужны
+# только для отчёта.
+
+UNKNOWN = object()
+
+
+def same_value(a, b):
+    # 1 и 1.0 или 0.0 и -0.0 выводятся по-разному, поэтому сравниваются и тип, и запись
+    return type(a) is type(b) and repr(a) == repr(b)
+
+
+def make_num(value):
+    return Num(repr(value), value)
+
+
+def format_expression(node):
+    if isinstance(node, Num):
+        return node.text
+    if isinstance(node, Var):
+        return node.name
+    return f"{format_expression(node.left)} {node.op} {format_expression(node.right)}"
+
+
+def variables_of(node, result):
+    if isinstance(node, Var):
+        result.add(node.symbol)
+    elif isinstance(node, (BinOp, Compare)):
+        variables_of(node.left, result)
+        variables_of(node.right, result)
+    return result
+
+
+def is_pure(node):
+    # вычисление не может завершиться ошибкой
+    if isinstance(node, Num):
+        return node.value is not None
+    if isinstance(node, Var):
+        return True
+    return node.op != '/' and is_pure(node.left) and is_pure(node.right)
+
+
+def assigned_in(body, result):
+    for node in body:
+        if isinstance(node, Assign):
+            result.add(node.symbol)
+        elif isinstance(node, If):
+            assigned_in(node.then_body, result)
+            assigned_in(node.else_body, result)
+        elif isinstance(node, While):
+            assigned_in(node.body, result)
+    return result
+
+
+def count_statements(body):
+    count = 0
+    for node in body:
+        count += 1
+        if isinstance(node, If):
+            count += count_statements(node.then_body) + count_statements(node.else_body)
+        elif isinstance(node, While):
+            count += count_statements(node.body)
+    return count
+
+
+class Optimizer:
+    def __init__(self, tracer=None):
+        self.trace = tracer if tracer is not None else NULL_TRACER
+        # report - что удалено или упрощено: (вид, описание); stats - счётчики по видам
+        self.report = []
+        self.stats = {"folded": 0, "propagated": 0, "branches": 0, "loops": 0, "assignments": 0}
+        self.loop_gen = {}      # id(while) -> переменные, которые цикл может прочитать до присваивания
+
+    def note(self, kind, message):
+        self.report.append((kind, message))
+        if self.trace.optimizer >= DEBUG:
+            self.trace.emit("optimizer", DEBUG, message)
+
+    def optimize(self, program):
+        if self.trace.optimizer >= INFO:
+            self.trace.emit("optimizer", INFO, "Начинаем оптимизацию...")
+        self.before = count_statements(program.body)
+        symbols = bind_symbols(program)
+        env = {symbols.intern(name): 0 for name in program.declarations}
+        body = self.propagate(program.body, env)
+        self.loop_gen = {}
+        self.summarize(body)
+        body, _ = self.eliminate(body, set())
+        self.after = count_statements(body)
+        if self.trace.optimizer >= INFO:
+            self.trace.emit("optimizer", INFO, f"Оптимизация завершена: операторов {self.before} -> {self.after}.")
+        return Program(program.declarations, body, symbols)
+
+    # Прямой проход: env - {номер имени: значение} для переменных с известным значением
+
+    def expression(self, node, env):
+        if isinstance(node, Var):
+            value = env.get(node.symbol, UNKNOWN)
+            if value is UNKNOWN:
+                return node
+            self.stats["propagated"] += 1
+            return make_num(value)
+        if isinstance(node, Num):
+            return node
+        left = self.expression(node.left, env)
+        right = self.expression(node.right, env)
+        if isinstance(left, Num) and isinstance(right, Num) and left.value is not None and right.value is not None:
+            try:
+                value = OPERATIONS[node.op](left.value, right.value)
+            except (ZeroDivisionError, OverflowError):
+                pass    # ошибка остаётся до выполнения
+            else:
+                self.stats["folded"] += 1
+                return make_num(value)
+        if left is node.left and right is node.right:
+            return node
+        return BinOp(node.op, left, right)
+
+    def condition(self, node, env):
+        # (условие после подстановки, True/False или UNKNOWN)
+        left = self.expression(node.left, env)
+        right = self.expression(node.right, env)
+        if left is not node.left or right is not node.right:
+            node = Compare(node.op, left, right)
+        if isinstance(left, Num) and isinstance(right, Num) and left.value is not None and right.value is not None:
+            return node, COMPARE[node.op](left.value, right.value)
+        return node, UNKNOWN
+
+    def propagate(self, body, env):
+        # Новый список операторов; env меняется на месте и описывает состояние после них
+        result = []
+        for node in body:
+            if isinstance(node, Assign):
+                value = self.expression(node.value, env)
+                if isinstance(value, Num) and value.value is not None:
+                    env[node.symbol] = value.value
+                else:
+                    env.pop(node.symbol, None)
+                result.append(node if value is node.value else Assign(node.name, value, node.symbol))
+            elif isinstance(node, Write):
+                value = self.expression(node.value, env)
+                result.append(node if value is node.value else Write(value))
+            elif isinstance(node, If):
+                condition, known = self.condition(node.condition, env)
+                if known is UNKNOWN:
+                    then_env = dict(env)
+                    then_body = self.propagate(node.then_body, then_env)
+                    else_body = self.propagate(node.else_body, env)
+                    # после if известно то, что одинаково в обеих ветках
+                    for symbol in list(env):
+                        if symbol not in then_env or not same_value(env[symbol], then_env[symbol]):
+                            del env[symbol]
+                    result.append(If(condition, then_body, else_body))
+                    continue
+                kept, dropped = (node.then_body, node.else_body) if known else (node.else_body, node.then_body)
+                self.stats["branches"] += 1
+                self.note("branch", f"if {format_expression(condition.left)} {condition.op} "
+                                    f"{format_expression(condition.right)}: условие всегда "
+                                    f"{'истинно' if known else 'ложно'}, удалена ветка "
+                                    f"{'else' if known else 'then'}, операторов: {count_statements(dropped)}")
+                result.extend(self.propagate(kept, env))
+            elif isinstance(node, While):
+                # проверка при входе не меняет дерево и в счётчики не входит
+                saved = dict(self.stats)
+                _, entry = self.condition(node.condition, env)
+                self.stats = saved
+                if entry is False:
+                    self.stats["loops"] += 1
+                    self.note("loop", f"while {format_expression(node.condition.left)} {node.condition.op} "
+                                      f"{format_expression(node.condition.right)}: условие ложно при входе, "
+                                      f"удалён цикл, операторов: {count_statements(node.body)}")
+                    continue
+                # на каждой итерации известны только переменные, которые тело не меняет
+                for symbol in assigned_in(node.body, set()):
+                    env.pop(symbol, None)
+                condition, _ = self.condition(node.condition, env)
+                body_env = dict(env)
+                result.append(While(condition, self.propagate(node.body, body_env)))
+            else:
+                result.append(node)
+        return result
+
+    # Обратный проход: live - переменные, значение которых ещё будет прочитано
+
+    def summarize(self, body):
+        # (gen, kill) последовательности, как в dataflow.py: gen - переменные, которые она
+        # может прочитать до присваивания, kill - присваиваемые на всех путях. gen циклов
+        # записывается в loop_gen; каждый оператор посещается один раз
+        gen, kill = set(), set()
+        for node in reversed(body):
+            if isinstance(node, Assign):
+                node_gen, node_kill = variables_of(node.value, set()), {node.symbol}
+            elif isinstance(node, Write):
+                node_gen, node_kill = variables_of(node.value, set()), set()
+            elif isinstance(node, If):
+                node_gen, then_kill = self.summarize(node.then_body)
+                else_gen, else_kill = self.summarize(node.else_body)
+                node_gen |= else_gen
+                variables_of(node.condition, node_gen)
+                node_kill = then_kill & else_kill
+            elif isinstance(node, While):
+                # тело может не выполниться ни разу: kill пуст
+                node_gen, _ = self.summarize(node.body)
+                variables_of(node.condition, node_gen)
+                node_kill = set()
+                self.loop_gen[id(node)] = node_gen
+            else:
+                continue
+            gen -= node_kill
+            gen |= node_gen
+            kill |= node_kill
+        return gen, kill
+
+    def eliminate(self, body, live):
+        # (операторы, live перед ними)
+        result = []
+        for node in reversed(body):
+            if isinstance(node, Assign):
+                if node.symbol not in live and is_pure(node.value):
+                    self.stats["assignments"] += 1
+                    self.note("assignment", f"{node.name} := {format_expression(node.value)}: "
+                                            f"значение не используется")
+                    continue
+                live = (live - {node.symbol}) | variables_of(node.value, set())
+            elif isinstance(node, Write):
+                live = live | variables_of(node.value, set())
+            elif isinstance(node, If):
+                then_body, then_live = self.eliminate(node.then_body, live)
+                else_body, else_live = self.eliminate(node.else_body, live)
+                live = then_live | else_live | variables_of(node.condition, set())
+                if not then_body and not else_body and is_pure(node.condition):
+                    self.stats["branches"] += 1
+                    self.note("branch", f"if {format_expression(node.condition.left)} {node.condition.op} "
+                                        f"{format_expression(node.condition.right)}: обе ветки пусты, удалён")
+                    continue
+                node = If(node.condition, then_body, else_body)
+            elif isinstance(node, While):
+                # живое на входе в цикл - живое после него и gen цикла (условие и тело):
+                # это сразу неподвижная точка, и тело проходится один раз с ней как с
+                # живым в конце тела
+                live = live | self.loop_gen[id(node)]
+                body, _ = self.eliminate(node.body, live)
+                node = While(node.condition, body)
+            result.append(node)
+        result.reverse()
+        return result, live
+
+
+def optimize(program, tracer=None):
+    # (оптимизированная программа, отчёт об удалённом)
+    optimizer = Optimizer(tracer)
+    return optimizer.optimize(program), optimizer.report
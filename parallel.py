@@ -0,0 +1,146 @@
+import argparse
+import os
+import re
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import LexicalAnalyzer
+from symbols import NO_SYMBOL
+from tokenstream import TokenStream
+
+# Лексический анализ одного большого текста в нескольких процессах:
+#
+#     stream = tokenize_parallel(text, jobs=8)
+#     python parallel.py big.txt --jobs 8
+#
+# Текст режется сразу после ';' вне комментариев и строк. Ни один токен не содержит
+# ';' и не продолжается через него, так что каждый кусок разбирается отдельно, а
+# результат совпадает с последовательным разбором. Куски разбираются в пуле
+# процессов, потоки склеиваются со сдвигом смещений, номера имён переводятся в общий
+# Interner.
+#
+# Единственное состояние лексера между токенами - before_begin ('!' до первого 'begin'
+# - KEYWORD, после - DELIMITER). Каждый кусок разбирается так, будто 'begin' ещё не
+# было, и сообщает, встретил ли он 'begin' и где у него '!' в виде KEYWORD. При
+# склейке такие '!' в кусках после первого 'begin' становятся DELIMITER.
+
+# Кусок меньше этого разбирать в отдельном процессе невыгодно
+MIN_CHUNK = 1 << 20
+
+# Целые комментарии, строки и остальные символы: от позиции вне комментария и строки
+# совпадение доходит до endpos, если endpos тоже вне их
+OUTSIDE = re.compile(r"(?:[^{']+|\{[^}]*\}|'[^']*')*")
+SKIP = LexicalAnalyzer.COMMENTS_AND_STRINGS
+
+
+def next_boundary(text, pos, target):
+    # Первая позиция после ';' вне комментариев и строк, не раньше target; pos - позиция
+    # вне комментария и строки, не позже target
+    end = OUTSIDE.match(text, pos, target).end()
+    if end < target:
+        # target внутри комментария или строки, начатых в end
+        end = SKIP.match(text, end).end()
+    while True:
+        semi = text.find(';', end)
+        if semi < 0:
+            return len(text)
+        stop = OUTSIDE.match(text, end, semi).end()
+        if stop == semi:
+            return semi + 1
+        end = SKIP.match(text, stop).end()
+
+
+def split_points(text, parts):
+    # [0, b1, ..., len(text)]: границы примерно равных кусков
+    size = len(text)
+    points = [0]
+    for k in range(1, parts):
+        target = size * k // parts
+        if target <= points[-1]:
+            continue
+        boundary = next_boundary(text, points[-1], target)
+        if boundary >= size:
+            break
+        points.append(boundary)
+    points.append(size)
+    return points
+
+
+def lex_chunk(text, base, engine="regex"):
+    # Поток куска со смещениями от начала всего текста, имена его Interner, номера
+    # токенов '!', разобранных как KEYWORD, и встретился ли 'begin'
+    lexer = LexicalAnalyzer(text, engine=engine)
+    stream = lexer.tokenize_stream()
+    interner, ids = stream.symbols()
+    starts, ends = stream.starts, stream.ends
+    bangs = []
+    if '!' in text:
+        keyword = TokenStream.CODES['KEYWORD']
+        bangs = [i for i, code in enumerate(stream.kinds) if code == keyword and text[starts[i]] == '!']
+    if base:
+        starts = array('I', [start + base for start in starts])
+        ends = array('I', [end + base for end in ends])
+    return stream.kinds, starts, ends, ids, interner.names, bangs, not lexer.before_begin
+
+
+def stitch(text, chunks):
+    stream = TokenStream(text)
+    intern = stream.interner.intern
+    delimiter = TokenStream.CODES['DELIMITER']
+    before_begin = True
+    for kinds, starts, ends, ids, names, bangs, saw_begin in chunks:
+        offset = len(stream.kinds)
+        stream.kinds.extend(kinds)
+        stream.starts.extend(starts)
+        stream.ends.extend(ends)
+        # номер куска -> общий номер; NO_SYMBOL (-1) попадает на последний элемент
+        table = [intern(name) for name in names]
+        table.append(NO_SYMBOL)
+        stream.ids.extend(array('i', map(table.__getitem__, ids)))
+        if not before_begin:
+            for i in bangs:
+                stream.kinds[offset + i] = delimiter
+        if saw_begin:
+            before_begin = False
+    return stream
+
+
+def tokenize_parallel(text, jobs=None, engine="regex", min_chunk=MIN_CHUNK, executor=None, chunks_per_job=4):
+    # TokenStream, совпадающий с LexicalAnalyzer(text, engine).tokenize_stream()
+    jobs = jobs or os.cpu_count() or 1
+    parts = min(jobs * chunks_per_job, len(text) // min_chunk)
+    if parts < 2:
+        return LexicalAnalyzer(text, engine=engine).tokenize_stream()
+    points = split_points(text, parts)
+    pieces = [text[start:end] for start, end in zip(points, points[1:])]
+    starts = points[:-1]
+    engines = [engine] * len(pieces)
+    if executor is not None:
+        chunks = list(executor.map(lex_chunk, pieces, starts, engines))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunks = list(pool.map(lex_chunk, pieces, starts, engines))
+    return stitch(text, chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Параллельный лексический анализ одного файла")
+    parser.add_argument("path")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    parser.add_argument("--engine", default="regex", choices=LexicalAnalyzer.ENGINES)
+    parser.add_argument("--min-chunk", type=int, default=MIN_CHUNK, help="наименьший кусок, символов")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding="utf-8") as f:
+        text = f.read()
+    start = time.perf_counter()
+    stream = tokenize_parallel(text, args.jobs, args.engine, args.min_chunk)
+    elapsed = time.perf_counter() - start
+    print(f"{len(stream)} токенов за {elapsed:.3f} с ({len(text) / 2 ** 20 / elapsed:.1f} МБ/с)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,100 @@
 from collections import deque
 
+from symbols import Interner
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from tracing import NULL_TRACER, INFO, DEBUG
+
 class SyntaxAnalyzer:
-    def __init__(self, tokens):
-        self.tokens = deque(tokens)
+    # Токены, с которых может начинаться оператор: на них останавливается восстановление
+    SYNC_KEYWORDS = ('end', 'if', 'while', 'write')
+
+    def __init__(self, tokens, tracer=None, recover=False, symbols=None):
+        # Любой итерируемый источник токенов: список или генератор iter_tokens().
+        # recover=True - режим восстановления: ошибка не прерывает разбор, а попадает
+        # в errors как (номер токена, сообщение), после чего разбор продолжается
+        # со следующей точки синхронизации.
+        # symbols - Interner для номеров имён в дереве; по умолчанию - тот же, что у
+        # TokenStream, чтобы номера совпадали с таблицей символов семантики
+        self.trace = tracer if tracer is not None else NULL_TRACER
+        if symbols is None:
+            symbols = getattr(tokens, 'interner', None)
+        self.symbols = symbols if symbols is not None else Interner()
+        self.recover = recover
+        self.errors = []
+        self.depth = 0  # вложенность блоков [...]
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
         self.current_token = None
+        self.declarations = {}
+        self.ast = None
+        # Номер текущего токена во входном потоке и разметка тела программы:
+        # body_start/body_end - номера первого токена после 'begin' и токена 'end',
+        # statement_spans - (узел или None для лишней ';', число токенов) по операторам тела
+        self.index = -1
+        self.body_start = None
+        self.body_end = None
+        self.statement_spans = []
         self.next_token()
 
+    def peek(self):
+        if not self.lookahead:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[0]
+
     def next_token(self):
-        if self.tokens:
-            self.current_token = self.tokens.popleft()
-            next_token = self.tokens[0] if self.tokens else None
-            print(f"Текущий токен: {self.current_token}, следующий токен: {next_token}")
-            if self.current_token[0]=="NUMBER" and next_token[0]=="ID":
-                raise SyntaxError(f"Неожиданный оператор: {self.current_token[1]}{next_token[1]}")
+        self.index += 1
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
+        else:
+            self.current_token = next(self.tokens, None)
+        if self.current_token is not None:
+            next_token = self.peek()
+            if self.trace.parser >= DEBUG:
+                self.trace.emit("parser", DEBUG, f"Текущий токен: {self.current_token}, следующий токен: {next_token}")
+            if self.current_token[0]=="NUMBER" and next_token is not None and next_token[0]=="ID":
+                self.error(f"Неожиданный оператор: {self.current_token[1]}{next_token[1]}")
 
         else:
             self.current_token = None
-            print("Токены закончились.")
+            if self.trace.parser >= DEBUG:
+                self.trace.emit("parser", DEBUG, "Токены закончились.")
+
+    def token(self):
+        # Текущий токен; за концом входа - синтаксическая ошибка
+        if self.current_token is None:
+            raise SyntaxError("Неожиданный конец программы.")
+        return self.current_token
+
+    def error(self, message):
+        # Ошибка вне оператора: в режиме восстановления записывается, иначе - исключение
+        if not self.recover:
+            raise SyntaxError(message)
+        self.errors.append((self.index, message))
 
     def parse(self):
-        print("Начинаем синтаксический анализ...")
-        self.program()
+        if self.trace.parser >= INFO:
+            self.trace.emit("parser", INFO, "Начинаем синтаксический анализ...")
+        self.ast = self.program()
         if self.current_token is not None:
-            raise SyntaxError(f"Неожиданный токен: {self.current_token}")
-        return "OK"
+            self.error(f"Неожиданный токен: {self.current_token}")
+        return "OK" if not self.errors else "ERROR"
 
     def program(self):
-        print(f"Начинаем разбор программы, текущий токен: {self.current_token}")
-        if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'program':
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Начинаем разбор программы, текущий токен: {self.current_token}")
+        if self.current_token is not None and self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'program':
             self.next_token()
-            self.block()
         else:
-            raise SyntaxError("Ожидалось 'program'.")
+            self.error("Ожидалось 'program'.")
+        return Program(self.declarations, self.block(), self.symbols)
 
     def block(self):
-        print(f"Проверка токена в блоке: {self.current_token}")
-        if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'var':
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Проверка токена в блоке: {self.current_token}")
+        if self.current_token is not None and self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'var':
             self.variable_declarations()
         found_begin = False
         while self.current_token is not None:
@@ -45,148 +104,261 @@ class SyntaxAnalyzer:
                 break
             self.next_token()
         if not found_begin:
-            raise SyntaxError("Ожидалось 'begin' после объявления переменных.")
-        self.statements()
-        print(f"Текущий токен перед 'end': {self.current_token}")
-        if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'end':
+            self.error("Ожидалось 'begin' после объявления переменных.")
+            return []
+        self.body_start = self.index
+        body = self.statements(self.statement_spans)
+        while True:
+            self.body_end = self.index
+            if self.trace.parser >= DEBUG:
+                self.trace.emit("parser", DEBUG, f"Текущий токен перед 'end': {self.current_token}")
+            if self.current_token is None or self.current_token[0] != 'KEYWORD' or self.current_token[1] != 'end':
+                self.error("Ожидалось 'end' после блока.")
+                break
             self.next_token()
-            if self.current_token[0] == 'DELIMITER' and self.current_token[1] == '.':
+            if self.current_token is not None and self.current_token[0] == 'DELIMITER' and self.current_token[1] == '.':
                 self.next_token()
-            else:
-                raise SyntaxError("Ожидалась точка '.' после 'end'.")
-        else:
-            raise SyntaxError("Ожидалось 'end' после блока.")
+                break
+            self.error("Ожидалась точка '.' после 'end'.")
+            if self.current_token is None:
+                break
+            # При восстановлении 'end' без точки - лишний: разбор продолжается с
+            # оператора после него, чтобы найти ошибки и в остальной части тела
+            body.extend(self.statements(self.statement_spans))
+        return body
 
     def variable_declarations(self):
-        print(f"Начинаем разбор объявлений переменных.")
-        while self.current_token[0] == 'ID':
-            print(f"Обрабатываем переменную: {self.current_token[1]}")
+        # Раздел до 'begin' не проверяется (его пропускает block), здесь из него только
+        # собираются имена переменных и типы, которые идут после списка имён
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Начинаем разбор объявлений переменных.")
+        pending = []
+        self.next_token()
+        while self.current_token is not None and (self.current_token[0] != 'KEYWORD' or self.current_token[1] != 'begin'):
+            if self.current_token[0] == 'ID':
+                if self.trace.parser >= DEBUG:
+                    self.trace.emit("parser", DEBUG, f"Обрабатываем переменную: {self.current_token[1]}")
+                if self.current_token[1] not in self.declarations:
+                    self.declarations[self.current_token[1]] = None
+                    self.symbols.intern(self.current_token[1])
+                    pending.append(self.current_token[1])
+            elif self.current_token[0] == 'KEYWORD' and self.current_token[1] in ['integer', 'real']:
+                for name in pending:
+                    self.declarations[name] = self.current_token[1]
+                pending.clear()
+            self.next_token()
+
+    def statements(self, spans=None):
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Начинаем разбор операторов.")
+        body = []
+        # При восстановлении ']' вне блока - ошибка, а не конец списка операторов
+        stop_at_bracket = self.depth > 0 or not self.recover
+        while self.current_token is not None and (self.current_token[0] != 'KEYWORD' or self.current_token[1] != 'end') \
+                and (self.current_token[0] != 'DELIMITER' or self.current_token[1] != ']' or not stop_at_bracket):
+            start = self.index
+            count = len(body)
+            errors = len(self.errors)
+            try:
+                if self.current_token[0] == 'ID' and self.peek() is not None and self.peek()[1] == ':=':
+                    if self.trace.parser >= DEBUG:
+                        self.trace.emit("parser", DEBUG, "Обрабатываем оператор присваивания.")
+                    body.append(self.assignment_statement())
+                elif self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'if':
+                    if self.trace.parser >= DEBUG:
+                        self.trace.emit("parser", DEBUG, "Обрабатываем условие 'if'.")
+                    body.append(self.if_statement())
+                elif self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'while':
+                    if self.trace.parser >= DEBUG:
+                        self.trace.emit("parser", DEBUG, "Обрабатываем условие 'while'.")
+                    body.append(self.while_statement())
+                elif self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'write':
+                    body.append(self.write_statement())
+                elif self.current_token[0] == 'DELIMITER' and self.current_token[1] == ';':
+                    self.next_token()
+                else:
+                    raise SyntaxError(f"Неожиданный оператор: {self.current_token}")
+            except SyntaxError as e:
+                if not self.recover:
+                    raise
+                self.recover_statement(str(e), start, errors)
+            if spans is not None:
+                spans.append((body[-1] if len(body) > count else None, self.index - start))
+        return body
+
+    def recover_statement(self, message, start, errors):
+        # Одна ошибка на оператор и на токен: если уже записана ошибка (например, число
+        # перед идентификатором), следующая за ней - её следствие
+        if len(self.errors) == errors and (not self.errors or self.errors[-1][0] != self.index):
+            self.errors.append((self.index, message))
+        if self.trace.parser >= INFO:
+            self.trace.emit("parser", INFO, f"Ошибка: {message}, восстановление с токена {self.index}")
+        if self.index == start:
+            self.next_token()
+        self.synchronize()
+
+    def synchronize(self):
+        # Пропуск токенов до точки синхронизации: после ';', перед ']', 'end' или началом
+        # оператора. Встреченный блок [...] разбирается целиком, чтобы найти ошибки в нём
+        # и не принять его ']' за лишнюю. Каждый токен просматривается один раз.
+        while self.current_token is not None:
+            type_, value = self.current_token
+            if type_ == 'DELIMITER':
+                if value == ';':
+                    self.next_token()
+                    return
+                if value == ']':
+                    return
+                if value == '[':
+                    errors = len(self.errors)
+                    try:
+                        self.bracket_block("Ожидался закрывающий ']' после блока операторов.")
+                    except SyntaxError as e:
+                        if len(self.errors) == errors:
+                            self.errors.append((self.index, str(e)))
+                    continue
+            elif type_ == 'KEYWORD' and value in self.SYNC_KEYWORDS:
+                return
+            elif type_ == 'ID':
+                following = self.peek()
+                if following is not None and following[1] == ':=':
+                    return
             self.next_token()
-            if self.current_token[0] == 'DELIMITER' and self.current_token[1] == ',':
-                self.next_token()
-            elif self.current_token[0] == 'DELIMITER' and self.current_token[1] == ';':
-                self.next_token()
-                break
-            else:
-                raise SyntaxError("Ожидалось ',' или ';' после объявления переменной.")
-
-    def statements(self):
-        print(f"Начинаем разбор операторов.")
-        while self.current_token is not None and (self.current_token[0] != 'KEYWORD' or self.current_token[1] != 'end'):
-            if self.current_token[0] == 'ID' and self.tokens and self.tokens[0][1] == ':=':
-                print("Обрабатываем оператор присваивания.")
-                self.assignment_statement()
-            elif self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'if':
-                print("Обрабатываем условие 'if'.")
-                self.if_statement()
-            elif self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'while':
-                print("Обрабатываем условие 'while'.")
-                self.while_statement()
-            else:
-                raise SyntaxError(f"Неожиданный оператор: {self.current_token}")
 
     def assignment_statement(self):
-        print(f"Обрабатываем оператор присваивания: {self.current_token[1]}")
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем оператор присваивания: {self.current_token[1]}")
         var_name = self.current_token[1]
         self.next_token()
-        if self.current_token[0] == 'ASSIGN' and self.current_token[1] == ':=':
+        token = self.token()
+        if token[0] == 'ASSIGN' and token[1] == ':=':
             self.next_token()
-            self.expression()
-            if self.current_token[0] == 'DELIMITER' and self.current_token[1] == ';':
+            value = self.expression()
+            token = self.token()
+            if token[0] == 'DELIMITER' and token[1] == ';':
                 self.next_token()
             else:
                 raise SyntaxError("Ожидался символ ';' после присваивания.")
         else:
             raise SyntaxError("Ожидалось ':=' в операторе присваивания.")
+        return Assign(var_name, value, self.symbols.intern(var_name))
 
     def expression(self):
-        print(f"Обрабатываем выражение с текущим токеном: {self.current_token}")
-        self.term()
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем выражение с текущим токеном: {self.current_token}")
+        node = self.term()
         while self.current_token is not None and self.current_token[0] in ['ADD_OP', 'SUB_OP']:
-            print(f"Обрабатываем операцию: {self.current_token[1]}")
+            if self.trace.parser >= DEBUG:
+                self.trace.emit("parser", DEBUG, f"Обрабатываем операцию: {self.current_token[1]}")
+            op = self.current_token[1]
             self.next_token()
-            self.term()
+            node = BinOp(op, node, self.term())
+        return node
 
     def term(self):
-        print(f"Обрабатываем терм с текущим токеном: {self.current_token}")
-        self.factor()
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем терм с текущим токеном: {self.current_token}")
+        node = self.factor()
         while self.current_token is not None and self.current_token[0] in ['MUL_OP', 'DIV_OP']:
-            print(f"Обрабатываем операцию: {self.current_token[1]}")
+            if self.trace.parser >= DEBUG:
+                self.trace.emit("parser", DEBUG, f"Обрабатываем операцию: {self.current_token[1]}")
+            op = self.current_token[1]
             self.next_token()
-            self.factor()
+            node = BinOp(op, node, self.factor())
+        return node
 
     def factor(self):
-        print(f"Обрабатываем фактор с текущим токеном: {self.current_token}")
-        if self.current_token[0] == 'ID' or self.current_token[0] == 'NUMBER':
-            self.next_token()
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем фактор с текущим токеном: {self.current_token}")
+        token = self.token()
+        if token[0] == 'ID':
+            node = Var(token[1], self.symbols.intern(token[1]))
+        elif token[0] == 'NUMBER':
+            node = Num(token[1])
         else:
             raise SyntaxError(f"Неожиданный токен в факторе: {self.current_token}")
+        self.next_token()
+        return node
 
     def write_statement(self):
-        print(f"Обрабатываем оператор write с текущим токеном: {self.current_token}")
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем оператор write с текущим токеном: {self.current_token}")
         self.next_token()
-        if self.current_token[0] == 'DELIMITER' and self.current_token[1] == '(':
+        token = self.token()
+        if token[0] == 'DELIMITER' and token[1] == '(':
             self.next_token()
-            self.expression()
-            if self.current_token[0] == 'DELIMITER' and self.current_token[1] == ')':
+            value = self.expression()
+            token = self.token()
+            if token[0] == 'DELIMITER' and token[1] == ')':
                 self.next_token()
             else:
                 raise SyntaxError("Ожидалась закрывающая скобка ')' после аргумента write.")
         else:
             raise SyntaxError("Ожидалась открывающая скобка '(' после write.")
+        return Write(value)
 
-    def if_statement(self):
-        print(f"Обрабатываем оператор 'if' с текущим токеном: {self.current_token}")
+    def condition(self, keyword):
+        # выражение, оператор сравнения и правый операнд
+        left = self.expression()
+        token = self.token()
+        if token[0] == 'REL_OP' and token[1] in ['>', '<', '=', '>=', '<=']:
+            op = token[1]
+            self.next_token()
+            return Compare(op, left, self.factor())
+        raise SyntaxError(f"Ожидался оператор сравнения после условия '{keyword}'.")
+
+    def bracket_block(self, error):
+        # [ операторы ]; текущий токен - '['
         self.next_token()
-        self.expression()
-        if self.current_token[0] == 'REL_OP' and self.current_token[1] in ['>', '<', '=', '>=', '<=']:
+        self.depth += 1
+        try:
+            body = self.statements()
+        finally:
+            self.depth -= 1
+        if self.current_token is not None and self.current_token[0] == 'DELIMITER' and self.current_token[1] == ']':
             self.next_token()
+        else:
+            raise SyntaxError(error)
+        return body
+
+    def if_statement(self):
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем оператор 'if' с текущим токеном: {self.current_token}")
+        self.next_token()
+        condition = self.condition('if')
+        token = self.token()
+        if token[0] == 'KEYWORD' and token[1] == 'then':
             self.next_token()
-            if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'then':
+            token = self.token()
+            if token[0] == 'DELIMITER' and token[1] == '[':
+                then_body = self.bracket_block("Ожидался закрывающий ']' после блока операторов.")
+            else:
+                raise SyntaxError("Ожидался блок операторов после 'then'.")
+            else_body = []
+            if self.current_token is not None and self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'else':
                 self.next_token()
-                if self.current_token[0] == 'DELIMITER' and self.current_token[1] == '[':
-                    self.next_token()
-                    while self.current_token[0] != 'DELIMITER' or self.current_token[1] != ']':
-                        if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'write':
-                            self.write_statement()
-                        elif self.current_token[0] == 'DELIMITER' and self.current_token[1] == ';':
-                            self.next_token()
-                        else:
-                            self.statements()
-                    if self.current_token[0] == 'DELIMITER' and self.current_token[1] == ']':
-                        self.next_token()
-                    else:
-                        raise SyntaxError("Ожидался закрывающий ']' после блока операторов.")
+                token = self.token()
+                if token[0] == 'DELIMITER' and token[1] == '[':
+                    else_body = self.bracket_block("Ожидался закрывающий ']' после блока операторов в 'else'.")
                 else:
-                    raise SyntaxError("Ожидался блок операторов после 'then'.")
-                if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'else':
-                    self.next_token()
-                    if self.current_token[0] == 'DELIMITER' and self.current_token[1] == '[':
-                        self.next_token()
-                        while self.current_token[0] != 'DELIMITER' or self.current_token[1] != ']':
-                            if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'write':
-                                self.write_statement()
-                            elif self.current_token[0] == 'DELIMITER' and self.current_token[1] == ';':
-                                self.next_token()
-                            else:
-                                self.statements()
-                        if self.current_token[0] == 'DELIMITER' and self.current_token[1] == ']':
-                            self.next_token()
-                        else:
-                            raise SyntaxError("Ожидался закрывающий ']' после блока операторов в 'else'.")
-                    else:
-                        self.statements()
-            else:
-                raise SyntaxError("Ожидалось 'then' после условия 'if'.")
+                    else_body = self.statements()
         else:
-            raise SyntaxError("Ожидался оператор сравнения после условия 'if'.")
+            raise SyntaxError("Ожидалось 'then' после условия 'if'.")
+        return If(condition, then_body, else_body)
 
     def while_statement(self):
-        print(f"Обрабатываем оператор 'while' с текущим токеном: {self.current_token}")
+        if self.trace.parser >= DEBUG:
+            self.trace.emit("parser", DEBUG, f"Обрабатываем оператор 'while' с текущим токеном: {self.current_token}")
         self.next_token()
-        self.expression()
-        if self.current_token[0] == 'KEYWORD' and self.current_token[1] == 'do':
+        condition = self.condition('while')
+        token = self.token()
+        if token[0] == 'KEYWORD' and token[1] == 'do':
             self.next_token()
-            self.statements()
+            token = self.token()
+            if token[0] == 'DELIMITER' and token[1] == '[':
+                body = self.bracket_block("Ожидался закрывающий ']' после тела цикла 'while'.")
+            else:
+                body = self.statements()
         else:
             raise SyntaxError("Ожидалось 'do' после условия 'while'.")
+        return While(condition, body)
@@ -0,0 +1,97 @@
+from bytelexer import tokenize_file
+from dataflow import analyze_dataflow
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from profiling import NULL_PROFILER
+from semantic import analyze_single_pass
+
+# Полный прогон одной программы: лексика, синтаксис, семантика, потоки данных. Результат - словарь
+# из простых типов, чтобы его можно было передать между процессами и записать в JSON.
+
+# Версия анализатора входит в ключ кэша (cache.py): её нужно увеличивать при любом
+# изменении токенов, статуса или текста диагностики
+ANALYZER_VERSION = "6"
+
+
+def diagnostic(phase, message, tokens=None, index=None):
+    record = {"phase": phase, "message": message}
+    if tokens is not None and index is not None and len(tokens):
+        # ошибка в конце входа относится к последнему токену
+        record["line"], record["column"] = tokens.position(min(index, len(tokens) - 1))
+    return record
+
+
+def analyze_source(source, engine="regex", cache=None, profiler=None):
+    # cache - AnalysisCache; при попадании ни одна фаза анализа не выполняется.
+    # profiler - profiling.Profiler, если прогон нужно профилировать
+    if cache is not None:
+        entry = cache.get(source, engine)
+        if entry is not None:
+            result = entry.result()
+            result["cached"] = True
+            return result
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    with profiler.phase("lexer"):
+        tokens = LexicalAnalyzer(source, engine=engine).tokenize_stream()
+    result = analyze_tokens(tokens, profiler)
+    if cache is not None:
+        cache.put(source, engine, tokens, result)
+        result["cached"] = False
+    return result
+
+
+def parse_program(source):
+    # Дерево разбора программы без анализа: для выполнения (pycodegen.py, vectorized.py)
+    parser = SyntaxAnalyzer(LexicalAnalyzer(source, engine="regex").tokenize_stream())
+    parser.parse()
+    return parser.ast
+
+
+def analyze_file(path, profiler=None):
+    # Файл лексируется прямо над отображением в память, без чтения в str (bytelexer.py)
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    with profiler.phase("lexer"):
+        tokens = tokenize_file(path)
+    return analyze_tokens(tokens, profiler)
+
+
+def analyze_tokens(tokens, profiler=None):
+    profiler = profiler if profiler is not None else NULL_PROFILER
+    profiler.count_tokens(tokens)
+    result = {"status": "ok", "tokens": len(tokens), "diagnostics": []}
+    diagnostics = result["diagnostics"]
+
+    for i in range(len(tokens)):
+        type_ = tokens.type(i)
+        if type_ == 'ERROR' or type_ == 'UNKNOWN':
+            diagnostics.append(diagnostic("lexer", f"Некорректный токен: {tokens.value(i)}", tokens, i))
+
+    # Разбор с восстановлением: за один проход собираются все синтаксические ошибки
+    parser = profiler.instrument(SyntaxAnalyzer(tokens, recover=True))
+    # Остальные исключения - сбой самого анализатора, а не ошибка в программе:
+    # batch.check_file записывает их как "crash"
+    with profiler.phase("parser"):
+        try:
+            parser.parse()
+        except SyntaxError as e:
+            parser.errors.append((None, str(e)))
+    if parser.errors:
+        result["status"] = "syntax_error"
+        for index, message in parser.errors:
+            diagnostics.append(diagnostic("parser", message, tokens, index))
+        return result
+
+    with profiler.phase("semantic"):
+        symbol_table, operations, errors = analyze_single_pass(tokens)
+    for error in errors:
+        diagnostics.append(diagnostic("semantic", error))
+    if errors:
+        result["status"] = "semantic_error"
+
+    # Анализу потоков данных нужно только дерево разбора, поэтому он идёт и при
+    # семантических ошибках; его предупреждения статус не меняют
+    with profiler.phase("dataflow"):
+        warnings = analyze_dataflow(parser.ast)
+    for warning in warnings:
+        diagnostics.append(diagnostic("dataflow", warning))
+    return result
@@ -0,0 +1,275 @@
+import argparse
+import json
+import marshal
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from semantic import SemanticAnalyzer, analyze_single_pass, generate_symbol_table_and_operations
+
+# Встроенное профилирование, включается на один прогон:
+#
+#     profiler = Profiler()               # Profiler(memory=True) - с tracemalloc
+#     analyze_source(source, profiler=profiler)
+#     profiler.dump_json("profile.json")
+#     profiler.dump_stats("profile.stats")     # python -m pstats profile.stats
+#
+#     python profiling.py prog.txt --json profile.json --stats profile.stats
+#
+# Записывается:
+#   - по фазам: число запусков, время по часам и процессорное, изменение числа живых
+#     блоков памяти (sys.getallocatedblocks: выделенные минус освобождённые, может быть
+#     и отрицательным), с memory=True - пик памяти фазы сверх памяти на её входе по
+#     tracemalloc;
+#   - по правилам парсера: вызовы и время, собственное и с вложенными вызовами. Методы
+#     оборачиваются на самом экземпляре (instrument), класс и остальные парсеры не меняются;
+#   - гистограмма видов токенов.
+# Файл статистики - словарь в формате pstats, записанный marshal, как у cProfile. Фазы
+# в нём - отдельные функции, вызывающие правила верхнего уровня.
+
+
+class NullProfiler:
+    # Профилирование выключено: все операции ничего не делают
+    def phase(self, name):
+        return nullcontext()
+
+    def instrument(self, obj, names=None):
+        return obj
+
+    def count_tokens(self, tokens):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def phase_key(name):
+    return ("~", 0, f"<фаза {name}>")
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.phases = {}        # имя -> {"calls", "wall", "cpu", "net_blocks"[, "peak_bytes"]}
+        # ключ функции (файл, строка, имя) -> [первичные вызовы, все вызовы, собственное
+        # время, время с вложенными, {ключ вызывающего: [те же четыре числа]}]
+        self.functions = {}
+        self.tokens = Counter()
+        self.stack = []         # [ключ, время во вложенных вызовах] активных правил
+        self.active = Counter()  # сколько раз каждое правило сейчас на стеке
+        self.current_phase = None
+        # tracemalloc замедляет Python в несколько раз, поэтому включается отдельно
+        self.memory = memory
+        self.peaks = []         # наибольший пик вложенных фаз для каждой активной фазы
+        self.started_tracing = memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def close(self):
+        # Останавливает tracemalloc, если его запустил этот профилировщик
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        record = self.phases.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "net_blocks": 0})
+        if self.memory:
+            record.setdefault("peak_bytes", 0)
+            # пик считается с входа в фазу; пик внешней фазы до сброса сохраняется
+            traced, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append(0)
+        key = phase_key(name)
+        entry = self.functions.setdefault(key, [0, 0, 0.0, 0.0, {}])
+        outer_phase, outer_stack = self.current_phase, self.stack
+        self.current_phase = [key, 0.0]
+        self.stack = []
+        blocks = sys.getallocatedblocks()
+        cpu = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            record["calls"] += 1
+            record["wall"] += wall
+            record["cpu"] += time.process_time() - cpu
+            record["net_blocks"] += sys.getallocatedblocks() - blocks
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], self.peaks.pop())
+                record["peak_bytes"] = max(record["peak_bytes"], peak - traced)
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+            entry[0] += 1
+            entry[1] += 1
+            entry[2] += wall - self.current_phase[1]
+            entry[3] += wall
+            self.current_phase, self.stack = outer_phase, outer_stack
+            if self.current_phase is not None:
+                self.current_phase[1] += wall
+
+    def instrument(self, obj, names=None):
+        # Оборачивает методы obj (по умолчанию все открытые методы его класса) на самом
+        # экземпляре: вызовы self.factor() внутри парсера идут через обёртку
+        cls = type(obj)
+        if names is None:
+            names = [name for name, value in vars(cls).items() if callable(value) and not name.startswith('_')]
+        for name in names:
+            function = getattr(cls, name)
+            code = function.__code__
+            key = (code.co_filename, code.co_firstlineno, f"{cls.__name__}.{name}")
+            setattr(obj, name, self.wrap(getattr(obj, name), key))
+        return obj
+
+    def wrap(self, method, key):
+        functions = self.functions
+        active = self.active
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            stack = self.stack
+            caller = stack[-1] if stack else self.current_phase
+            frame = [key, 0.0]
+            stack.append(frame)
+            active[key] += 1
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                active[key] -= 1
+                # время с вложенными для рекурсивных вызовов считается только у внешнего
+                primitive = active[key] == 0
+                own = elapsed - frame[1]
+                entry = functions.get(key)
+                if entry is None:
+                    entry = functions[key] = [0, 0, 0.0, 0.0, {}]
+                entry[1] += 1
+                entry[2] += own
+                if primitive:
+                    entry[0] += 1
+                    entry[3] += elapsed
+                if caller is not None:
+                    caller[1] += elapsed
+                    edge = entry[4].get(caller[0])
+                    if edge is None:
+                        edge = entry[4][caller[0]] = [0, 0, 0.0, 0.0]
+                    edge[1] += 1
+                    edge[2] += own
+                    if primitive:
+                        edge[0] += 1
+                        edge[3] += elapsed
+
+        return wrapper
+
+    def count_tokens(self, tokens):
+        kinds = getattr(tokens, 'kinds', None)
+        if kinds is not None:
+            for code, count in Counter(kinds).items():
+                self.tokens[tokens.TYPES[code]] += count
+        else:
+            self.tokens.update(token[0] for token in tokens)
+
+    # Экспорт
+
+    def rules(self):
+        result = {}
+        for (filename, line, name), (cc, nc, tt, ct, callers) in self.functions.items():
+            if filename == "~":
+                continue
+            result[name] = {"calls": nc, "primitive_calls": cc, "own_time": tt, "cumulative_time": ct}
+        return result
+
+    def to_dict(self):
+        return {"phases": self.phases, "rules": self.rules(), "tokens": dict(self.tokens.most_common())}
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def stats(self):
+        # Словарь в формате pstats: ключ -> (cc, nc, tt, ct, {вызывающий: (cc, nc, tt, ct)})
+        return {
+            key: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.items()})
+            for key, (cc, nc, tt, ct, callers) in self.functions.items()
+        }
+
+    def dump_stats(self, path):
+        with open(path, "wb") as f:
+            marshal.dump(self.stats(), f)
+
+    def report(self, limit=15):
+        lines = ["Фаза                       запусков    время, с      ЦП, с  Δ блоков" +
+                 ("   пик, КБ" if self.memory else "")]
+        for name, record in self.phases.items():
+            line = (f"{name:26} {record['calls']:9} {record['wall']:11.4f} {record['cpu']:10.4f} "
+                    f"{record['net_blocks']:9}")
+            if "peak_bytes" in record:
+                line += f" {record['peak_bytes'] / 1024:9.0f}"
+            lines.append(line)
+        rules = sorted(self.rules().items(), key=lambda item: -item[1]["cumulative_time"])
+        if rules:
+            lines.append("Правило                            вызовов   собств., с   всего, с")
+            for name, record in rules[:limit]:
+                lines.append(f"{name:34} {record['calls']:7} {record['own_time']:12.4f} "
+                             f"{record['cumulative_time']:10.4f}")
+        if self.tokens:
+            lines.append("Токены: " + ", ".join(f"{type_} {count}" for type_, count in self.tokens.most_common()))
+        return "\n".join(lines)
+
+
+def profile_source(source, profiler, engine="regex"):
+    # Все фазы над одной программой, включая старый семантический анализ
+    with profiler.phase("lexer"):
+        tokens = LexicalAnalyzer(source, engine=engine).tokenize_stream()
+    profiler.count_tokens(tokens)
+    parser = profiler.instrument(SyntaxAnalyzer(tokens, recover=True))
+    with profiler.phase("parser"):
+        parser.parse()
+    with profiler.phase("semantic_single_pass"):
+        analyze_single_pass(tokens)
+    try:
+        with profiler.phase("symbol_table_legacy"):
+            symbol_table, operations = generate_symbol_table_and_operations(tokens)
+    except SyntaxError:
+        return parser   # старый анализ отвергает литералы не в десятичной форме
+    with profiler.phase("semantic_legacy"):
+        SemanticAnalyzer(symbol_table).analyze(operations)
+    return parser
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Профиль анализа одной программы")
+    parser.add_argument("path")
+    parser.add_argument("--engine", default="regex", choices=("classic", "regex"))
+    parser.add_argument("--json", help="куда записать профиль в JSON")
+    parser.add_argument("--stats", help="куда записать статистику для pstats")
+    parser.add_argument("--limit", type=int, default=15, help="сколько правил печатать")
+    parser.add_argument("--memory", action="store_true", help="пик памяти фаз по tracemalloc (медленнее)")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding="utf-8") as f:
+        source = f.read()
+    profiler = Profiler(memory=args.memory)
+    try:
+        profile_source(source, profiler, args.engine)
+    finally:
+        profiler.close()
+    print(profiler.report(args.limit))
+    if args.json:
+        profiler.dump_json(args.json)
+    if args.stats:
+        profiler.dump_stats(args.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
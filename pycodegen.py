@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import importlib.util
+import marshal
+import math
+import sys
+import time
+
+from cache import ShardedStore
+from pipeline import parse_program
+from syntax_tree import Assign, If, While, Write, BinOp, Var, Num, bind_symbols
+
+# Перевод программы в исходный текст Python и выполнение его байткода:
+#
+#     program = load_program(source, CodeCache("/tmp/programs"))
+#     program.run()
+#     python pycodegen.py prog.txt --cache /tmp/programs --timing
+#
+# Программа становится функцией run(write): переменные - её локальные переменные
+# (v_<номер>), if и while - операторы Python, write - запись format_value(значение).
+# Семантика совпадает с vm.VM: переменные начинаются с 0, необъявленные тоже
+# получают 0, деление - '/', деление на ноль - ZeroDivisionError. Функция
+# возвращает словарь значений переменных, как VM.run.
+#
+# Код модуля сохраняется через marshal в каталог кэша. Ключ - SHA-256 от версии
+# перевода, версии байткода Python и текста программы, поэтому повторный запуск
+# той же программы не выполняет ни лексического, ни синтаксического анализа.
+#
+# Ограничения компилятора Python: не больше 20 вложенных while и 100 уровней
+# отступа; такие программы перевод отклоняет с ValueError. Длинные выражения
+# компилятор тоже не принимает (рекурсия при компиляции), поэтому поддеревья
+# глубже EXPRESSION_DEPTH выносятся во временные переменные.
+
+# Версия перевода входит в ключ кэша: её нужно увеличивать при изменении кода,
+# который выдаёт translate
+BACKEND_VERSION = "2"
+MAGIC = b"TFY1"
+SUFFIX = ".code"
+
+EXPRESSION_DEPTH = 100
+MAX_LOOPS = 20          # вложенных while: предел блоков компилятора Python
+MAX_INDENT = 98         # уровней отступа под def run: предел токенизатора - 100
+
+COMPARISONS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '=': '=='}
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+ATOM = 3
+
+
+class Translator:
+    def __init__(self):
+        self.lines = []
+        self.variables = {}     # номер имени -> (имя, локальная переменная), в порядке появления
+        self.prelude = []       # вынесенные подвыражения текущего оператора
+        self.temps = 0
+
+    def translate(self, program):
+        symbols = bind_symbols(program)
+        for name in program.declarations:
+            self.local(symbols.intern(name), name)
+        self.statements(program.body, 1, 0)
+        body = self.lines
+        self.lines = ["def run(write):"]
+        self.lines.extend(f"    {local} = 0" for _, local in self.variables.values())
+        self.lines.extend(body)
+        result = ", ".join(f"{name!r}: {local}" for name, local in self.variables.values())
+        self.lines.append(f"    return {{{result}}}")
+        return "\n".join(self.lines) + "\n"
+
+    def local(self, symbol, name):
+        variable = self.variables.get(symbol)
+        if variable is None:
+            # по номеру, а не по имени: Python приводит идентификаторы к NFKC,
+            # и разные переменные 'ﬁ' и 'fi' стали бы одной
+            variable = self.variables[symbol] = (name, f"v_{len(self.variables)}")
+        return variable[1]
+
+    def constant(self, node):
+        value = node.value
+        if value is None:
+            raise ValueError(f"Неожиданное число: {node.text}")
+        if isinstance(value, float) and not math.isfinite(value):
+            return f"float('{value!r}')"
+        text = repr(value)
+        return f"({text})" if text.startswith('-') else text
+
+    def spill(self, text, position=None):
+        # значение во временную переменную; position - место в prelude, чтобы
+        # сохранить порядок вычисления
+        name = f"t_{self.temps}"
+        self.temps += 1
+        line = f"{name} = {text}"
+        if position is None:
+            self.prelude.append(line)
+        else:
+            self.prelude.insert(position, line)
+        return name
+
+    def expression(self, node):
+        # Текст выражения. Обход без рекурсии: цепочка a + b + ... из тысяч
+        # слагаемых - дерево такой же глубины
+        values = []     # (текст, глубина, приоритет)
+        marks = []      # длина prelude после вычисления левого операнда
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                marks.append(len(self.prelude))
+            elif isinstance(node, Var):
+                values.append((self.local(node.symbol, node.name), 1, ATOM))
+            elif isinstance(node, Num):
+                values.append((self.constant(node), 1, ATOM))
+            elif isinstance(node, BinOp):
+                stack.append((node,))
+                stack.append(node.right)
+                stack.append(None)
+                stack.append(node.left)
+            elif isinstance(node, tuple):
+                node = node[0]
+                right, right_depth, right_precedence = values.pop()
+                left, left_depth, left_precedence = values.pop()
+                mark = marks.pop()
+                if len(self.prelude) > mark and left_precedence != ATOM:
+                    # правый операнд вынесен: левый вычисляется раньше него
+                    left, left_depth, left_precedence = self.spill(left, mark), 1, ATOM
+                precedence = PRECEDENCE[node.op]
+                if left_precedence < precedence:
+                    left = f"({left})"
+                if right_precedence <= precedence:
+                    right = f"({right})"
+                depth = max(left_depth, right_depth) + 1
+                text = f"{left} {node.op} {right}"
+                if depth >= EXPRESSION_DEPTH:
+                    values.append((self.spill(text), 1, ATOM))
+                else:
+                    values.append((text, depth, precedence))
+            else:
+                raise ValueError(f"Неизвестный узел: {node}")
+        return values[0][0]
+
+    def condition(self, node):
+        left = self.expression(node.left)
+        mark = len(self.prelude)
+        right = self.expression(node.right)
+        if len(self.prelude) > mark and not left.isidentifier():
+            left = self.spill(left, mark)
+        return f"{left} {COMPARISONS[node.op]} {right}"
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def flush(self, indent):
+        for line in self.prelude:
+            self.emit(indent, line)
+        self.prelude = []
+
+    def statements(self, body, indent, loops):
+        if indent > MAX_INDENT:
+            raise ValueError(f"Вложенность больше {MAX_INDENT - 1} уровней не переводится в Python")
+        if not body:
+            self.emit(indent, "pass")
+        for node in body:
+            self.statement(node, indent, loops)
+
+    def statement(self, node, indent, loops):
+        if isinstance(node, Assign):
+            value = self.expression(node.value)
+            self.flush(indent)
+            self.emit(indent, f"{self.local(node.symbol, node.name)} = {value}")
+        elif isinstance(node, Write):
+            value = self.expression(node.value)
+            self.flush(indent)
+            # то же, что vm.format_value
+            self.emit(indent, f"write(f\"{{{value}}}\\n\")")
+        elif isinstance(node, If):
+            test = self.condition(node.condition)
+            self.flush(indent)
+            self.emit(indent, f"if {test}:")
+            self.statements(node.then_body, indent + 1, loops)
+            if node.else_body:
+                self.emit(indent, "else:")
+                self.statements(node.else_body, indent + 1, loops)
+        elif isinstance(node, While):
+            if loops >= MAX_LOOPS:
+                raise ValueError(f"Больше {MAX_LOOPS} вложенных циклов не переводится в Python")
+            test = self.condition(node.condition)
+            if self.prelude:
+                # вынесенные части условия вычисляются перед каждой проверкой
+                self.emit(indent, "while True:")
+                self.flush(indent + 1)
+                self.emit(indent + 1, f"if not ({test}):")
+                self.emit(indent + 2, "break")
+                self.statements(node.body, indent + 1, loops + 1)
+            else:
+                self.emit(indent, f"while {test}:")
+                self.statements(node.body, indent + 1, loops + 1)
+        else:
+            raise ValueError(f"Неизвестный узел: {node}")
+
+
+def translate(program):
+    return Translator().translate(program)
+
+
+def compile_program(program):
+    try:
+        return compile(translate(program), "<program>", "exec")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        raise ValueError(f"Программа не переводится в Python: {e}") from e
+
+
+def compile_source(source):
+    return compile_program(parse_program(source))
+
+
+class PythonProgram:
+    __slots__ = ('code', 'function')
+
+    def __init__(self, code):
+        self.code = code
+        namespace = {}
+        exec(code, namespace)
+        self.function = namespace["run"]
+
+    def run(self, out=None):
+        out = out if out is not None else sys.stdout
+        return self.function(out.write)
+
+
+class CodeCache(ShardedStore):
+    # Каталог с кодом модулей программ: запись - MAGIC, версия байткода Python,
+    # marshal объекта кода
+    suffix = SUFFIX
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source):
+        digest = hashlib.sha256()
+        digest.update(f"{BACKEND_VERSION}\0".encode())
+        digest.update(importlib.util.MAGIC_NUMBER)
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, source):
+        path = self.path(self.key(source))
+        data = self.read(path)
+        if data is None:
+            self.misses += 1
+            return None
+        header = MAGIC + importlib.util.MAGIC_NUMBER
+        try:
+            if not data.startswith(header):
+                raise ValueError("Повреждённая запись кэша")
+            code = marshal.loads(data[len(header):])
+        except (ValueError, EOFError, TypeError):
+            # битая или чужая запись - промах
+            self.discard(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return code
+
+    def put(self, source, code):
+        self.write(self.path(self.key(source)), MAGIC + importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+
+
+def load_program(source, cache=None, timings=None):
+    # PythonProgram для текста программы. timings - словарь, куда записываются
+    # "compile" (разбор, перевод и compile), "store" (запись в кэш), "load" (чтение
+    # из кэша и создание функции) в секундах и "cached"
+    start = time.perf_counter()
+    code = cache.get(source) if cache is not None else None
+    cached = code is not None
+    compiled = stored = time.perf_counter()
+    if code is None:
+        code = compile_source(source)
+        compiled = time.perf_counter()
+        if cache is not None:
+            cache.put(source, code)
+        stored = time.perf_counter()
+    program = PythonProgram(code)
+    loaded = time.perf_counter()
+    if timings is not None:
+        timings["cached"] = cached
+        timings["compile"] = compiled - start if not cached else 0.0
+        timings["store"] = stored - compiled
+        timings["load"] = (compiled - start if cached else 0.0) + loaded - stored
+    return program
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Выполнение программы, переведённой в байткод Python")
+    parser.add_argument("path")
+    parser.add_argument("--cache", default=None, help="каталог кэша кода программ")
+    parser.add_argument("--timing", action="store_true", help="время компиляции, загрузки и выполнения в stderr")
+    parser.add_argument("--source", action="store_true", help="напечатать текст на Python вместо выполнения")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding="utf-8") as f:
+        source = f.read()
+    if args.source:
+        sys.stdout.write(translate(parse_program(source)))
+        return 0
+    cache = CodeCache(args.cache) if args.cache is not None else None
+    timings = {}
+    program = load_program(source, cache, timings)
+    start = time.perf_counter()
+    program.run()
+    elapsed = time.perf_counter() - start
+    if args.timing:
+        sys.stdout.flush()
+        state = "из кэша" if timings["cached"] else "компиляция"
+        print(f"{state}: компиляция {timings['compile'] * 1000:.3f} мс, запись {timings['store'] * 1000:.3f} мс, "
+              f"загрузка {timings['load'] * 1000:.3f} мс, выполнение {elapsed * 1000:.3f} мс", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
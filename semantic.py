@@ -1,36 +1,62 @@
+from numeric import number_type
+from symbols import ASSIGNED, NO_SYMBOL, TYPE_CODES, TYPE_INTEGER, USED, SymbolTable, symbol_ids
+from tokenstream import TokenStream
+from tracing import NULL_TRACER, INFO, DEBUG
+
+CODES = TokenStream.CODES
+KEYWORD, ID, NUMBER, ASSIGN, DELIMITER = (CODES[type_] for type_ in ('KEYWORD', 'ID', 'NUMBER', 'ASSIGN', 'DELIMITER'))
+NUMBER_SUFFIX = TokenStream.NUMBER_SUFFIX
+
 global_type=None
 
 class SemanticAnalyzer:
-    def __init__(self, symbol_table):
+    def __init__(self, symbol_table, tracer=None):
+        # SymbolTable с операциями ('assign'|'use', номер имени) или, как прежде,
+        # словарь {имя: {...}} с операциями ('assign'|'use', имя)
         self.symbol_table = symbol_table
+        self.table = symbol_table if isinstance(symbol_table, SymbolTable) else SymbolTable.from_dict(symbol_table)
         self.errors = []
+        self.trace = tracer if tracer is not None else NULL_TRACER
 
     def analyze(self, operations):
-        print("Начало семантического анализа...")
+        if self.trace.semantic >= INFO:
+            self.trace.emit("semantic", INFO, "Начало семантического анализа...")
+        # операции ссылаются на переменные по номеру имени, строка нужна только для сообщений
+        symbol_table = self.table
+        intern = symbol_table.interner.intern
         for operation in operations:
-            print(f"Обрабатываем операцию: {operation}")
+            if operation[1].__class__ is str:
+                operation = (operation[0], intern(operation[1]))
+            if self.trace.semantic >= DEBUG:
+                self.trace.emit("semantic", DEBUG, f"Обрабатываем операцию: {(operation[0], symbol_table.name(operation[1]))}")
             if operation[0] == 'assign':
                 variable = operation[1]
-                print(f"Проверяем переменную для присваивания: {variable}")
-                if variable not in self.symbol_table:
-                    self.errors.append(f"Ошибка: Переменная '{variable}' не объявлена.")
+                if self.trace.semantic >= DEBUG:
+                    self.trace.emit("semantic", DEBUG, f"Проверяем переменную для присваивания: {symbol_table.name(variable)}")
+                if symbol_table.get(variable) is None:
+                    self.errors.append(f"Ошибка: Переменная '{symbol_table.name(variable)}' не объявлена.")
             elif operation[0] == 'use':
                 variable = operation[1]
-                print(f"Проверяем использование переменной: {variable}")
-                if variable not in self.symbol_table:
-                    self.errors.append(f"Ошибка: Переменная '{variable}' не объявлена.")
+                if self.trace.semantic >= DEBUG:
+                    self.trace.emit("semantic", DEBUG, f"Проверяем использование переменной: {symbol_table.name(variable)}")
+                if symbol_table.get(variable) is None:
+                    self.errors.append(f"Ошибка: Переменная '{symbol_table.name(variable)}' не объявлена.")
             else:
                 self.errors.append(f"Ошибка: Неизвестная операция '{operation[0]}'.")
-            print(f"Текущие ошибки: {self.errors}")
-        print("Семантический анализ завершен.")
+            if self.trace.semantic >= DEBUG:
+                self.trace.emit("semantic", DEBUG, f"Текущие ошибки: {self.errors}")
+        if self.trace.semantic >= INFO:
+            self.trace.emit("semantic", INFO, "Семантический анализ завершен.")
         return self.errors
 
     def get_errors(self):
         return self.errors
 
-def generate_symbol_table_and_operations(tokens):
+def generate_symbol_table_and_operations(tokens, tracer=None):
     global global_type
-    symbol_table = {}
+    trace = tracer if tracer is not None else NULL_TRACER
+    interner, ids = symbol_ids(tokens)
+    symbol_table = SymbolTable(interner)
     operations = []
     current_type = None
     in_var_section = False
@@ -38,15 +64,18 @@ def generate_symbol_table_and_operations(tokens):
     begin_seen = False
 
     for j, token in enumerate(tokens):
-        print(f"Обрабатываем токен: {token}")
+        if trace.semantic >= DEBUG:
+            trace.emit("semantic", DEBUG, f"Обрабатываем токен: {token}")
         if token[0] == 'KEYWORD':
             if token[1] in ['integer', 'real', 'boolean']:
                 current_type = token[1]
                 global_type=token[1]
-                print(current_type)
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, current_type)
 
     for i, token in enumerate(tokens):
-        print(f"Обрабатываем токен: {token}")
+        if trace.semantic >= DEBUG:
+            trace.emit("semantic", DEBUG, f"Обрабатываем токен: {token}")
         if token[0] == 'KEYWORD':
             if token[1] == 'var':
                 var_seen = True
@@ -58,22 +87,26 @@ def generate_symbol_table_and_operations(tokens):
                 in_var_section = False
                 current_type = None
         elif token[0] == 'ID' and var_seen and not begin_seen:
-            if token[1] not in symbol_table:
+            if symbol_table.get(ids[i]) is None:
                 # if current_type==None:
                 #     if token[1]=="real":
                 #         global_type = token[1]
                 #     if token[1]=="integer":
                 #         global_type=token[1]
-                symbol_table[token[1]] = {'type': current_type, 'scope': 'global'}
-                print(global_type)
-                print(f"Переменная '{token[1]}' добавлена в таблицу символов с типом '{current_type}'")
+                symbol_table.declare(ids[i], TYPE_CODES[current_type])
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, global_type)
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, f"Переменная '{token[1]}' добавлена в таблицу символов с типом '{current_type}'")
         elif token[0] == 'ID' and not in_var_section:
-            if token[1] not in symbol_table:
-                operations.append(('use', token[1]))
-                print(f"Переменная '{token[1]}' используется, но не найдена в таблице символов.")
+            if symbol_table.get(ids[i]) is None:
+                operations.append(('use', ids[i]))
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, f"Переменная '{token[1]}' используется, но не найдена в таблице символов.")
             else:
-                operations.append(('use', token[1]))
-                print(f"Переменная '{token[1]}' используется и найдена в таблице символов.")
+                operations.append(('use', ids[i]))
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, f"Переменная '{token[1]}' используется и найдена в таблице символов.")
         # elif token[0]=="NUMBER":
         #     for i in token[1]:
         #         if i not in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "."]:
@@ -85,21 +118,25 @@ def generate_symbol_table_and_operations(tokens):
         #             print()
         #             print()
         elif token[0] == 'ASSIGN':
-            if i > 0 and tokens[i - 1][0] == 'ID':
+            if i > 0 and ids[i - 1] >= 0:
                 var_name = tokens[i - 1][1]
-                if var_name not in symbol_table:
-                    operations.append(('assign', var_name))
-                    print(f"Переменная '{var_name}' используется для присваивания, но не найдена в таблице символов.")
+                if symbol_table.get(ids[i - 1]) is None:
+                    operations.append(('assign', ids[i - 1]))
+                    if trace.semantic >= DEBUG:
+                        trace.emit("semantic", DEBUG, f"Переменная '{var_name}' используется для присваивания, но не найдена в таблице символов.")
                 else:
-                    operations.append(('assign', var_name))
-                    print(f"Переменная '{var_name}' используется для присваивания и найдена в таблице символов.")
+                    operations.append(('assign', ids[i - 1]))
+                    if trace.semantic >= DEBUG:
+                        trace.emit("semantic", DEBUG, f"Переменная '{var_name}' используется для присваивания и найдена в таблице символов.")
 
     for pencil, token in enumerate(tokens):
         if token[0]=="NUMBER":
             for i in token[1]:
-                print(global_type)
+                if trace.semantic >= DEBUG:
+                    trace.emit("semantic", DEBUG, global_type)
                 if i not in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", ".", "true", "false"]:
-                    print(i)
+                    if trace.semantic >= DEBUG:
+                        trace.emit("semantic", DEBUG, i)
                     raise SyntaxError(f"Неожиданное число: {token[1]}")
                 if i=="." and global_type!="real":
                     raise SyntaxError(f"Неправильный тип: {global_type}")
@@ -107,5 +144,107 @@ def generate_symbol_table_and_operations(tokens):
                     # print()
                     # print()
 
-    print(f"Таблица символов: {symbol_table}")
-    return symbol_table, operations
\ No newline at end of file
+    if trace.semantic >= INFO:
+        trace.emit("semantic", INFO, f"Таблица символов: {symbol_table}")
+    return symbol_table, operations
+
+def analyze_single_pass(tokens, tracer=None):
+    # Таблица символов, операции use/assign и ошибки за один проход по токенам.
+    # Тип запоминается для каждой переменной отдельно, числовые литералы в правой части
+    # присваивания сверяются с типом переменной слева. Общего состояния нет, поэтому
+    # функцию можно вызывать для нескольких программ одновременно.
+    # Переменные везде - номера имён из лексера (symbols.Interner), имя берётся только
+    # для сообщений; операции - ('use' | 'assign', номер).
+    trace = tracer if tracer is not None else NULL_TRACER
+    interner, ids = symbol_ids(tokens)
+    if isinstance(tokens, TokenStream):
+        # значение токена нужно только ключевым словам, числам и разделителям
+        kinds, value_of = tokens.kinds, tokens.value
+    else:
+        tokens = list(tokens)
+        kinds = [CODES[type_] for type_, _ in tokens]
+        value_of = lambda i: tokens[i][1]
+    names = interner.names
+    symbol_table = SymbolTable(interner)
+    slots = symbol_table.slots
+    operations = []
+    errors = []
+    var_seen = False
+    begin_seen = False
+    in_var_section = False
+    pending = []  # объявленные переменные, тип которых ещё не встретился
+    deferred = []  # использования до 'begin': таблица символов ещё не готова
+    target = None  # номер переменной слева в текущем присваивании
+    previous = NO_SYMBOL  # номер имени предыдущего токена, если это идентификатор
+
+    def check(variable):
+        if slots[variable] is None:
+            errors.append(f"Ошибка: Переменная '{names[variable]}' не объявлена.")
+
+    for i, code in enumerate(kinds):
+        if code == ID:
+            symbol = ids[i]
+            if var_seen and not begin_seen:
+                if slots[symbol] is None:
+                    symbol_table.declare(symbol)
+                    pending.append(symbol)
+                    if trace.semantic >= DEBUG:
+                        trace.emit("semantic", DEBUG, f"Переменная '{names[symbol]}' добавлена в таблицу символов")
+            elif not in_var_section:
+                operations.append(('use', symbol))
+                if begin_seen:
+                    check(symbol)
+                else:
+                    deferred.append(symbol)
+            previous = symbol
+            continue
+        if code == KEYWORD:
+            value = value_of(i)
+            if value == 'var':
+                var_seen = True
+                in_var_section = True
+            elif value in ('integer', 'real', 'boolean') and var_seen and not begin_seen:
+                for variable in pending:
+                    slots[variable].type = TYPE_CODES[value]
+                pending.clear()
+            elif value == 'begin':
+                if not begin_seen:
+                    begin_seen = True
+                    for variable in deferred:
+                        check(variable)
+                    deferred.clear()
+                in_var_section = False
+        elif code == ASSIGN:
+            if previous >= 0:
+                target = previous
+                operations.append(('assign', target))
+                if begin_seen:
+                    check(target)
+                else:
+                    deferred.append(target)
+        elif code == NUMBER or code == NUMBER_SUFFIX:
+            value = value_of(i)
+            literal_type = number_type(value)
+            if literal_type is None:
+                errors.append(f"Ошибка: Неожиданное число '{value}'.")
+            elif literal_type == 'real' and target is not None and slots[target] is not None \
+                    and slots[target].type == TYPE_INTEGER:
+                errors.append(f"Ошибка: Переменной '{names[target]}' типа integer присваивается вещественное число '{value}'.")
+        elif code == DELIMITER and value_of(i) == ';':
+            target = None
+        previous = NO_SYMBOL
+
+    for variable in deferred:
+        check(variable)
+    # Флаги записей: ('use', x) сразу перед ('assign', x) - это левая часть присваивания
+    for index, (kind, variable) in enumerate(operations):
+        record = slots[variable]
+        if record is None:
+            continue
+        if kind == 'assign':
+            record.flags |= ASSIGNED
+        elif index + 1 == len(operations) or operations[index + 1] != ('assign', variable):
+            record.flags |= USED
+    if trace.semantic >= INFO:
+        trace.emit("semantic", INFO, f"Таблица символов: {symbol_table}")
+    return symbol_table, operations, errors
@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lexer import LexicalAnalyzer
+from pipeline import analyze_tokens
+
+# Долгоживущий сервер анализа: процессы пула уже импортировали анализатор, так что
+# запрос не платит за запуск Python.
+#
+#     python server.py --unix /tmp/analyzer.sock --jobs 4
+#     python server.py --port 8765
+#     python server.py --unix /tmp/analyzer.sock --check prog.txt
+#
+# Протокол - JSON по строке на запрос и на ответ; на одном соединении запросы можно
+# слать не дожидаясь ответов, ответ находится по "id":
+#     {"id": 1, "op": "analyze", "source": "program ...", "tokens": true}
+#     {"id": 1, "ok": true, "result": {"status": "ok", "tokens": 18, "diagnostics": [...], "token_list": [...]}}
+#     {"id": 2, "op": "health"}     {"id": 3, "op": "metrics"}
+#
+# Запросы анализа собираются в пачки: пока все процессы пула заняты, запросы копятся в
+# очереди и уходят одной задачей (до batch_size штук, с ожиданием до batch_delay секунд).
+# Одновременно в работе не больше max_in_flight запросов, остальные ждут очереди.
+
+# Строка запроса может содержать целую программу
+LINE_LIMIT = 64 * 2 ** 20
+
+
+def analyze_request(request):
+    tokens = LexicalAnalyzer(request["source"], engine=request.get("engine", "regex")).tokenize_stream()
+    result = analyze_tokens(tokens)
+    if request.get("tokens"):
+        # [тип, значение, строка, столбец]
+        result["token_list"] = [[*tokens.token(i), *tokens.position(i)] for i in range(len(tokens))]
+    return result
+
+
+def analyze_batch(requests):
+    results = []
+    for request in requests:
+        try:
+            results.append((True, analyze_request(request)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class AnalysisServer:
+    def __init__(self, jobs=None, batch_size=32, batch_delay=0.001, max_in_flight=256, executor=None):
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers=jobs)
+        self.jobs = jobs or os.cpu_count()
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_in_flight = max_in_flight
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+        # Задачи пачек: цикл событий держит задачи только по слабым ссылкам, без этого
+        # множества задача пачки могла бы быть собрана сборщиком мусора до ответа
+        self.batches = set()
+        self.running = 0        # пачек в пуле
+        self.servers = []
+        self.connections = {}   # задача соединения -> его writer
+        self.started = time.time()
+        self.metrics = {
+            "requests": 0, "completed": 0, "errors": 0, "batches": 0,
+            "in_flight": 0, "latency_total": 0.0, "latency_max": 0.0,
+        }
+
+    async def start(self, unix=None, host=None, port=None):
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+        self.batcher = asyncio.create_task(self.collect_batches())
+        if unix is not None:
+            if os.path.exists(unix):
+                os.unlink(unix)
+            server = await asyncio.start_unix_server(self.handle_connection, unix, limit=LINE_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=LINE_LIMIT)
+        self.servers.append(server)
+        return server
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+        # открытые соединения закрываются сами: чтение получает конец потока
+        for writer in self.connections.values():
+            writer.close()
+        if self.connections:
+            await asyncio.gather(*self.connections, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        if self.batcher is not None:
+            self.batcher.cancel()
+        if self.batches:
+            await asyncio.gather(*self.batches, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Соединения
+
+    async def handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        connection = asyncio.current_task()
+        self.connections[connection] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self.send(writer, lock, {"id": None, "ok": False, "error": "Слишком длинный запрос"})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.handle_line(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            del self.connections[connection]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, writer, lock, response):
+        data = json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+        async with lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def handle_line(self, line, writer, lock):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            await self.send(writer, lock, {"id": None, "ok": False, "error": f"Некорректный JSON: {e}"})
+            return
+        if not isinstance(request, dict):
+            await self.send(writer, lock, {"id": None, "ok": False, "error": "Запрос должен быть объектом"})
+            return
+        response = {"id": request.get("id")}
+        op = request.get("op", "analyze")
+        if op == "health":
+            response.update(ok=True, result=self.health())
+        elif op == "metrics":
+            response.update(ok=True, result=self.snapshot())
+        elif op == "analyze":
+            if not isinstance(request.get("source"), str):
+                response.update(ok=False, error="Нет текста программы (source)")
+            else:
+                ok, value = await self.submit(request)
+                response["ok"] = ok
+                response["result" if ok else "error"] = value
+        else:
+            response.update(ok=False, error=f"Неизвестная операция: {op}")
+        try:
+            await self.send(writer, lock, response)
+        except ConnectionError:
+            pass
+
+    # Очередь, пачки и пул
+
+    async def submit(self, request):
+        metrics = self.metrics
+        metrics["requests"] += 1
+        start = time.perf_counter()
+        async with self.slots:
+            metrics["in_flight"] += 1
+            future = asyncio.get_running_loop().create_future()
+            self.queue.put_nowait(({"source": request["source"], "engine": request.get("engine", "regex"),
+                                    "tokens": bool(request.get("tokens"))}, future))
+            try:
+                ok, value = await future
+            finally:
+                metrics["in_flight"] -= 1
+        latency = time.perf_counter() - start
+        metrics["completed"] += 1
+        metrics["latency_total"] += latency
+        metrics["latency_max"] = max(metrics["latency_max"], latency)
+        if not ok:
+            metrics["errors"] += 1
+        return ok, value
+
+    async def collect_batches(self):
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            # Пока в пуле есть свободный процесс, запрос уходит сразу; под нагрузкой
+            # пачка ждёт попутчиков batch_delay
+            if self.batch_delay > 0 and queue.empty() and self.running >= self.jobs:
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            # пачки выполняются параллельно: их число ограничено max_in_flight
+            task = asyncio.create_task(self.run_batch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self.batches.discard)
+
+    async def run_batch(self, batch):
+        self.metrics["batches"] += 1
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            results = await loop.run_in_executor(executor, analyze_batch, [request for request, _ in batch])
+        except BrokenProcessPool:
+            # упавший процесс пула: пул пересоздаётся, пачка завершается с ошибкой. Пачки,
+            # бывшие в том же пуле, получают ту же ошибку; новый пул создаёт только первая
+            if self.executor is executor:
+                executor.shutdown(wait=False)
+                self.executor = ProcessPoolExecutor(max_workers=self.jobs)
+            results = [(False, "Процесс анализа аварийно завершился")] * len(batch)
+        except Exception as e:
+            results = [(False, f"{type(e).__name__}: {e}")] * len(batch)
+        finally:
+            self.running -= 1
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    # Состояние
+
+    def health(self):
+        return {"status": "ok", "uptime": round(time.time() - self.started, 3), "workers": self.jobs}
+
+    def snapshot(self):
+        metrics = dict(self.metrics)
+        completed = metrics["completed"]
+        metrics["latency_mean"] = metrics["latency_total"] / completed if completed else 0.0
+        metrics["batch_mean"] = completed / metrics["batches"] if metrics["batches"] else 0.0
+        metrics["queued"] = self.queue.qsize() if self.queue is not None else 0
+        metrics["max_in_flight"] = self.max_in_flight
+        metrics["uptime"] = round(time.time() - self.started, 3)
+        return metrics
+
+
+async def serve(args):
+    server = AnalysisServer(args.jobs, args.batch_size, args.batch_delay, args.max_in_flight)
+    await server.start(args.unix, args.host, args.port)
+    where = args.unix if args.unix else f"{args.host}:{args.port}"
+    print(f"Сервер анализа слушает {where}, процессов {server.jobs}", file=sys.stderr)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+def request(requests, unix=None, host="127.0.0.1", port=8765):
+    # Синхронный клиент: отправляет запросы одной пачкой строк, возвращает ответы по порядку
+    if unix is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(unix)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection, connection.makefile("rwb") as stream:
+        for i, item in enumerate(requests):
+            stream.write(json.dumps(dict(item, id=i), ensure_ascii=False).encode("utf-8") + b"\n")
+        stream.flush()
+        responses = {}
+        while len(responses) < len(requests):
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("Сервер закрыл соединение")
+            response = json.loads(line)
+            responses[response["id"]] = response
+    return [responses[i] for i in range(len(requests))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер анализа программ (JSON по строкам)")
+    parser.add_argument("--unix", help="путь Unix-сокета")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, default=None, help="процессов в пуле (по умолчанию по числу ядер)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-delay", type=float, default=0.001, help="ожидание пачки, с")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="запросов в работе одновременно")
+    parser.add_argument("--check", nargs="+", metavar="FILE", help="отправить файлы работающему серверу")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        items = []
+        for path in args.check:
+            with open(path, encoding="utf-8") as f:
+                items.append({"op": "analyze", "source": f.read()})
+        responses = request(items, args.unix, args.host, args.port)
+        for path, response in zip(args.check, responses):
+            print(json.dumps(dict(response, path=path), ensure_ascii=False))
+        clean = all(response["ok"] and response["result"]["status"] == "ok" for response in responses)
+        return 0 if clean else 1
+    asyncio.run(serve(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
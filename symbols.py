@@ -0,0 +1,134 @@
+# Интернирование имён и таблица символов по номерам.
+#
+# Лексер один раз переводит каждый идентификатор в небольшое целое (номер в Interner) и
+# кладёт его в TokenStream.ids. Дальше имена сравниваются как числа, а таблица символов -
+# массив записей, индекс в котором и есть номер имени. Строка нужна только для сообщений.
+
+NO_SYMBOL = -1      # в TokenStream.ids для токенов, которые не идентификаторы
+
+# Коды типов переменных
+TYPE_NONE = 0
+TYPE_INTEGER = 1
+TYPE_REAL = 2
+TYPE_BOOLEAN = 3
+TYPE_NAMES = (None, 'integer', 'real', 'boolean')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+# Области видимости: пока только глобальная
+SCOPE_GLOBAL = 0
+SCOPE_NAMES = ('global',)
+
+# Флаги записи
+USED = 1            # переменная читается
+ASSIGNED = 2        # переменной присваивается значение
+
+
+class Interner:
+    __slots__ = ('names', 'ids')
+
+    def __init__(self):
+        self.names = []     # номер -> имя
+        self.ids = {}       # имя -> номер
+
+    def intern(self, name):
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol
+
+    def lookup(self, name):
+        return self.ids.get(name, NO_SYMBOL)
+
+    def name(self, symbol):
+        return self.names[symbol]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Symbol:
+    __slots__ = ('type', 'scope', 'flags')
+
+    def __init__(self, type_=TYPE_NONE, scope=SCOPE_GLOBAL, flags=0):
+        self.type = type_
+        self.scope = scope
+        self.flags = flags
+
+    def __repr__(self):
+        return f"Symbol({TYPE_NAMES[self.type]!r}, {SCOPE_NAMES[self.scope]!r}, {self.flags})"
+
+
+class SymbolTable:
+    # slots[номер имени] - Symbol объявленной переменной или None;
+    # order - номера объявленных переменных в порядке объявления
+    __slots__ = ('interner', 'slots', 'order')
+
+    def __init__(self, interner):
+        self.interner = interner
+        self.slots = [None] * len(interner)
+        self.order = []
+
+    @classmethod
+    def from_dict(cls, mapping):
+        # из прежнего вида {имя: {'type': ..., 'scope': ...}}; номера - по порядку ключей
+        interner = Interner()
+        table = cls(interner)
+        for name, record in mapping.items():
+            type_ = record.get('type') if isinstance(record, dict) else None
+            table.declare(interner.intern(name), TYPE_CODES.get(type_, TYPE_NONE))
+        return table
+
+    def declare(self, symbol, type_=TYPE_NONE, scope=SCOPE_GLOBAL):
+        slots = self.slots
+        if symbol >= len(slots):
+            slots.extend([None] * (symbol + 1 - len(slots)))
+        record = slots[symbol]
+        if record is None:
+            record = slots[symbol] = Symbol(type_, scope)
+            self.order.append(symbol)
+        return record
+
+    def get(self, symbol):
+        # Symbol или None для необъявленного имени
+        slots = self.slots
+        return slots[symbol] if 0 <= symbol < len(slots) else None
+
+    def name(self, symbol):
+        return self.interner.names[symbol]
+
+    # Доступ по имени и прежний вид {имя: {'type': ..., 'scope': ...}}
+
+    def __contains__(self, name):
+        return self.get(self.interner.lookup(name)) is not None
+
+    def __getitem__(self, name):
+        record = self.get(self.interner.lookup(name))
+        if record is None:
+            raise KeyError(name)
+        return record
+
+    def __len__(self):
+        return len(self.order)
+
+    def to_dict(self):
+        names, slots = self.interner.names, self.slots
+        return {
+            names[symbol]: {'type': TYPE_NAMES[slots[symbol].type], 'scope': SCOPE_NAMES[slots[symbol].scope]}
+            for symbol in self.order
+        }
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def symbol_ids(tokens):
+    # (Interner, номера) для последовательности токенов: у TokenStream они готовы после
+    # лексера, для списка кортежей (тип, значение) строятся здесь
+    symbols = getattr(tokens, 'symbols', None)
+    if symbols is not None:
+        return symbols()
+    interner = Interner()
+    intern = interner.intern
+    ids = [intern(value) if type_ == 'ID' else NO_SYMBOL for type_, value in tokens]
+    return interner, ids
@@ -0,0 +1,141 @@
+from numeric import number_value
+from symbols import NO_SYMBOL, Interner
+
+# Узлы дерева разбора, которое строит SyntaxAnalyzer. Поля перечислены в __slots__,
+# так что узел занимает столько памяти, сколько у него полей.
+#
+# Var и Assign кроме имени хранят его номер (symbol) в Program.symbols - том же
+# Interner, что у TokenStream и таблицы символов. VM, оптимизатор и анализ потоков
+# данных работают с номерами, имя нужно только для сообщений и вывода. Номера
+# выводятся из имён, поэтому в сравнении узлов и в repr не участвуют.
+
+
+class Node:
+    __slots__ = ()
+    DERIVED = ('symbol', 'symbols')
+
+    def fields(self):
+        return [name for name in self.__slots__ if name not in Node.DERIVED]
+
+    def __repr__(self):
+        fields = ", ".join(repr(getattr(self, name)) for name in self.fields())
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.fields()
+        )
+
+
+class Program(Node):
+    # declarations: {имя: тип} в порядке объявления; symbols - Interner номеров имён
+    # или None, пока номера не розданы (bind_symbols)
+    __slots__ = ('declarations', 'body', 'symbols')
+
+    def __init__(self, declarations, body, symbols=None):
+        self.declarations = declarations
+        self.body = body
+        self.symbols = symbols
+
+
+class Assign(Node):
+    __slots__ = ('name', 'value', 'symbol')
+
+    def __init__(self, name, value, symbol=NO_SYMBOL):
+        self.name = name
+        self.value = value
+        self.symbol = symbol
+
+
+class If(Node):
+    __slots__ = ('condition', 'then_body', 'else_body')
+
+    def __init__(self, condition, then_body, else_body):
+        self.condition = condition
+        self.then_body = then_body
+        self.else_body = else_body
+
+
+class While(Node):
+    __slots__ = ('condition', 'body')
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+
+class Write(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class BinOp(Node):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Compare(Node):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Var(Node):
+    __slots__ = ('name', 'symbol')
+
+    def __init__(self, name, symbol=NO_SYMBOL):
+        self.name = name
+        self.symbol = symbol
+
+
+class Num(Node):
+    # text - литерал как его выдал лексер, value - его значение (int или float)
+    __slots__ = ('text', 'value')
+
+    def __init__(self, text, value=None):
+        self.text = text
+        if value is None:
+            try:
+                value = number_value(text)
+            except ValueError:
+                value = None  # о некорректном литерале сообщает семантический анализ
+        self.value = value
+
+
+def bind_symbols(program):
+    # Interner программы. Дерево от парсера уже с номерами; дереву, собранному
+    # вручную, номера раздаются здесь: объявления, затем имена в порядке обхода
+    symbols = program.symbols
+    if symbols is not None:
+        return symbols
+    symbols = program.symbols = Interner()
+    intern = symbols.intern
+    for name in program.declarations:
+        intern(name)
+    stack = list(reversed(program.body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (Var, Assign)):
+            node.symbol = intern(node.name)
+        if isinstance(node, (Assign, Write)):
+            stack.append(node.value)
+        elif isinstance(node, If):
+            stack.extend(reversed(node.else_body))
+            stack.extend(reversed(node.then_body))
+            stack.append(node.condition)
+        elif isinstance(node, While):
+            stack.extend(reversed(node.body))
+            stack.append(node.condition)
+        elif isinstance(node, (BinOp, Compare)):
+            stack.append(node.right)
+            stack.append(node.left)
+    return symbols
@@ -0,0 +1,95 @@
+import json
+import os
+
+import batch
+from batch import check_file, expand_paths, main, run_batch, summarize
+from generator import generate_program
+from pipeline import analyze_source
+
+
+def write_programs(directory, count):
+    paths = []
+    for i in range(count):
+        path = directory / f"p{i}.txt"
+        path.write_text(generate_program(variables=5, statements=30, depth=2, seed=i), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def without_timing(result):
+    return {key: value for key, value in result.items() if key not in ("path", "time")}
+
+
+def test_expand_paths(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.txt", "b.pas", "sub/c.txt"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    found = expand_paths([str(tmp_path), str(tmp_path / "a.txt")], "*.txt")
+    assert found == [str(tmp_path / "a.txt"), str(tmp_path / "sub" / "c.txt")]
+    assert expand_paths([str(tmp_path / "*.pas")]) == [str(tmp_path / "b.pas")]
+
+
+def test_pool_matches_sequential(tmp_path):
+    paths = write_programs(tmp_path, 12)
+    # число в самом конце текста роняет лексер: это "crash", остальные файлы не страдают
+    crashing = tmp_path / "crash.txt"
+    crashing.write_text("program begin x := 1", encoding="utf-8")
+    paths.append(str(crashing))
+    results = run_batch(paths, jobs=2, chunk_size=3)
+    assert [result["path"] for result in results] == paths
+    for path, result in zip(paths[:-1], results):
+        with open(path, encoding="utf-8") as f:
+            assert without_timing(result) == analyze_source(f.read())
+    assert results[-1]["status"] == "crash"
+    assert results[-1]["diagnostics"][0]["phase"] == "internal"
+
+
+def test_parser_failure_is_a_crash(tmp_path):
+    # сбой рекурсивного разбора - не синтаксическая ошибка программы
+    deep = tmp_path / "deep.txt"
+    deep.write_text("program var x : integer; begin " + "if x < 1 then [ " * 400 + "x := 1;"
+                    + " ]" * 400 + " end.", encoding="utf-8")
+    result = check_file(str(deep))
+    assert result["status"] == "crash"
+    assert result["diagnostics"][0]["message"].startswith("RecursionError")
+
+
+def test_dead_worker_is_isolated(tmp_path, monkeypatch):
+    # процесс, который умирает на одном файле, не теряет остальные файлы его пачки
+    paths = write_programs(tmp_path, 6)
+    fatal = tmp_path / "fatal.txt"
+    fatal.write_text("die", encoding="utf-8")
+    paths.insert(2, str(fatal))
+
+    def analyze(source, **kwargs):
+        if source == "die":
+            os._exit(1)
+        return analyze_source(source, **kwargs)
+
+    monkeypatch.setattr(batch, "analyze_source", analyze)
+    results = run_batch(paths, jobs=2, chunk_size=4)
+    statuses = [result["status"] for result in results]
+    assert statuses[2] == "crash"
+    assert "crash" not in statuses[:2] + statuses[3:]
+
+
+def test_cli_report(tmp_path, monkeypatch):
+    paths = write_programs(tmp_path, 3)
+    broken = tmp_path / "broken.txt"
+    broken.write_text("program var x : integer; begin x := ; end.", encoding="utf-8")
+    report = tmp_path / "report.jsonl"
+    status = main([str(tmp_path), "--pattern", "*.txt", "--jobs", "1", "--report", str(report)])
+    lines = [json.loads(line) for line in report.read_text(encoding="utf-8").splitlines()]
+    assert status == 1
+    assert lines[-1]["summary"]["files"] == 4
+    assert {line["path"]: line["status"] for line in lines[:-1]}[str(broken)] == "syntax_error"
+
+
+def test_cache_saves_file_bytes(tmp_path):
+    path = tmp_path / "cyrillic.txt"
+    path.write_text("program var x : integer; { комментарий } begin x := 1; write(x); end.", encoding="utf-8")
+    cache_dir = str(tmp_path / "cache")
+    results = [check_file(str(path), cache_dir=cache_dir) for _ in range(2)]
+    assert [result["cached"] for result in results] == [False, True]
+    assert results[1]["bytes"] == os.path.getsize(path) > len(path.read_text(encoding="utf-8"))
+    assert summarize(results, 0.0)["cache"]["bytes_saved"] == os.path.getsize(path)
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from bytelexer import tokenize_bytes, tokenize_file
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from pipeline import analyze_file
+
+PARTS = ['begin', 'end', 'x', 'abc', 'ж', 'é', 'xé', '²', '٣', '€', ' ', '\n', "'ж'", '{ком}', '!', '!=',
+         '12', '0x1F', '101b', '7h', '1.5e', '3e+', '.', ';', ':=', '=', '<', 'ab_c', '\t', 'Ω1']
+
+
+def tokens(stream):
+    return [(token, stream.position(i)) for i, token in enumerate(stream)]
+
+
+def test_matches_regex_lexer_on_generated_program():
+    text = generate_program(variables=20, statements=300, depth=3, comment_density=0.3, seed=1)
+    expected = LexicalAnalyzer(text, engine="regex").tokenize_stream()
+    assert tokens(tokenize_bytes(text.encode())) == tokens(expected)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_regex_lexer_on_mixed_scripts(seed):
+    rnd = random.Random(seed)
+    for _ in range(300):
+        # пробел в конце: без него число в конце текста роняет LexicalAnalyzer
+        text = ''.join(rnd.choice(PARTS) for _ in range(rnd.randint(0, 30))) + ' '
+        expected = tokens(LexicalAnalyzer(text, engine="regex").tokenize_stream())
+        data = text.encode()
+        assert tokens(tokenize_bytes(data)) == expected, text
+        assert tokens(tokenize_bytes(memoryview(data))) == expected, text
+
+
+@pytest.mark.parametrize("text, last", [
+    ("x := 12", ('NUMBER', '12')),
+    ("x := 101b", ('NUMBER', '101bb')),
+    ("x := 0x1F", ('NUMBER', '0x1F')),
+    ("x := 2.5", ('NUMBER', '2.5')),
+])
+def test_number_at_end_of_input(tmp_path, text, last):
+    path = tmp_path / "prog.txt"
+    path.write_bytes(text.encode())
+    stream = tokenize_file(str(path))
+    assert list(stream)[-1] == last
+
+
+def test_analyze_file_reports_truncated_program(tmp_path):
+    path = tmp_path / "prog.txt"
+    path.write_bytes("program var x : integer; begin x := 12".encode())
+    result = analyze_file(str(path))
+    assert result["status"] == "syntax_error"
@@ -0,0 +1,81 @@
+import os
+
+from cache import AnalysisCache
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from pipeline import analyze_source
+
+SOURCES = [
+    generate_program(variables=5, statements=40, depth=2, seed=1),
+    "program var x : integer; begin x := ; end.",
+    "program var x : integer; begin y := 1; end.",
+]
+
+
+def test_hit_returns_same_result(tmp_path):
+    cache = AnalysisCache(str(tmp_path))
+    for source in SOURCES:
+        first = analyze_source(source, cache=cache)
+        second = analyze_source(source, cache=cache)
+        assert first.pop("cached") is False and second.pop("cached") is True
+        assert second == first == analyze_source(source)
+    assert cache.stats()["hits"] == len(SOURCES)
+    assert cache.stats()["memory_hits"] == len(SOURCES)
+
+
+def test_disk_entry_survives_new_process(tmp_path):
+    source = SOURCES[0]
+    cache = AnalysisCache(str(tmp_path))
+    expected = analyze_source(source, cache=cache)
+    # новый экземпляр - пустой LRU, запись читается с диска
+    fresh = AnalysisCache(str(tmp_path))
+    entry = fresh.get(source)
+    assert entry is not None and fresh.memory_hits == 0
+    assert entry.status == expected["status"]
+    tokens = LexicalAnalyzer(source, engine="regex").tokenize_stream()
+    assert list(entry.tokens(source)) == list(tokens)
+
+
+def test_key_depends_on_version_and_engine(tmp_path):
+    cache = AnalysisCache(str(tmp_path))
+    source = SOURCES[0]
+    assert cache.key(source, "regex") != cache.key(source, "classic")
+    assert cache.key(source) != AnalysisCache(str(tmp_path), version="old").key(source)
+    analyze_source(source, cache=cache)
+    assert AnalysisCache(str(tmp_path), version="old").get(source) is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = AnalysisCache(str(tmp_path))
+    source = SOURCES[0]
+    analyze_source(source, cache=cache)
+    path = cache.path(cache.key(source))
+    with open(path, "r+b") as f:
+        f.truncate(10)
+    fresh = AnalysisCache(str(tmp_path))
+    assert fresh.get(source) is None
+    assert not os.path.exists(path)
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    sources = [generate_program(variables=5, statements=40, depth=2, seed=seed) for seed in range(20)]
+    probe = AnalysisCache(str(tmp_path / "probe"))
+    analyze_source(sources[0], cache=probe)
+    size = probe.scan_size()
+    cache = AnalysisCache(str(tmp_path / "cache"), max_bytes=size * 5)
+    for i, source in enumerate(sources):
+        analyze_source(source, cache=cache)
+        os.utime(cache.path(cache.key(source)), (i, i))
+    assert cache.evictions > 0
+    assert cache.scan_size() <= size * 5
+    # последняя запись на месте, первая вытеснена
+    assert os.path.exists(cache.path(cache.key(sources[-1])))
+    assert not os.path.exists(cache.path(cache.key(sources[0])))
+
+
+def test_bytes_saved_counts_utf8_bytes(tmp_path):
+    cache = AnalysisCache(str(tmp_path))
+    source = "program var x : integer; { кириллица } begin x := 1; end."
+    analyze_source(source, cache=cache)
+    analyze_source(source, cache=cache)
+    assert cache.stats()["bytes_saved"] == len(source.encode("utf-8"))
@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+from dataflow import analyze_dataflow
+from pipeline import analyze_source
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+
+NAMES = ['a', 'b', 'c', 'd', 'e']
+
+
+def expression(rnd, depth=0):
+    if depth > 2 or rnd.random() < 0.4:
+        return Var(rnd.choice(NAMES + ['u'])) if rnd.random() < 0.6 else Num('1')
+    return BinOp(rnd.choice('+-*/'), expression(rnd, depth + 1), expression(rnd, depth + 1))
+
+
+def body(rnd, depth=0):
+    statements = []
+    for _ in range(rnd.randint(0, 4)):
+        r = rnd.random()
+        condition = Compare(rnd.choice(['<', '>']), expression(rnd, 1), expression(rnd, 1))
+        if depth < 4 and r < 0.25:
+            statements.append(If(condition, body(rnd, depth + 1), body(rnd, depth + 1) if rnd.random() < 0.6 else []))
+        elif depth < 4 and r < 0.4:
+            statements.append(While(condition, body(rnd, depth + 1)))
+        elif r < 0.55:
+            statements.append(Write(expression(rnd)))
+        else:
+            statements.append(Assign(rnd.choice(NAMES + ['u']), expression(rnd)))
+    return statements
+
+
+# Эталон на множествах имён: рекурсия по дереву, цикл живости - повторение тела до
+# неподвижной точки
+
+def names(node):
+    if isinstance(node, Var):
+        return {node.name} & set(NAMES)
+    if isinstance(node, (BinOp, Compare)):
+        return names(node.left) | names(node.right)
+    return set()
+
+
+def unassigned(statements, assigned, found):
+    for node in statements:
+        if isinstance(node, (Assign, Write)):
+            found |= names(node.value) - assigned
+            if isinstance(node, Assign) and node.name in NAMES:
+                assigned = assigned | {node.name}
+        elif isinstance(node, If):
+            found |= names(node.condition) - assigned
+            assigned = unassigned(node.then_body, assigned, found) & unassigned(node.else_body, assigned, found)
+        else:
+            found |= names(node.condition) - assigned
+            unassigned(node.body, assigned, found)
+    return assigned
+
+
+def live(statements, out, dead):
+    for node in reversed(statements):
+        if isinstance(node, Assign):
+            if node.name in NAMES and node.name not in out and dead is not None:
+                dead.append(node)
+            out = (out - {node.name}) | names(node.value)
+        elif isinstance(node, Write):
+            out = out | names(node.value)
+        elif isinstance(node, If):
+            out = names(node.condition) | live(node.then_body, out, dead) | live(node.else_body, out, dead)
+        else:
+            header = out | names(node.condition)
+            while True:
+                following = out | names(node.condition) | live(node.body, header, None)
+                if following == header:
+                    break
+                header = following
+            live(node.body, header, dead)
+            out = header
+    return out
+
+
+def read_anywhere(statements):
+    result = set()
+    for node in statements:
+        if isinstance(node, (Assign, Write)):
+            result |= names(node.value)
+        elif isinstance(node, If):
+            result |= names(node.condition) | read_anywhere(node.then_body) | read_anywhere(node.else_body)
+        else:
+            result |= names(node.condition) | read_anywhere(node.body)
+    return result
+
+
+def quoted(warnings, marker):
+    return [warning.split("'")[1] for warning in warnings if marker in warning]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_reference(seed):
+    rnd = random.Random(seed)
+    for _ in range(500):
+        program = Program({name: 'integer' for name in NAMES}, body(rnd))
+        warnings = analyze_dataflow(program)
+        found, dead = set(), []
+        unassigned(program.body, set(), found)
+        live(program.body, set(), dead)
+        reads = read_anywhere(program.body)
+        before = quoted(warnings, "до присваивания")
+        assert sorted(before) == sorted(found)
+        # о переменной, которая нигде не читается, - только "объявлена, но не используется"
+        assert sorted(quoted(warnings, "присвоенное")) == sorted(node.name for node in dead if node.name in reads)
+        assert quoted(warnings, "объявлена") == [name for name in NAMES if name not in reads]
+
+
+def test_known_warnings():
+    # x читается до присваивания на пути без then, y перезаписывается, z не читается
+    program = Program({'x': 'integer', 'y': 'integer', 'z': 'integer'}, [
+        If(Compare('<', Num('1'), Num('2')), [Assign('x', Num('1'))], []),
+        Assign('y', Var('x')),
+        Assign('y', Num('2')),
+        While(Compare('<', Var('y'), Num('3')), [Assign('y', BinOp('+', Var('y'), Num('1')))]),
+        Assign('z', Var('y')),
+    ])
+    assert analyze_dataflow(program) == [
+        "Предупреждение: Переменная 'x' может использоваться до присваивания.",
+        "Предупреждение: Значение, присвоенное переменной 'y', не используется.",
+        "Предупреждение: Переменная 'z' объявлена, но не используется.",
+    ]
+
+
+def test_deep_loop_nesting():
+    # вложенность не упирается в стек вызовов; чтение в самом внутреннем цикле
+    # делает живыми присваивания на всех уровнях
+    depth = 5000
+    statements = [Write(Var('x'))]
+    for _ in range(depth):
+        statements = [Assign('x', BinOp('+', Var('x'), Num('1'))), While(Compare('<', Var('x'), Num('9')), statements)]
+    program = Program({'x': 'integer'}, [Assign('x', Num('0')), *statements])
+    assert analyze_dataflow(program) == []
+
+
+def test_runs_with_semantic_errors():
+    source = "program var x, y : integer; begin x := z; write (x); end."
+    result = analyze_source(source)
+    assert result["status"] == "semantic_error"
+    assert [(record["phase"], record["message"]) for record in result["diagnostics"]] == [
+        ("semantic", "Ошибка: Переменная 'z' не объявлена."),
+        ("dataflow", "Предупреждение: Переменная 'y' объявлена, но не используется."),
+    ]
@@ -0,0 +1,58 @@
+import importlib.util
+import os
+
+import pytest
+
+from generator import NUMBER_FORMS, ProgramGenerator, generate_program, parse_mix
+from lexer import LexicalAnalyzer
+from pipeline import analyze_source
+from semantic import SemanticAnalyzer, generate_symbol_table_and_operations
+
+
+def load_bench_suite():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_suite.py")
+    spec = importlib.util.spec_from_file_location("bench_suite", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("mix", [None, {form: 1 for form in NUMBER_FORMS}, {"real": 1}, {"hex": 2, "suffix": 1}])
+@pytest.mark.parametrize("depth", [0, 3])
+def test_programs_are_valid(mix, depth):
+    for seed in range(5):
+        generator = ProgramGenerator(variables=12, statements=150, depth=depth, comment_density=0.3,
+                                     number_mix=mix, seed=seed)
+        text = generator.generate()
+        result = analyze_source(text)
+        # предупреждения анализа потоков данных допустимы: программа их не избегает
+        assert result["status"] == "ok"
+        assert [record for record in result["diagnostics"] if record["phase"] != "dataflow"] == []
+        assert generator.generated == 150
+        assert generator.max_depth <= depth
+        if mix is None or set(mix) <= {"decimal", "real"}:
+            # и прежний двухпроходный анализ (он понимает только десятичные числа)
+            symbol_table, operations = generate_symbol_table_and_operations(LexicalAnalyzer(text).tokenize())
+            assert SemanticAnalyzer(symbol_table).analyze(operations) == []
+
+
+def test_seed_is_deterministic():
+    assert generate_program(seed=7) == generate_program(seed=7)
+    assert generate_program(seed=7) != generate_program(seed=8)
+
+
+def test_number_mix():
+    assert parse_mix("decimal=3, hex=1,real") == {"decimal": 3.0, "hex": 1.0, "real": 1.0}
+    with pytest.raises(ValueError):
+        ProgramGenerator(number_mix={"roman": 1})
+    with pytest.raises(ValueError):
+        ProgramGenerator(number_mix={"decimal": 0})
+
+
+def test_suite_reports_regressions():
+    compare = load_bench_suite().compare
+    baseline = {"results": {"small": {"lexer": {"throughput": 1000.0, "unit": "токенов/с", "peak_bytes": 100}}}}
+    same = {"results": {"small": {"lexer": {"throughput": 900.0, "unit": "токенов/с", "peak_bytes": 110}}}}
+    slower = {"results": {"small": {"lexer": {"throughput": 700.0, "unit": "токенов/с", "peak_bytes": 200}}}}
+    assert compare(same, baseline, 0.2) == []
+    assert len(compare(slower, baseline, 0.2)) == 2
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from generator import generate_program
+from incremental import IncrementalSession
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+from semantic import analyze_single_pass
+
+SOURCES = [
+    "program var x, y : integer; begin x := 5; y := 10; if x < y then [ write (x); ] else [ write (y); ] end.",
+    "program var i, s, n : integer; begin i := 0; s := 0; n := 10;\n"
+    " while i < n do [ s := s + i * 2 - 1; i := i + 1; if i > 5 then [ s := s / 2; ] else [ write(s); ] ]\n"
+    " write(s); ! x := 0x1F; {c} end.",
+]
+PIECES = ['x', ' ', '1', ';', ':=', ' y := 2; ', '[', ']', 'begin', 'end', '{', '}', "'",
+          'if x < y then [ write(x); ]', '\n', '!', 'e', '0b', '.', 'while', 'do']
+
+
+def full(text):
+    # токены с позициями, статус и дерево полного разбора заново
+    spans = []
+    lex_error = False
+    try:
+        spans.extend(LexicalAnalyzer(text, engine="regex").iter_spans())
+    except Exception:
+        lex_error = True
+    try:
+        parser = SyntaxAnalyzer([token for token, _, _ in spans])
+        status, ast = parser.parse(), parser.ast
+    except Exception as e:
+        status, ast = str(e), None
+    return [(token, start, end) for token, start, end in spans], lex_error, status, ast
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_edits_match_full_analysis(seed):
+    rnd = random.Random(seed)
+    for _ in range(40):
+        text = rnd.choice(SOURCES)
+        session = IncrementalSession(text)
+        for _ in range(20):
+            offset = rnd.randint(0, len(text))
+            deleted = rnd.randint(0, min(3, len(text) - offset)) if rnd.random() < 0.5 else 0
+            inserted = ''.join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 2)))
+            text = text[:offset] + inserted + text[offset + deleted:]
+            session.edit(offset, deleted, inserted)
+            tokens, lex_error, status, ast = full(text)
+            got = [(session.tokens.token(i),) + session.tokens.span(i) for i in range(len(session.tokens))]
+            assert got == tokens
+            assert (session.lex_error is not None) == lex_error
+            assert session.status == status
+            if status == "OK":
+                assert session.ast == ast
+
+
+def test_local_edit_reparses_one_statement():
+    text = generate_program(variables=20, statements=2000, depth=1, seed=1)
+    session = IncrementalSession(text)
+    assert session.status == "OK"
+    offset = text.index(":=", len(text) // 2)
+    stats = session.edit(offset, 2, ":=")
+    assert stats["relexed"] <= 2
+    # заново разбираются задетый оператор и его соседи, а не вся программа
+    assert 0 < stats["reparsed"] < len(session.tokens) // 50
+    parser = SyntaxAnalyzer(LexicalAnalyzer(session.text, engine="regex").tokenize())
+    parser.parse()
+    assert session.ast == parser.ast
+
+
+def test_semantic_after_edit():
+    session = IncrementalSession(SOURCES[0])
+    offset = session.text.index("write (x)")
+    session.edit(offset + len("write ("), 1, "z")
+    _, _, errors = session.semantic()
+    assert errors == analyze_single_pass(LexicalAnalyzer(session.text, engine="regex").tokenize_stream())[2]
+    assert "Ошибка: Переменная 'z' не объявлена." in errors
+
+
+def test_edit_out_of_bounds():
+    session = IncrementalSession(SOURCES[0])
+    with pytest.raises(ValueError):
+        session.edit(len(SOURCES[0]) + 1, 0, "x")
@@ -0,0 +1,62 @@
+import os
+import random
+
+import pytest
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from ll1 import TableParser
+from parserr import SyntaxAnalyzer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIECES = ['x', ' ', '1', ';', ':=', ' y := 2; ', '[', ']', 'begin', 'end', '{', '}', "'",
+          'if x < y then [ write(x); ]', '\n', '!', 'e', '0b', '.', 'while', 'do', 'then', 'else',
+          '(', ')', '5 x', 'var', 'real', ' else x := 1; ', ' while x < 2 do ', '!=', '=']
+
+
+def sources():
+    # примеры из main.py и сгенерированные программы
+    with open(os.path.join(ROOT, "main.py"), encoding="utf-8") as f:
+        result = f.read().split("'''")[1::2]
+    result += [generate_program(5, 30, 3, 0.2, None, seed) for seed in range(10)]
+    result.append('program var i, s, n : integer; begin i := 0; while i < n do [ s := s + i * 2 - 1; '
+                  'i := i + 1; if i > 5 then [ s := s / 2; ] else [ write(s); ] ] '
+                  'while i < 3 do i := i + 1; write(i); end.')
+    return result
+
+
+def parse(parser_class, tokens):
+    try:
+        parser = parser_class(tokens)
+        parser.parse()
+    except SyntaxError:
+        return None, None
+    return parser.ast, parser.declarations
+
+
+def check(text):
+    tokens = LexicalAnalyzer(text, engine="regex").tokenize()
+    expected = parse(SyntaxAnalyzer, tokens)
+    assert parse(TableParser, tokens) == expected
+    return expected[0] is not None
+
+
+def test_same_tree_on_valid_programs():
+    for text in sources():
+        assert check(text)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_same_result_on_mutated_programs(seed):
+    rnd = random.Random(seed)
+    texts = sources()
+    for _ in range(500):
+        text = rnd.choice(texts)
+        for _ in range(rnd.randint(1, 3)):
+            offset = rnd.randint(0, len(text))
+            text = text[:offset] + rnd.choice(PIECES) + text[offset + rnd.randint(0, 3):]
+        try:
+            LexicalAnalyzer(text, engine="regex").tokenize()
+        except TypeError:
+            continue    # число в самом конце текста
+        check(text)
@@ -0,0 +1,141 @@
+import io
+import random
+import time
+
+import pytest
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from optimizer import Optimizer, optimize
+from parserr import SyntaxAnalyzer
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from vm import evaluate, run_program
+
+NAMES = ['a', 'b', 'c', 'd']
+
+
+class Trees:
+    # Случайные программы; циклы со счётчиком, чтобы выполнение завершалось
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+        self.loops = 0
+
+    def number(self):
+        return Num(self.rnd.choice(['0', '1', '2', '3', '2.5', '0.0', '10', '0x1F', '101bb', '7hh']))
+
+    def expression(self, depth=0):
+        if depth > 2 or self.rnd.random() < 0.4:
+            return Var(self.rnd.choice(NAMES + ['u'])) if self.rnd.random() < 0.5 else self.number()
+        return BinOp(self.rnd.choice('+-*/'), self.expression(depth + 1), self.expression(depth + 1))
+
+    def condition(self):
+        return Compare(self.rnd.choice(['<', '>', '<=', '>=', '=']), self.expression(1), self.expression(1))
+
+    def body(self, depth=0):
+        result = []
+        for _ in range(self.rnd.randint(0, 4)):
+            r = self.rnd.random()
+            if depth < 3 and r < 0.2:
+                else_body = self.body(depth + 1) if self.rnd.random() < 0.6 else []
+                result.append(If(self.condition(), self.body(depth + 1), else_body))
+            elif depth < 2 and r < 0.3:
+                self.loops += 1
+                counter = f"i{self.loops}"
+                body = self.body(depth + 1)
+                body.append(Assign(counter, BinOp('+', Var(counter), Num('1'))))
+                result.append(Assign(counter, Num('0')))
+                result.append(While(Compare('<', Var(counter), Num(str(self.rnd.randint(0, 3)))), body))
+            elif r < 0.5:
+                result.append(Write(self.expression()))
+            else:
+                result.append(Assign(self.rnd.choice(NAMES), self.expression()))
+        return result
+
+    def program(self):
+        self.loops = 0
+        return Program({name: 'integer' for name in NAMES}, self.body())
+
+
+def output(program, run):
+    # напечатанное и исключение, если выполнение прервалось
+    out = io.StringIO()
+    try:
+        run(program, out)
+    except Exception as e:
+        out.write(type(e).__name__)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_same_output_on_random_trees(seed):
+    trees = Trees(seed)
+    for _ in range(500):
+        program = trees.program()
+        optimized = Optimizer().optimize(program)
+        assert output(optimized, evaluate) == output(program, evaluate)
+        assert output(optimized, run_program) == output(program, run_program)
+
+
+def test_same_output_on_generated_programs():
+    for seed in range(3):
+        source = generate_program(statements=1000, depth=4, seed=seed,
+                                  number_mix={"decimal": 3, "hex": 1, "real": 1, "suffix": 1})
+        parser = SyntaxAnalyzer(LexicalAnalyzer(source, engine="regex").tokenize())
+        parser.parse()
+        optimizer = Optimizer()
+        optimized = optimizer.optimize(parser.ast)
+        expected = output(parser.ast, evaluate)
+        assert output(optimized, evaluate) == expected
+        assert output(optimized, run_program) == expected
+        assert optimizer.after <= optimizer.before
+
+
+def parse(text):
+    parser = SyntaxAnalyzer(LexicalAnalyzer(text).tokenize())
+    parser.parse()
+    return parser.ast
+
+
+def test_known_branches_and_dead_code_are_reported():
+    program = parse('program var x, y : integer; begin x := 2 * 3; y := 5; y := 1; '
+                    'if x > 1 then [ write(x); ] else [ write(y); ] '
+                    'while x < 0 do x := x + 1; write(y); end.')
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(program)
+    assert optimized == Program({'x': 'integer', 'y': 'integer'}, [Write(Num('6', 6))])
+    assert optimizer.report == [
+        ('branch', 'if 6 > 1: условие всегда истинно, удалена ветка else, операторов: 1'),
+        ('loop', 'while x < 0: условие ложно при входе, удалён цикл, операторов: 2'),
+        ('assignment', 'y := 1: значение не используется'),
+        ('assignment', 'y := 5: значение не используется'),
+        ('assignment', 'x := 6: значение не используется'),
+    ]
+    assert optimizer.stats == {"folded": 1, "propagated": 2, "branches": 1, "loops": 1, "assignments": 3}
+    assert (optimizer.before, optimizer.after) == (9, 1)
+
+
+def test_unknown_values_are_kept():
+    # после цикла значение x неизвестно: ни ветку, ни цикл удалять нельзя
+    program = parse('program var x : integer; begin while x < 3 do [ x := x + 1; ] '
+                    'if x > 2 then [ write(x); ] end.')
+    optimized, report = optimize(program)
+    assert optimized == program
+    assert report == []
+
+
+def test_division_by_zero_is_not_folded():
+    program = parse('program var x : integer; begin write(1 / 0); end.')
+    optimized, _ = optimize(program)
+    assert optimized == program
+    assert output(optimized, evaluate) == "ZeroDivisionError"
+
+
+def test_deeply_nested_loops_take_linear_time():
+    # раньше живость в цикле считалась повторными обходами тела: вдвое дольше на уровень
+    depth = 40
+    program = parse("program var x, y : integer; begin " + "while x < 1 do [ y := y + 1; " * depth
+                    + "x := x + 1;" + " ]" * depth + " write(y); end.")
+    start = time.perf_counter()
+    optimized = Optimizer().optimize(program)
+    assert time.perf_counter() - start < 1.0
+    assert output(optimized, evaluate) == output(program, evaluate)
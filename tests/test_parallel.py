@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from parallel import split_points, tokenize_parallel
+
+PIECES = ['x', 'begin', 'var', ';', ';', ' ', '\n', '{c;}', '{ ; ', "'s;'", "'", '!', '!=', '12', '1.5e',
+          '0x1F', '101b', 'é', 'ж1', ':=', 'end', '}', '3', 'a_b', '0b', '1e+']
+
+
+class Inline:
+    # исполнитель без процессов: куски разбираются по очереди в этом процессе
+    def map(self, function, *arguments):
+        return map(function, *arguments)
+
+
+def lex(function):
+    try:
+        return function()
+    except TypeError:
+        return "TypeError"      # число в самом конце текста
+
+
+def same_stream(expected, actual):
+    if isinstance(expected, str) or isinstance(actual, str):
+        return expected == actual
+    expected_interner, expected_ids = expected.symbols()
+    actual_interner, actual_ids = actual.symbols()
+    return (list(expected.kinds) == list(actual.kinds)
+            and list(expected.starts) == list(actual.starts)
+            and list(expected.ends) == list(actual.ends)
+            and list(expected) == list(actual)
+            and list(expected_ids) == list(actual_ids)
+            and expected_interner.names == actual_interner.names)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_sequential_lexer(seed):
+    rnd = random.Random(seed)
+    for _ in range(400):
+        text = ''.join(rnd.choice(PIECES) + rnd.choice(['', ' ', ';']) for _ in range(rnd.randint(0, 60)))
+        for engine in ('regex', 'classic'):
+            expected = lex(lambda: LexicalAnalyzer(text, engine=engine).tokenize_stream())
+            actual = lex(lambda: tokenize_parallel(text, jobs=rnd.randint(1, 4), engine=engine, min_chunk=1,
+                                                   executor=Inline(), chunks_per_job=rnd.randint(1, 5)))
+            assert same_stream(expected, actual), text
+
+
+def test_split_points_follow_semicolons_outside_comments_and_strings():
+    text = "a; {b; c} 'd; e' f; g; h"
+    inside = set(range(text.index('{') + 1, text.index('}') + 1)) | set(range(text.index("'") + 1, text.rindex("'") + 1))
+    for parts in range(1, 10):
+        points = split_points(text, parts)
+        assert points[0] == 0 and points[-1] == len(text)
+        for point in points[1:-1]:
+            assert text[point - 1] == ';' and point not in inside
+
+
+def test_bang_after_begin_in_another_chunk():
+    # '!' до первого 'begin' - KEYWORD, после - DELIMITER, даже если 'begin' в другом куске
+    text = "program ! ; var x : integer; begin ; x := 1; ! ; write(x); end."
+    expected = LexicalAnalyzer(text).tokenize_stream()
+    actual = tokenize_parallel(text, jobs=4, min_chunk=1, executor=Inline())
+    assert same_stream(expected, actual)
+
+
+def test_process_pool():
+    text = generate_program(statements=500, depth=3, comment_density=0.2, seed=0)
+    expected = LexicalAnalyzer(text).tokenize_stream()
+    assert same_stream(expected, tokenize_parallel(text, jobs=2, min_chunk=1))
@@ -0,0 +1,44 @@
+import pstats
+
+from generator import generate_program
+from pipeline import analyze_source
+from profiling import Profiler
+
+SOURCE = generate_program(variables=10, statements=200, depth=3, seed=2)
+
+
+def test_phases_rules_and_tokens():
+    profiler = Profiler()
+    result = analyze_source(SOURCE, profiler=profiler)
+    assert result["status"] in ("ok", "semantic_error")
+    assert {"lexer", "parser", "semantic"} <= set(profiler.phases)
+    record = profiler.phases["parser"]
+    assert record["calls"] == 1 and record["wall"] > 0
+    assert "net_blocks" in record and "peak_bytes" not in record
+    rules = profiler.rules()
+    assert rules["SyntaxAnalyzer.program"]["calls"] == 1
+    assert rules["SyntaxAnalyzer.factor"]["calls"] > 0
+    assert sum(profiler.tokens.values()) == result["tokens"]
+
+
+def test_stats_file_reads_with_pstats(tmp_path):
+    profiler = Profiler()
+    analyze_source(SOURCE, profiler=profiler)
+    path = tmp_path / "profile.stats"
+    profiler.dump_stats(str(path))
+    stats = pstats.Stats(str(path))
+    assert any(name == "SyntaxAnalyzer.statements" for _, _, name in stats.stats)
+
+
+def test_peak_memory_counts_freed_allocations():
+    profiler = Profiler(memory=True)
+    try:
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                data = bytearray(4 << 20)
+                del data
+    finally:
+        profiler.close()
+    # память освобождена, но пик фазы её видит - и у внешней фазы тоже
+    assert profiler.phases["inner"]["peak_bytes"] >= 4 << 20
+    assert profiler.phases["outer"]["peak_bytes"] >= 4 << 20
@@ -0,0 +1,118 @@
+import io
+import random
+
+import pytest
+
+import pycodegen
+from pycodegen import CodeCache, PythonProgram, compile_program, load_program, parse_program
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from vm import evaluate, run_program
+
+NAMES = ['a', 'b', 'c', 'd', 'if', 'print']
+NUMBERS = ['0', '1', '2', '2.5', '0.0', '10', '1e3', '1e308', '-4', '-0.0', 'inf']
+
+
+def number(rnd):
+    text = rnd.choice(NUMBERS)
+    return Num(text, float(text) if not text.lstrip('-').isdigit() else int(text))
+
+
+def expression(rnd, depth=0):
+    if depth > 3 or rnd.random() < 0.35:
+        return Var(rnd.choice(NAMES + ['u'])) if rnd.random() < 0.6 else number(rnd)
+    return BinOp(rnd.choice('+-*/'), expression(rnd, depth + 1), expression(rnd, depth + 1))
+
+
+def body(rnd, loops, depth=0):
+    statements = []
+    for _ in range(rnd.randint(0, 4)):
+        r = rnd.random()
+        if depth < 3 and r < 0.25:
+            condition = Compare(rnd.choice(['<', '>', '<=', '>=', '=']), expression(rnd, 1), expression(rnd, 1))
+            statements.append(If(condition, body(rnd, loops, depth + 1), body(rnd, loops, depth + 1)))
+        elif depth < 2 and r < 0.35:
+            # счётчик своего цикла, чтобы программа завершалась
+            loops.append(f"i{len(loops)}")
+            counter = loops[-1]
+            inner = body(rnd, loops, depth + 1)
+            inner.append(Assign(counter, BinOp('+', Var(counter), Num('1', 1))))
+            statements.append(Assign(counter, Num('0', 0)))
+            statements.append(While(Compare('<', Var(counter), Num('3', rnd.randint(0, 3))), inner))
+        elif r < 0.5:
+            statements.append(Write(expression(rnd)))
+        else:
+            statements.append(Assign(rnd.choice(NAMES + ['u']), expression(rnd)))
+    return statements
+
+
+def outcome(run):
+    out = io.StringIO()
+    try:
+        variables = run(out)
+    except ZeroDivisionError:
+        return 'ZeroDivisionError', out.getvalue(), None
+    return 'ok', out.getvalue(), {name: repr(value) for name, value in variables.items()}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_reference_interpreter(seed):
+    rnd = random.Random(seed)
+    for _ in range(150):
+        program = Program({name: 'integer' for name in NAMES[:4]}, body(rnd, []))
+        expected = outcome(lambda out: evaluate(program, out))
+        compiled = PythonProgram(compile_program(program))
+        got = outcome(compiled.run)
+        assert got[:2] == expected[:2]
+        if expected[2] is not None:
+            # Python-код возвращает и объявленные, но не тронутые переменные
+            assert {name: got[2][name] for name in expected[2]} == expected[2]
+
+
+def test_nfkc_equal_names_are_distinct():
+    # 'ﬁ' и 'fi' - разные переменные, хотя Python считает такие идентификаторы равными
+    source = "program var ﬁ, fi : real; begin ﬁ := 1; fi := 2; write (ﬁ); end."
+    program = parse_program(source)
+    out, expected = io.StringIO(), io.StringIO()
+    variables = PythonProgram(compile_program(program)).run(out)
+    run_program(program, expected)
+    assert out.getvalue() == expected.getvalue() == "1\n"
+    assert variables == {'ﬁ': 1, 'fi': 2}
+
+
+def test_long_expression_is_split(monkeypatch):
+    monkeypatch.setattr(pycodegen, "EXPRESSION_DEPTH", 10)
+    value = Num('1', 1)
+    for _ in range(3000):
+        value = BinOp('+', value, Num('1', 1))
+    program = Program({}, [Write(value)])
+    out = io.StringIO()
+    PythonProgram(compile_program(program)).run(out)
+    assert out.getvalue() == "3001\n"
+
+
+def test_too_deep_nesting_is_rejected():
+    program = Program({'x': 'integer'}, [])
+    body = program.body
+    for _ in range(pycodegen.MAX_LOOPS + 1):
+        loop = While(Compare('<', Var('x'), Num('0', 0)), [])
+        body.append(loop)
+        body = loop.body
+    with pytest.raises(ValueError):
+        compile_program(program)
+
+
+def test_cache_hit_miss_and_corrupt_entry(tmp_path):
+    source = "program var x : integer; begin x := 2; write (x * 3); end."
+    cache = CodeCache(str(tmp_path))
+    timings = {}
+    out = io.StringIO()
+    load_program(source, cache, timings).run(out)
+    assert not timings["cached"] and cache.misses == 1
+    load_program(source, cache, timings).run(out)
+    assert timings["cached"] and cache.hits == 1
+    assert out.getvalue() == "6\n6\n"
+    # испорченная запись - промах, а не исключение
+    with open(cache.path(cache.key(source)), "wb") as f:
+        f.write(b"garbage")
+    load_program(source, cache, timings)
+    assert not timings["cached"] and cache.misses == 2
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+
+PIECES = ['x', ' ', '1', ';', ':=', ' y := 2; ', '[', ']', 'begin', 'end', '{', '}', "'",
+          'if x < y then [ write(x); ]', '\n', '!', 'e', '0b', '.', 'while', 'do', 'then', 'else', '(', ')', '5 x']
+
+
+def strict(tokens):
+    parser = SyntaxAnalyzer(tokens)
+    try:
+        parser.parse()
+    except SyntaxError as e:
+        return str(e), None
+    return None, parser.ast
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_agrees_with_strict_parser(seed):
+    rnd = random.Random(seed)
+    sources = [generate_program(variables=5, statements=30, depth=3, comment_density=0.2, seed=s) for s in range(10)]
+    for _ in range(400):
+        text = rnd.choice(sources)
+        for _ in range(rnd.randint(1, 4)):
+            offset = rnd.randint(0, len(text))
+            text = text[:offset] + rnd.choice(PIECES) + text[offset + rnd.randint(0, 3):]
+        try:
+            tokens = LexicalAnalyzer(text, engine="regex").tokenize()
+        except TypeError:
+            continue    # число в самом конце текста
+        error, ast = strict(tokens)
+        parser = SyntaxAnalyzer(tokens, recover=True)
+        status = parser.parse()
+        if error is None:
+            assert status == "OK" and parser.ast == ast
+        else:
+            assert status == "ERROR" and parser.errors
+
+
+def test_reports_every_error_and_keeps_good_statements():
+    text = '''program var x, y : integer;
+begin
+  x := ;
+  y := 2;
+  write (x y);
+  if x < then [ y := 1; ]
+  x := 3;
+end.'''
+    parser = SyntaxAnalyzer(LexicalAnalyzer(text).tokenize(), recover=True)
+    assert parser.parse() == "ERROR"
+    assert [message for index, message in parser.errors] == [
+        "Неожиданный токен в факторе: ('DELIMITER', ';')",
+        "Ожидалась закрывающая скобка ')' после аргумента write.",
+        "Неожиданный токен в факторе: ('KEYWORD', 'then')",
+    ]
+    assert [statement.name for statement in parser.ast.body] == ['y', 'x']
+
+
+@pytest.mark.parametrize("text", ["program begin x := ", "program begin write (", "program begin while x < "])
+def test_end_of_input_is_a_syntax_error(text):
+    with pytest.raises(SyntaxError, match="Неожиданный конец программы."):
+        SyntaxAnalyzer(LexicalAnalyzer(text).tokenize()).parse()
+    parser = SyntaxAnalyzer(LexicalAnalyzer(text).tokenize(), recover=True)
+    parser.parse()
+    assert parser.errors[0][1] == "Неожиданный конец программы."
+
+
+def recover(text):
+    parser = SyntaxAnalyzer(LexicalAnalyzer(text).tokenize(), recover=True)
+    assert parser.parse() == "ERROR"
+    indexes = [index for index, message in parser.errors]
+    assert len(indexes) == len(set(indexes))    # не больше одной ошибки на токен
+    return parser
+
+
+def test_parsing_continues_after_end_without_dot():
+    parser = recover("program begin x := 1; end y := ; z := * ; end.")
+    assert parser.errors == [
+        (7, "Ожидалась точка '.' после 'end'."),
+        (9, "Неожиданный токен в факторе: ('DELIMITER', ';')"),
+        (12, "Неожиданный токен в факторе: ('MUL_OP', '*')"),
+    ]
+    assert [statement.name for statement in parser.ast.body] == ['x']
+
+
+def test_parsing_continues_after_unclosed_block():
+    parser = recover("program begin if x < 1 then [ y := 1; end z := ; w := 2; end.")
+    assert [message for index, message in parser.errors] == [
+        "Ожидался закрывающий ']' после блока операторов.",
+        "Ожидалась точка '.' после 'end'.",
+        "Неожиданный токен в факторе: ('DELIMITER', ';')",
+    ]
+    assert [statement.name for statement in parser.ast.body] == ['w']
+
+
+def test_end_without_dot_at_end_of_input():
+    assert recover("program begin x := 1; end").errors == [(7, "Ожидалась точка '.' после 'end'.")]
+    with pytest.raises(SyntaxError, match="Ожидалась точка"):
+        SyntaxAnalyzer(LexicalAnalyzer("program begin x := 1; end y := 2; end.").tokenize()).parse()
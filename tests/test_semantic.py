@@ -0,0 +1,64 @@
+import pytest
+
+import semantic
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from semantic import SemanticAnalyzer, analyze_single_pass, generate_symbol_table_and_operations
+from symbols import ASSIGNED, USED
+
+
+def stream(text):
+    return LexicalAnalyzer(text, engine="regex").tokenize_stream()
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matches_two_pass_analysis(seed):
+    # без одного объявления, чтобы были ошибки
+    text = generate_program(variables=10, statements=100, depth=3, seed=seed).replace('v1,', '', 1)
+    tokens = stream(text)
+    symbol_table, operations, errors = analyze_single_pass(tokens)
+    legacy_table, legacy_operations = generate_symbol_table_and_operations(tokens)
+    legacy_errors = SemanticAnalyzer(legacy_table).analyze(legacy_operations)
+    assert operations == legacy_operations
+    assert [error for error in errors if "не объявлена" in error] == legacy_errors
+    assert legacy_errors
+
+
+def test_types_per_variable():
+    symbol_table, _, errors = analyze_single_pass(stream(
+        "program var x, y : integer; z : real; begin x := 1; z := 2.5; y := 0.5; end."))
+    assert symbol_table.to_dict() == {
+        'x': {'type': 'integer', 'scope': 'global'},
+        'y': {'type': 'integer', 'scope': 'global'},
+        'z': {'type': 'real', 'scope': 'global'},
+    }
+    assert errors == ["Ошибка: Переменной 'y' типа integer присваивается вещественное число '0.5'."]
+
+
+def test_flags_and_undeclared():
+    symbol_table, operations, errors = analyze_single_pass(stream(
+        "program var a, b, c : integer; begin a := 1; write (a + d); b := 2; end."))
+    assert errors == ["Ошибка: Переменная 'd' не объявлена."]
+    assert symbol_table['a'].flags == ASSIGNED | USED
+    assert symbol_table['b'].flags == ASSIGNED
+    assert symbol_table['c'].flags == 0
+
+
+def test_token_list_and_stream_agree():
+    text = generate_program(variables=10, statements=80, depth=3, seed=9)
+    from_stream = analyze_single_pass(stream(text))
+    from_list = analyze_single_pass(LexicalAnalyzer(text, engine="regex").tokenize())
+    assert from_stream[0].to_dict() == from_list[0].to_dict()
+    assert from_stream[2] == from_list[2]
+
+
+def test_no_shared_state():
+    # результат не зависит от того, что анализировалось до него
+    real = "program var x : real; begin x := 1.5; end."
+    integer = "program var x : integer; begin x := 1.5; end."
+    first = analyze_single_pass(stream(integer))[2]
+    analyze_single_pass(stream(real))
+    assert analyze_single_pass(stream(integer))[2] == first
+    global_type = semantic.global_type
+    analyze_single_pass(stream(real))
+    assert semantic.global_type == global_type
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from generator import generate_program
+from pipeline import analyze_source
+from server import AnalysisServer
+
+SOURCES = [generate_program(variables=5, statements=30, depth=2, seed=seed) for seed in range(6)]
+SOURCES.append("program var x : integer; begin x := ; end.")
+
+
+async def exchange(path, lines):
+    reader, writer = await asyncio.open_unix_connection(path)
+    for line in lines:
+        writer.write(line.encode("utf-8") + b"\n")
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def test_pipelined_requests_match_analyze_source(tmp_path):
+    path = str(tmp_path / "analyzer.sock")
+
+    async def run():
+        server = AnalysisServer(jobs=1)
+        await server.start(unix=path)
+        try:
+            lines = [json.dumps({"id": i, "op": "analyze", "source": source}) for i, source in enumerate(SOURCES)]
+            lines += ['{"id": "h", "op": "health"}', "не json", '{"id": "u", "op": "unknown"}']
+            return await exchange(path, lines)
+        finally:
+            await server.close()
+
+    responses = {response["id"]: response for response in asyncio.run(run())}
+    for i, source in enumerate(SOURCES):
+        assert responses[i]["ok"]
+        assert responses[i]["result"] == analyze_source(source)
+    assert responses["h"]["result"]["status"] == "ok"
+    assert not responses["u"]["ok"]
+    assert not responses[None]["ok"]
+
+
+class BrokenExecutor:
+    # Пул, все задачи которого завершаются BrokenProcessPool, когда тест вызывает fail()
+    def __init__(self):
+        self.pending = []
+        self.shutdowns = 0
+
+    def submit(self, *args, **kwargs):
+        future = Future()
+        self.pending.append(future)
+        return future
+
+    def fail(self):
+        for future in self.pending:
+            future.set_exception(BrokenProcessPool("процесс пула завершился"))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def test_broken_pool_is_replaced_once_for_concurrent_batches():
+    broken = BrokenExecutor()
+
+    async def run():
+        server = AnalysisServer(jobs=1, executor=broken)
+        loop = asyncio.get_running_loop()
+        batches = [[({"source": ""}, loop.create_future())] for _ in range(4)]
+        tasks = [asyncio.create_task(server.run_batch(batch)) for batch in batches]
+        while len(broken.pending) < len(batches):
+            await asyncio.sleep(0)
+        broken.fail()
+        await asyncio.gather(*tasks)
+        replacement = server.executor
+        # новый пул работает
+        future = loop.create_future()
+        await server.run_batch([({"source": SOURCES[0]}, future)])
+        replacement.shutdown()
+        return [batch[0][1].result() for batch in batches], future.result(), replacement
+
+    results, after, replacement = asyncio.run(run())
+    assert all(not ok for ok, _ in results)
+    assert after == (True, analyze_source(SOURCES[0]))
+    assert replacement is not broken
+    assert broken.shutdowns == 1
@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from generator import generate_program
+from lexer import LexicalAnalyzer
+from parserr import SyntaxAnalyzer
+
+TEXT = generate_program(variables=20, statements=300, depth=3, comment_density=0.3, seed=3)
+
+
+@pytest.mark.parametrize("engine", LexicalAnalyzer.ENGINES)
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_chunked_file_matches_whole_text(engine, chunk_size):
+    # токены на границе кусков дочитываются, а не режутся
+    expected = LexicalAnalyzer(TEXT, engine=engine).tokenize()
+    lexer = LexicalAnalyzer(io.StringIO(TEXT), engine=engine, chunk_size=chunk_size)
+    assert list(lexer.iter_tokens()) == expected
+
+
+def test_spans_point_into_text():
+    previous = 0
+    for (type_, value), start, end in LexicalAnalyzer(TEXT, engine="regex").iter_spans():
+        assert previous <= start < end <= len(TEXT)
+        if type_ in ('ID', 'KEYWORD'):
+            assert TEXT[start:end] == value
+        previous = end
+
+
+def test_parser_pulls_from_generator():
+    expected = SyntaxAnalyzer(LexicalAnalyzer(TEXT).tokenize())
+    expected.parse()
+    parser = SyntaxAnalyzer(LexicalAnalyzer(TEXT).iter_tokens())
+    assert parser.parse() == "OK"
+    assert parser.ast == expected.ast
+
+
+def test_parser_stops_pulling_at_error():
+    pulled = []
+
+    def tokens():
+        for token in LexicalAnalyzer("program begin x := ; " + "y := 1; " * 1000 + "end.").iter_tokens():
+            pulled.append(token)
+            yield token
+
+    with pytest.raises(SyntaxError):
+        SyntaxAnalyzer(tokens()).parse()
+    # ошибка на шестом токене: дальше парсер смотрит не больше чем на токен вперёд
+    assert len(pulled) < 10
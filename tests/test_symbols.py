@@ -0,0 +1,105 @@
+import io
+
+from incremental import IncrementalSession
+from lexer import LexicalAnalyzer
+from ll1 import TableParser
+from optimizer import optimize
+from parserr import SyntaxAnalyzer
+from semantic import SemanticAnalyzer, analyze_single_pass, generate_symbol_table_and_operations
+from syntax_tree import Program, Assign, Write, BinOp, Var, Num, bind_symbols
+from vm import run_program
+
+SOURCE = '''program var x, y : integer; z : real;
+begin
+  x := 1;
+  while x < 5 do [ y := y + x; x := x + 1; ]
+  if y > 3 then [ z := y / 2; ] else [ w := 0; ]
+  write (z);
+end.'''
+
+
+def names_and_symbols(body):
+    # (имя, номер) всех Var и Assign в порядке обхода
+    result = []
+    stack = list(reversed(body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (Var, Assign)):
+            result.append((node.name, node.symbol))
+        for field in reversed(node.fields()):
+            value = getattr(node, field)
+            if isinstance(value, list):
+                stack.extend(reversed(value))
+            elif hasattr(value, 'fields'):
+                stack.append(value)
+    return result
+
+
+def test_tree_uses_token_stream_ids():
+    tokens = LexicalAnalyzer(SOURCE, engine="regex").tokenize_stream()
+    symbol_table, _, _ = analyze_single_pass(tokens)
+    for parser in (SyntaxAnalyzer(tokens), TableParser(tokens)):
+        parser.parse()
+        program = parser.ast
+        assert program.symbols is tokens.interner is symbol_table.interner
+        pairs = names_and_symbols(program.body)
+        assert pairs and all(symbol == tokens.interner.lookup(name) for name, symbol in pairs)
+
+
+def test_hand_built_tree_gets_ids():
+    program = Program({'a': 'integer'}, [Assign('a', BinOp('+', Var('b'), Num('2'))), Write(Var('a'))])
+    symbols = bind_symbols(program)
+    assert symbols.names == ['a', 'b']
+    assert names_and_symbols(program.body) == [('a', 0), ('b', 1), ('a', 0)]
+    # номера не участвуют в сравнении: дерево равно такому же без номеров
+    assert program == Program({'a': 'integer'}, [Assign('a', BinOp('+', Var('b'), Num('2'))), Write(Var('a'))])
+    out = io.StringIO()
+    assert run_program(program, out) == {'a': 2, 'b': 0}
+    assert out.getvalue() == "2\n"
+
+
+def test_optimizer_keeps_ids():
+    tokens = LexicalAnalyzer(SOURCE, engine="regex").tokenize_stream()
+    parser = SyntaxAnalyzer(tokens)
+    parser.parse()
+    optimized, _ = optimize(parser.ast)
+    assert optimized.symbols is tokens.interner
+    assert all(symbol == tokens.interner.lookup(name) for name, symbol in names_and_symbols(optimized.body))
+    expected, got = io.StringIO(), io.StringIO()
+    run_program(parser.ast, expected)
+    run_program(optimized, got)
+    assert got.getvalue() == expected.getvalue()
+
+
+def test_incremental_reparse_shares_ids():
+    session = IncrementalSession(SOURCE)
+    offset = SOURCE.index("write (z)")
+    session.edit(offset, 0, "q := x + y; ")
+    program = session.ast
+    pairs = names_and_symbols(program.body)
+    assert ('q', session.symbols.lookup('q')) in pairs
+    assert all(session.symbols.name(symbol) == name for name, symbol in pairs)
+
+
+def test_semantic_analyzer_accepts_plain_dict():
+    # прежний интерфейс: словарь имён и операции с именами
+    symbol_table = {'x': {'type': 'integer', 'scope': 'global'}, 'y': {'type': 'real', 'scope': 'global'}}
+    operations = [('assign', 'x'), ('use', 'y'), ('use', 'w'), ('assign', 'v')]
+    errors = SemanticAnalyzer(symbol_table).analyze(operations)
+    assert errors == ["Ошибка: Переменная 'w' не объявлена.", "Ошибка: Переменная 'v' не объявлена."]
+
+
+def test_legacy_table_form():
+    tokens = LexicalAnalyzer(SOURCE, engine="regex").tokenize_stream()
+    symbol_table, operations = generate_symbol_table_and_operations(tokens)
+    # типы - как у исходной реализации: она приписывает их не тем спискам имён
+    assert symbol_table.to_dict() == {
+        'x': {'type': 'real', 'scope': 'global'},
+        'y': {'type': 'real', 'scope': 'global'},
+        'z': {'type': 'integer', 'scope': 'global'},
+    }
+    # словарь из to_dict и операции по именам дают те же ошибки, что и таблица по номерам
+    by_name = [(kind, symbol_table.name(symbol)) for kind, symbol in operations]
+    errors = SemanticAnalyzer(symbol_table).analyze(operations)
+    assert errors and set(errors) == {"Ошибка: Переменная 'w' не объявлена."}
+    assert SemanticAnalyzer(symbol_table.to_dict()).analyze(by_name) == errors
@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from dataflow import analyze_dataflow
+from lexer import LexicalAnalyzer
+from optimizer import optimize
+from parserr import SyntaxAnalyzer
+from semantic import analyze_single_pass
+from tracing import DEBUG, INFO, FileSink, RingBufferSink, StreamSink, Tracer
+
+SOURCE = "program var x, y : integer; begin x := 1; if x < 2 then [ y := x; ] write (y); end."
+
+
+def run_all(tracer=None):
+    tokens = LexicalAnalyzer(SOURCE, engine="regex").tokenize_stream()
+    parser = SyntaxAnalyzer(tokens, tracer)
+    parser.parse()
+    analyze_single_pass(tokens, tracer)
+    analyze_dataflow(parser.ast, tracer)
+    optimize(parser.ast, tracer)
+
+
+def test_silent_by_default(capsys):
+    run_all()
+    captured = capsys.readouterr()
+    assert captured.out == "" and captured.err == ""
+
+
+def test_only_enabled_phases_are_traced():
+    sink = RingBufferSink(capacity=10000)
+    run_all(Tracer(sink, level=DEBUG, phases=("parser", "semantic")))
+    phases = {phase for phase, level, message in sink.records}
+    assert phases == {"parser", "semantic"}
+    assert any(message.startswith("Таблица символов: ") for message in sink.messages())
+
+
+def test_level_limits_detail():
+    sink = RingBufferSink(capacity=10000)
+    run_all(Tracer(sink, level=INFO))
+    assert sink.records and all(level == INFO for phase, level, message in sink.records)
+
+
+def test_ring_buffer_keeps_last_records():
+    sink = RingBufferSink(capacity=3)
+    tracer = Tracer(sink, level=DEBUG)
+    for i in range(10):
+        tracer.emit("lexer", DEBUG, str(i))
+    assert sink.messages() == ["7", "8", "9"]
+
+
+def test_stream_and_file_sinks(tmp_path):
+    out = io.StringIO()
+    Tracer(StreamSink(out), level=INFO).emit("parser", INFO, "текст")
+    assert out.getvalue() == "[parser:INFO] текст\n"
+    path = tmp_path / "trace.log"
+    tracer = Tracer(FileSink(str(path), with_phase=False), level=INFO)
+    tracer.emit("lexer", INFO, "строка")
+    tracer.close()
+    assert path.read_text(encoding="utf-8") == "строка\n"
+
+
+def test_unknown_phase():
+    with pytest.raises(ValueError):
+        Tracer().set_level("codegen", DEBUG)
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from generator import generate_program
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from vectorized import compile_batch, evaluate_row, parse_program, verify
+
+NAMES = ['a', 'b', 'c', 'd']
+
+
+class Trees:
+    # Случайные программы; циклы со счётчиком, чтобы выполнение завершалось
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.loops = 0
+
+    def number(self):
+        return Num(self.rnd.choice(['0', '1', '2', '3', '2.5', '0.0', '10', '0x1F', '101bb', '7hh', '1e3']))
+
+    def expression(self, depth=0):
+        if depth > 2 or self.rnd.random() < 0.4:
+            return Var(self.rnd.choice(NAMES + ['u'])) if self.rnd.random() < 0.6 else self.number()
+        return BinOp(self.rnd.choice('+-*/'), self.expression(depth + 1), self.expression(depth + 1))
+
+    def condition(self):
+        return Compare(self.rnd.choice(['<', '>', '<=', '>=', '=']), self.expression(1), self.expression(1))
+
+    def body(self, depth=0):
+        result = []
+        for _ in range(self.rnd.randint(0, 4)):
+            r = self.rnd.random()
+            if depth < 3 and r < 0.25:
+                else_body = self.body(depth + 1) if self.rnd.random() < 0.6 else []
+                result.append(If(self.condition(), self.body(depth + 1), else_body))
+            elif depth < 2 and r < 0.35:
+                self.loops += 1
+                counter = f"i{self.loops}"
+                body = self.body(depth + 1)
+                body.append(Assign(counter, BinOp('+', Var(counter), Num('1'))))
+                result.append(Assign(counter, Num('0')))
+                result.append(While(Compare('<', Var(counter), Num(str(self.rnd.randint(0, 3)))), body))
+            elif r < 0.5:
+                result.append(Write(self.expression()))
+            else:
+                result.append(Assign(self.rnd.choice(NAMES + ['u']), self.expression()))
+        return result
+
+    def program(self):
+        self.loops = 0
+        return Program({name: 'integer' for name in NAMES}, self.body())
+
+
+def random_columns(rnd, size):
+    # целые и вещественные столбцы для части переменных, остальные - нули
+    columns = {}
+    for name in rnd.sample(NAMES, rnd.randint(0, 4)):
+        if rnd.random() < 0.5:
+            columns[name] = np.array([rnd.randint(-3, 5) for _ in range(size)])
+        else:
+            columns[name] = np.array([rnd.choice([-1.5, 0.0, 2.0, 3.25, -0.0]) for _ in range(size)])
+    return columns
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_evaluate_row_by_row(seed):
+    rnd = random.Random(seed)
+    trees = Trees(rnd)
+    for _ in range(150):
+        program = trees.program()
+        size = rnd.randint(1, 40)
+        columns = random_columns(rnd, size)
+        with np.errstate(all='ignore'):
+            result = compile_batch(program).run(columns, size)
+        assert verify(program, columns, result, range(size)) == []
+        assert result.outputs() == [result.output(i) for i in range(size)]
+
+
+def test_generated_program():
+    program = parse_program(generate_program(variables=4, statements=200, depth=3, seed=1))
+    names = sorted(program.declarations)[:2]
+    rnd = random.Random(0)
+    columns = {name: np.array([rnd.randint(-5, 5) for _ in range(100)]) for name in names}
+    with np.errstate(all='ignore'):
+        result = compile_batch(program).run(columns)
+    assert result.size == 100
+    assert verify(program, columns, result, range(100)) == []
+
+
+def test_division_by_zero_stops_only_its_row():
+    program = parse_program('program var x, y : integer; begin write(x); y := 6 / x; write(y); end.')
+    columns = {'x': np.array([1, 0, 3])}
+    with np.errstate(all='ignore'):
+        result = compile_batch(program).run(columns)
+    assert result.errors.tolist() == [False, True, False]
+    assert [evaluate_row(program, {'x': x})[2] for x in (1, 0, 3)] == [False, True, False]
+    assert result.output(0) == evaluate_row(program, {'x': 1})[1]
+    assert result.output(2) == evaluate_row(program, {'x': 3})[1]
+    assert verify(program, columns, result, range(3)) == []
+
+
+def test_columns_must_have_same_length():
+    program = parse_program('program var x, y : integer; begin write(x + y); end.')
+    batch = compile_batch(program)
+    with pytest.raises(ValueError):
+        batch.run({'x': np.array([1, 2]), 'y': np.array([1, 2, 3])})
+    with pytest.raises(ValueError):
+        batch.run({})
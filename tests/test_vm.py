@@ -0,0 +1,96 @@
+import io
+import random
+
+import pytest
+
+from generator import generate_program
+from pycodegen import parse_program
+from syntax_tree import Program, Assign, If, While, Write, BinOp, Compare, Var, Num
+from vm import HALT, compile_program, evaluate, run_program
+
+NAMES = ['a', 'b', 'c', 'd']
+# без inf и nan: обратные переходы VM расходятся с обходом дерева на NaN
+NUMBERS = ['0', '1', '2', '3', '2.5', '0.0', '-0.0', '10', '-4']
+
+
+def expression(rnd, depth=0):
+    if depth > 3 or rnd.random() < 0.35:
+        if rnd.random() < 0.6:
+            return Var(rnd.choice(NAMES + ['u']))
+        text = rnd.choice(NUMBERS)
+        return Num(text, float(text) if '.' in text else int(text))
+    return BinOp(rnd.choice('+-*/'), expression(rnd, depth + 1), expression(rnd, depth + 1))
+
+
+def body(rnd, loops, depth=0):
+    statements = []
+    for _ in range(rnd.randint(0, 4)):
+        r = rnd.random()
+        if depth < 3 and r < 0.25:
+            condition = Compare(rnd.choice(['<', '>', '<=', '>=', '=']), expression(rnd, 1), expression(rnd, 1))
+            statements.append(If(condition, body(rnd, loops, depth + 1), body(rnd, loops, depth + 1)))
+        elif depth < 2 and r < 0.35:
+            loops.append(f"i{len(loops)}")
+            counter = loops[-1]
+            inner = body(rnd, loops, depth + 1)
+            inner.append(Assign(counter, BinOp('+', Var(counter), Num('1', 1))))
+            statements.append(Assign(counter, Num('0', 0)))
+            statements.append(While(Compare('<', Var(counter), Num('3', rnd.randint(0, 3))), inner))
+        elif r < 0.5:
+            statements.append(Write(expression(rnd)))
+        else:
+            statements.append(Assign(rnd.choice(NAMES + ['u']), expression(rnd)))
+    return statements
+
+
+def outcome(run, program):
+    out = io.StringIO()
+    try:
+        variables = run(program, out)
+    except ZeroDivisionError:
+        return 'ZeroDivisionError', out.getvalue(), None
+    return 'ok', out.getvalue(), {name: repr(value) for name, value in variables.items()}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_tree_walker_on_random_trees(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        program = Program({name: 'integer' for name in NAMES}, body(rnd, []))
+        expected = outcome(evaluate, program)
+        got = outcome(run_program, program)
+        assert got[:2] == expected[:2]
+        if expected[2] is not None:
+            # VM возвращает и переменные, которые только читались (они равны 0)
+            assert {name: got[2][name] for name in expected[2]} == expected[2]
+            assert all(got[2][name] == '0' for name in got[2] if name not in expected[2])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_tree_walker_on_generated_programs(seed):
+    program = parse_program(generate_program(variables=10, statements=100, depth=3, seed=seed))
+    assert outcome(run_program, program) == outcome(evaluate, program)
+
+
+def test_loop_and_output():
+    program = parse_program("program var i, s : integer; begin i := 0; s := 0; "
+                            "while i < 5 do [ s := s + i; i := i + 1; ] write (s); write (s / 4); end.")
+    out = io.StringIO()
+    assert run_program(program, out) == {'i': 5, 's': 10}
+    assert out.getvalue() == "10\n2.5\n"
+
+
+def test_constants_and_registers():
+    # унарного минуса в языке нет: -0.0 появляется после свёртки констант
+    program = Program({'x': 'integer'}, [
+        Assign('x', Num('1')), Assign('x', BinOp('+', Var('x'), Num('1'))),
+        Write(Num('-0.0', -0.0)), Write(Num('0.0')),
+    ])
+    compiled = compile_program(program)
+    assert compiled.code[-1][0] == HALT
+    # одна ячейка на одинаковую константу, 0.0 и -0.0 - разные
+    assert sorted(map(repr, compiled.registers)) == ['-0.0', '0', '0.0', '1']
+    out = io.StringIO()
+    run_program(program, out)
+    assert out.getvalue() == "-0.0\n0.0\n"
+    assert "HALT" in compiled.disassemble()
@@ -0,0 +1,176 @@
+import re
+from array import array
+from bisect import bisect_right
+
+from symbols import NO_SYMBOL, Interner
+
+
+class TokenStream:
+    # Типы токенов по коду вида. Коды 3 и 6 - те же NUMBER и STRING, но их значение
+    # не совпадает с фрагментом исходника: число с суффиксом (лексер дописывает суффикс
+    # ещё раз в нижнем регистре) и незакрытая строка (лексер дописывает кавычку)
+    TYPES = (
+        'KEYWORD', 'ID', 'NUMBER', 'NUMBER', 'ERROR', 'STRING', 'STRING',
+        'REL_OP', 'ADD_OP', 'MUL_OP', 'ASSIGN', 'DELIMITER', 'UNKNOWN',
+    )
+    NUMBER_SUFFIX = 3
+    STRING_OPEN = 6
+    CODES = {
+        'KEYWORD': 0, 'ID': 1, 'NUMBER': 2, 'ERROR': 4, 'STRING': 5,
+        'REL_OP': 7, 'ADD_OP': 8, 'MUL_OP': 9, 'ASSIGN': 10, 'DELIMITER': 11, 'UNKNOWN': 12,
+    }
+
+    # ids[i] - номер имени в interner для идентификатора, NO_SYMBOL для остальных токенов
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'ids', 'interner', '_line_starts')
+
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.ids = array('i')
+        self.interner = Interner()
+        self._line_starts = None
+
+    def code_for(self, type_, value, start, end):
+        code = self.CODES[type_]
+        if code == 2 and len(value) != end - start:
+            return self.NUMBER_SUFFIX
+        if code == 5 and len(value) != end - start:
+            return self.STRING_OPEN
+        return code
+
+    def append(self, type_, value, start, end):
+        end = min(end, len(self.source))
+        self.kinds.append(self.code_for(type_, value, start, end))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(self.interner.intern(value) if type_ == 'ID' else NO_SYMBOL)
+
+    def append_code(self, code, start, end, symbol=NO_SYMBOL):
+        self.kinds.append(code)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(symbol)
+
+    def pop(self):
+        for array_ in (self.kinds, self.starts, self.ends, self.ids):
+            array_.pop()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, i):
+        return self.kinds[i]
+
+    def type(self, i):
+        return self.TYPES[self.kinds[i]]
+
+    def value(self, i):
+        text = self.source[self.starts[i]:self.ends[i]]
+        code = self.kinds[i]
+        if code == self.NUMBER_SUFFIX:
+            return text + text[-1].lower()
+        if code == self.STRING_OPEN:
+            return text + "'"
+        return text
+
+    def span(self, i):
+        return self.starts[i], self.ends[i]
+
+    def token(self, i):
+        return self.TYPES[self.kinds[i]], self.value(i)
+
+    def symbol(self, i):
+        return self.ids[i]
+
+    def symbols(self):
+        # (Interner, номера имён по токенам). Поток, собранный не через append
+        # (кэш токенов, правка в incremental), получает номера здесь, один раз
+        ids = self.ids
+        if len(ids) != len(self.kinds):
+            intern = self.interner.intern
+            id_code = self.CODES['ID']
+            ids = self.ids = array('i', [
+                intern(self.value(i)) if code == id_code else NO_SYMBOL for i, code in enumerate(self.kinds)
+            ])
+        return self.interner, ids
+
+    def line_starts(self):
+        # Смещения начала строк; строятся один раз при первом запросе позиции
+        if self._line_starts is None:
+            starts = array('I', [0])
+            source = self.source
+            pos = source.find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = source.find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def position(self, i):
+        # (строка, столбец) начала токена, обе с единицы
+        offset = self.starts[i]
+        starts = self.line_starts()
+        line = bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
+
+    # Представление в виде последовательности кортежей (тип, значение) для старого кода
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.token(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.token(i)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield self.token(i)
+
+    def __repr__(self):
+        return f"TokenStream({len(self)} токенов)"
+
+
+class ByteTokenStream(TokenStream):
+    # Поток над байтами в UTF-8 (bytes, mmap, memoryview): смещения токенов в байтах.
+    # Текст токена декодируется только при запросе значения или позиции.
+    __slots__ = ()
+
+    def __init__(self, source):
+        super().__init__(source)
+        if len(source) >= 2 ** 32:
+            # смещения в файлах больше 4 ГБ не помещаются в 'I'
+            self.starts = array('Q')
+            self.ends = array('Q')
+
+    def value(self, i):
+        text = bytes(self.source[self.starts[i]:self.ends[i]]).decode('utf-8', 'replace')
+        code = self.kinds[i]
+        if code == self.NUMBER_SUFFIX:
+            return text + text[-1].lower()
+        if code == self.STRING_OPEN:
+            return text + "'"
+        return text
+
+    def line_starts(self):
+        if self._line_starts is None:
+            starts = array('Q', [0])
+            # re работает с любым буфером, а у memoryview нет метода find
+            starts.extend(match.end() for match in NEWLINES.finditer(self.source))
+            self._line_starts = starts
+        return self._line_starts
+
+    def position(self, i):
+        # столбец - в символах, а не в байтах
+        offset = self.starts[i]
+        starts = self.line_starts()
+        line = bisect_right(starts, offset)
+        prefix = bytes(self.source[starts[line - 1]:offset]).decode('utf-8', 'replace')
+        return line, len(prefix) + 1
+
+    def __repr__(self):
+        return f"ByteTokenStream({len(self)} токенов)"
+
+
+NEWLINES = re.compile(rb"\n")
@@ -0,0 +1,86 @@
+import sys
+from collections import deque
+
+# Уровни трассировки: чем больше, тем подробнее
+OFF = 0
+INFO = 1
+DEBUG = 2
+
+LEVEL_NAMES = {INFO: "INFO", DEBUG: "DEBUG"}
+
+# Фазы анализа, для каждой свой уровень
+PHASES = ("lexer", "parser", "semantic", "optimizer", "dataflow")
+
+
+class NullSink:
+    def write(self, phase, level, message):
+        pass
+
+    def close(self):
+        pass
+
+
+class StreamSink:
+    # По умолчанию пишет в stderr; with_phase=False печатает только текст сообщения
+    def __init__(self, stream=None, with_phase=True):
+        self.stream = stream if stream is not None else sys.stderr
+        self.with_phase = with_phase
+
+    def write(self, phase, level, message):
+        if self.with_phase:
+            self.stream.write(f"[{phase}:{LEVEL_NAMES[level]}] {message}\n")
+        else:
+            self.stream.write(f"{message}\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class FileSink(StreamSink):
+    def __init__(self, path, with_phase=True):
+        super().__init__(open(path, "a", encoding="utf-8"), with_phase)
+
+    def close(self):
+        self.stream.close()
+
+
+class RingBufferSink:
+    # Последние capacity записей в памяти, старые вытесняются
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, phase, level, message):
+        self.records.append((phase, level, message))
+
+    def messages(self):
+        return [record[2] for record in self.records]
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    # Уровень каждой фазы хранится в атрибуте с её именем, поэтому проверка на месте вызова
+    # стоит одно чтение атрибута, а сообщение форматируется только если она прошла:
+    #     if trace.parser >= DEBUG:
+    #         trace.emit("parser", DEBUG, f"...")
+    def __init__(self, sink=None, level=OFF, phases=None):
+        self.sink = sink if sink is not None else NullSink()
+        for phase in PHASES:
+            enabled = phases is None or phase in phases
+            setattr(self, phase, level if enabled else OFF)
+
+    def set_level(self, phase, level):
+        if phase not in PHASES:
+            raise ValueError(f"Неизвестная фаза трассировки: {phase}")
+        setattr(self, phase, level)
+
+    def emit(self, phase, level, message):
+        self.sink.write(phase, level, message)
+
+    def close(self):
+        self.sink.close()
+
+
+# Трассировщик по умолчанию: всё выключено
+NULL_TRACER = Tracer()
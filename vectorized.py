@@ -0,0 +1,442 @@
+import argparse
+import csv
+import io
+import sys
+
+try:
+    import numpy as np
+except ImportError:     # NumPy нужен только пакетному выполнению
+    np = None
+
+from pipeline import parse_program
+from syntax_tree import Assign, If, While, Write, Var, Num
+from vm import evaluate_statements, format_value
+
+# Пакетное выполнение: одна программа над множеством строк входных данных.
+#
+#     batch = compile_batch(program)
+#     result = batch.run({"x": xs, "y": ys})      # столбец на переменную
+#     result.column("s"), result.output(17), result.errors
+#
+#     python vectorized.py prog.txt data.csv --check 1000 > result.csv
+#
+# Каждая переменная - столбец NumPy по всем строкам сразу, выражения - операции над
+# столбцами. Оператор выполняется под маской строк: if вычисляет условие для всех строк
+# и выполняет обе ветки со своими масками, присваивание под маской - np.where. Цикл
+# повторяет тело, пока условие истинно хотя бы в одной строке. Вывод write собирается
+# по строкам.
+#
+# Результат совпадает с vm.evaluate для каждой строки (проверяется verify) с
+# оговорками: целые - int64 без проверки переполнения, смешанные целые и вещественные
+# значения в одном столбце точны до 2**53. Деление на ноль останавливает только свою
+# строку: она помечается в errors, как если бы evaluate бросил ZeroDivisionError.
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("Для пакетного выполнения нужен NumPy: pip install numpy")
+
+
+class Column:
+    # data - массив по строкам или скаляр NumPy (одно значение для всех строк);
+    # real - вещественное ли значение: bool для всего столбца или маска по строкам
+    __slots__ = ('data', 'real')
+
+    def __init__(self, data, real):
+        self.data = data
+        self.real = real
+
+    def array(self, size):
+        return np.broadcast_to(self.data, (size,))
+
+    def values(self, size, rows=None):
+        # Значения строк (всех или с номерами rows) как числа Python: int для целых
+        # строк, float для вещественных
+        data = self.array(size)
+        real = self.real
+        if rows is not None:
+            data = data[rows]
+        data = data.tolist()
+        if isinstance(real, bool):
+            if real:
+                return [float(value) for value in data]
+            return [int(value) for value in data]
+        real = real if rows is None else real[rows]
+        return [float(value) if flag else int(value) for value, flag in zip(data, real.tolist())]
+
+    def __repr__(self):
+        return f"Column({self.data!r}, {self.real!r})"
+
+
+def constant(value):
+    if value is None:
+        return None
+    if isinstance(value, float):
+        return Column(np.float64(value), True)
+    try:
+        return Column(np.int64(value), False)
+    except OverflowError:
+        raise ValueError(f"Целое {value} не помещается в int64") from None
+
+
+def either(left, right):
+    # признак вещественности результата арифметики
+    if isinstance(left, bool) and isinstance(right, bool):
+        return left or right
+    if left is True or right is True:
+        return True
+    if left is False:
+        return right
+    if right is False:
+        return left
+    return left | right
+
+
+def merge(mask, new, old):
+    if isinstance(new, bool) and isinstance(old, bool) and new == old:
+        return new
+    return np.where(mask, new, old)
+
+
+def combine(mask, other):
+    if mask is None:
+        return other
+    if other is None:
+        return mask
+    return mask & other
+
+
+def input_column(name, values):
+    array = np.asarray(values)
+    if array.ndim != 1:
+        raise ValueError(f"Столбец {name}: нужен одномерный массив")
+    if array.dtype.kind in 'iu':
+        return Column(array.astype(np.int64, copy=False), False)
+    if array.dtype.kind == 'f':
+        return Column(array.astype(np.float64, copy=False), True)
+    raise ValueError(f"Столбец {name}: ожидаются числа, а не {array.dtype}")
+
+
+class BatchState:
+    # Состояние одного запуска: столбцы переменных, живые строки и собранный вывод
+    __slots__ = ('size', 'env', 'alive', 'errors', 'writes')
+
+    def __init__(self, size, env):
+        self.size = size
+        self.env = env
+        self.alive = None       # None - живы все строки
+        self.errors = None      # маска строк, остановленных делением на ноль
+        self.writes = []        # (маска строк или None, Column) по выполненным write
+
+    def active(self, mask):
+        return combine(mask, self.alive)
+
+    def fail(self, rows):
+        self.errors = rows if self.errors is None else self.errors | rows
+        self.alive = ~self.errors
+
+
+class BatchCompiler:
+    # Дерево разбора -> замыкания над столбцами: выражение - f(state, mask) -> Column,
+    # оператор - f(state, mask). Разбор узлов выполняется один раз, а не на каждую строку.
+
+    def compile(self, program):
+        require_numpy()
+        return BatchProgram(program, self.statements(program.body))
+
+    def statements(self, body):
+        compiled = [self.statement(node) for node in body]
+
+        def run(state, mask):
+            for statement in compiled:
+                statement(state, mask)
+        return run
+
+    def statement(self, node):
+        if isinstance(node, Assign):
+            return self.assign(node)
+        if isinstance(node, If):
+            return self.branch(node)
+        if isinstance(node, While):
+            return self.loop(node)
+        if isinstance(node, Write):
+            return self.write(node)
+        raise ValueError(f"Неизвестный узел: {node}")
+
+    def assign(self, node):
+        name = node.name
+        value = self.expression(node.value)
+
+        def run(state, mask):
+            mask = state.active(mask)
+            new = value(state, mask)
+            if mask is None:
+                state.env[name] = new
+                return
+            old = state.env.get(name) or ZERO
+            state.env[name] = Column(np.where(mask, new.data, old.data), merge(mask, new.real, old.real))
+        return run
+
+    def branch(self, node):
+        condition = self.condition(node.condition)
+        then_body = self.statements(node.then_body)
+        else_body = self.statements(node.else_body)
+
+        def run(state, mask):
+            mask = state.active(mask)
+            test = condition(state, mask)
+            if test.ndim == 0:
+                # условие одинаково для всех строк
+                (then_body if test else else_body)(state, mask)
+                return
+            then_mask = combine(mask, test)
+            if then_mask.any():
+                then_body(state, None if mask is None and then_mask.all() else then_mask)
+            else_mask = combine(mask, ~test)
+            if else_mask.any():
+                else_body(state, None if mask is None and else_mask.all() else else_mask)
+        return run
+
+    def loop(self, node):
+        condition = self.condition(node.condition)
+        body = self.statements(node.body)
+
+        def run(state, mask):
+            while True:
+                current = state.active(mask)
+                if current is not None and not current.any():
+                    return
+                test = condition(state, current)
+                if test.ndim:
+                    current = combine(current, test)
+                    if not current.any():
+                        return
+                elif not test:
+                    return
+                body(state, current)
+        return run
+
+    def write(self, node):
+        value = self.expression(node.value)
+
+        def run(state, mask):
+            mask = state.active(mask)
+            state.writes.append((mask, value(state, mask)))
+        return run
+
+    def condition(self, node):
+        compare = COMPARE[node.op]
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+
+        def run(state, mask):
+            return np.asarray(compare(left(state, mask).data, right(state, mask).data))
+        return run
+
+    def expression(self, node):
+        if isinstance(node, Num):
+            column = constant(node.value)
+            if column is None:
+                raise ValueError(f"Неожиданное число: {node.text}")
+            return lambda state, mask: column
+        if isinstance(node, Var):
+            name = node.name
+            return lambda state, mask: state.env.get(name) or ZERO
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        if node.op == '/':
+            return self.divide(left, right)
+        operation = OPERATIONS[node.op]
+
+        def run(state, mask):
+            a = left(state, mask)
+            b = right(state, mask)
+            data = operation(a.data, b.data)
+            real = either(a.real, b.real)
+            if not isinstance(real, bool):
+                # целые строки в вещественном массиве: у целого не бывает -0.0
+                data = np.where(real, data, data + 0.0)
+            return Column(data, real)
+        return run
+
+    def divide(self, left, right):
+        def run(state, mask):
+            a = left(state, mask)
+            b = right(state, mask)
+            zero = b.data == 0
+            if np.ndim(zero) == 0:
+                if zero:
+                    state.fail(np.ones(state.size, bool) if mask is None else mask)
+                    return Column(np.float64(0.0), True)
+                return Column(np.true_divide(a.data, b.data), True)
+            failed = zero if mask is None else zero & mask
+            if failed.any():
+                state.fail(failed)
+            return Column(np.true_divide(a.data, np.where(zero, 1, b.data)), True)
+        return run
+
+
+if np is not None:
+    ZERO = Column(np.int64(0), False)
+    COMPARE = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal, '=': np.equal}
+    OPERATIONS = {'+': np.add, '-': np.subtract, '*': np.multiply}
+
+
+class BatchProgram:
+    def __init__(self, program, body):
+        self.program = program
+        self.body = body
+
+    def run(self, columns=None, size=None):
+        # columns: имя переменной -> значения по строкам; остальные переменные - нули
+        columns = columns or {}
+        env = {name: ZERO for name in self.program.declarations}
+        for name, values in columns.items():
+            column = input_column(name, values)
+            if size is None:
+                size = len(column.data)
+            elif len(column.data) != size:
+                raise ValueError(f"Столбец {name}: {len(column.data)} строк вместо {size}")
+            env[name] = column
+        if size is None:
+            raise ValueError("Не задано число строк")
+        state = BatchState(size, env)
+        if size:
+            self.body(state, None)
+        return BatchResult(size, state.env, state.writes, state.errors)
+
+
+class BatchResult:
+    __slots__ = ('size', 'columns', 'writes', 'errors')
+
+    def __init__(self, size, columns, writes, errors):
+        self.size = size
+        self.columns = columns      # имя -> Column
+        self.writes = writes        # (маска строк или None, Column) в порядке выполнения
+        self.errors = errors if errors is not None else np.zeros(size, bool)
+
+    def column(self, name):
+        return self.columns[name].array(self.size)
+
+    def values(self, name):
+        return self.columns[name].values(self.size)
+
+    def row(self, i):
+        # Переменные строки i как числа Python: то же, что возвращает vm.evaluate
+        result = {}
+        for name, column in self.columns.items():
+            value = column.array(self.size)[i].item()
+            real = column.real if isinstance(column.real, bool) else bool(column.real[i])
+            result[name] = float(value) if real else int(value)
+        return result
+
+    def output(self, i):
+        parts = []
+        for mask, column in self.writes:
+            if mask is None or mask[i]:
+                value = column.array(self.size)[i].item()
+                real = column.real if isinstance(column.real, bool) else bool(column.real[i])
+                parts.append(format_value(float(value) if real else int(value)))
+        return "".join(parts)
+
+    def outputs(self):
+        # Вывод всех строк. Тексты склеиваются по столбцу на каждый write (массив
+        # строк Python), форматируются только строки, где write выполнялся
+        parts = np.full(self.size, "", dtype=object)
+        for mask, column in self.writes:
+            rows = None if mask is None else np.flatnonzero(mask)
+            texts = np.array([format_value(value) for value in column.values(self.size, rows)], dtype=object)
+            if rows is None:
+                parts += texts
+            else:
+                parts[rows] += texts
+        return parts.tolist()
+
+
+def compile_batch(program):
+    return BatchCompiler().compile(program)
+
+
+# Построчный эталон
+
+def evaluate_row(program, inputs):
+    # (переменные, вывод, ошибка) для одной строки через vm.evaluate_statements
+    env = {name: 0 for name in program.declarations}
+    env.update(inputs)
+    out = io.StringIO()
+    try:
+        evaluate_statements(program.body, env, out)
+    except ZeroDivisionError:
+        return env, out.getvalue(), True
+    return env, out.getvalue(), False
+
+
+def verify(program, columns, result, rows):
+    # Номера строк из rows, в которых пакетный результат расходится с эталоном
+    inputs = {name: input_column(name, values).values(result.size) for name, values in columns.items()}
+    mismatches = []
+    for i in rows:
+        env, output, failed = evaluate_row(program, {name: values[i] for name, values in inputs.items()})
+        if failed != bool(result.errors[i]):
+            mismatches.append(i)
+        elif not failed and (output != result.output(i) or not same_values(env, result.row(i))):
+            mismatches.append(i)
+    return mismatches
+
+
+def same_values(expected, actual):
+    # переменная, которой строка не присваивала, в пакете - столбец с нулём
+    for name in expected.keys() | actual.keys():
+        left, right = expected.get(name, 0), actual.get(name, 0)
+        if type(left) is not type(right) or repr(left) != repr(right):
+            return False
+    return True
+
+
+def read_columns(path):
+    # CSV с заголовком: столбец целых, если все значения целые, иначе вещественных
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        raise ValueError(f"Пустой файл {path}")
+    header, data = rows[0], rows[1:]
+    columns = {}
+    for index, name in enumerate(header):
+        texts = [row[index] for row in data]
+        try:
+            columns[name] = np.array([int(text) for text in texts], dtype=np.int64)
+        except ValueError:
+            columns[name] = np.array([float(text) for text in texts], dtype=np.float64)
+    return columns, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Выполнение программы над строками CSV")
+    parser.add_argument("program")
+    parser.add_argument("data", help="CSV с заголовком: столбец на входную переменную")
+    parser.add_argument("--check", type=int, default=0, help="сверить первые N строк с vm.evaluate")
+    args = parser.parse_args(argv)
+
+    require_numpy()
+    with open(args.program, encoding="utf-8") as f:
+        program = parse_program(f.read())
+    columns, size = read_columns(args.data)
+    result = compile_batch(program).run(columns, size)
+    if args.check:
+        mismatches = verify(program, columns, result, range(min(args.check, size)))
+        if mismatches:
+            print(f"Расхождение с построчным выполнением в строках: {mismatches[:20]}", file=sys.stderr)
+            return 1
+    names = list(result.columns)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(names + ["write", "error"])
+    values = [result.values(name) for name in names]
+    outputs = result.outputs()
+    errors = result.errors.tolist()
+    for i in range(size):
+        writer.writerow([column[i] for column in values] + [outputs[i].strip().replace("\n", " "), int(errors[i])])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import sys
+
+from syntax_tree import Assign, If, While, Write, Var, Num, bind_symbols
+
+# Байткод: плоский список кортежей (код, a, b, c). Операнды - номера ячеек в массиве
+# регистров: сначала переменные программы, затем константы и временные значения.
+# Трёхадресная форма без стека: x := x + 1 - одна инструкция ADD.
+MOVE = 0        # regs[a] = regs[b]
+ADD = 1         # regs[a] = regs[b] + regs[c]
+SUB = 2
+MUL = 3
+DIV = 4
+JUMP = 5        # pc = a
+JLT = 6         # if regs[a] < regs[b]: pc = c
+JLE = 7
+JGT = 8
+JGE = 9
+JEQ = 10
+JNE = 11
+WRITE = 12      # вывод regs[a]
+HALT = 13
+
+OPCODE_NAMES = (
+    "MOVE", "ADD", "SUB", "MUL", "DIV", "JUMP",
+    "JLT", "JLE", "JGT", "JGE", "JEQ", "JNE", "WRITE", "HALT",
+)
+
+ARITHMETIC = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+
+# Переход выполняется, когда условие ложно: на ветку else или на выход из цикла
+JUMP_IF_FALSE = {'<': JGE, '<=': JGT, '>': JLE, '>=': JLT, '=': JNE}
+JUMP_IF_TRUE = {'<': JLT, '<=': JLE, '>': JGT, '>=': JGE, '=': JEQ}
+
+
+class CompiledProgram:
+    __slots__ = ('code', 'registers', 'variables')
+
+    def __init__(self, code, registers, variables):
+        self.code = code
+        self.registers = registers    # начальные значения: нули и константы
+        self.variables = variables    # имя переменной -> номер ячейки
+
+    def disassemble(self):
+        lines = []
+        for pc, (op, a, b, c) in enumerate(self.code):
+            lines.append(f"{pc:4} {OPCODE_NAMES[op]:6} {a} {b} {c}")
+        return "\n".join(lines)
+
+
+class Compiler:
+    def __init__(self):
+        self.code = []
+        self.registers = []
+        self.variables = {}
+        self.slots = []         # номер имени -> ячейка переменной или None
+        self.constants = {}
+        self.temps = set()
+        self.free_temps = []
+
+    def compile(self, program):
+        symbols = bind_symbols(program)
+        self.slots = [None] * len(symbols)
+        for name in program.declarations:
+            self.variable(symbols.intern(name), name)
+        self.statements(program.body)
+        self.emit(HALT)
+        return CompiledProgram(self.code, self.registers, self.variables)
+
+    def emit(self, op, a=0, b=0, c=0):
+        self.code.append((op, a, b, c))
+        return len(self.code) - 1
+
+    def patch(self, pc, target):
+        op, a, b, c = self.code[pc]
+        if op == JUMP:
+            self.code[pc] = (op, target, b, c)
+        else:
+            self.code[pc] = (op, a, b, target)
+
+    def new_register(self, value=0):
+        self.registers.append(value)
+        return len(self.registers) - 1
+
+    def variable(self, symbol, name):
+        # необъявленная переменная тоже получает ячейку; ошибку о ней выдаёт семантика
+        slot = self.slots[symbol]
+        if slot is None:
+            slot = self.slots[symbol] = self.variables[name] = self.new_register()
+        return slot
+
+    def constant(self, node):
+        if node.value is None:
+            raise ValueError(f"Неожиданное число: {node.text}")
+        # по записи, а не по значению: 0.0 и -0.0 равны, но выводятся по-разному
+        key = (type(node.value), repr(node.value))
+        slot = self.constants.get(key)
+        if slot is None:
+            slot = self.constants[key] = self.new_register(node.value)
+        return slot
+
+    def temp(self):
+        if self.free_temps:
+            return self.free_temps.pop()
+        slot = self.new_register()
+        self.temps.add(slot)
+        return slot
+
+    def release_temp(self, slot):
+        if slot in self.temps:
+            self.free_temps.append(slot)
+
+    def expression(self, node, target=None):
+        # Номер ячейки со значением выражения. target - куда положить результат,
+        # если выражение вычисляется инструкцией (для присваивания без лишнего MOVE)
+        if isinstance(node, Var):
+            return self.variable(node.symbol, node.name)
+        if isinstance(node, Num):
+            return self.constant(node)
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        self.release_temp(left)
+        self.release_temp(right)
+        if target is None:
+            target = self.temp()
+        self.emit(ARITHMETIC[node.op], target, left, right)
+        return target
+
+    def condition(self, node, jumps):
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        self.release_temp(left)
+        self.release_temp(right)
+        return self.emit(jumps[node.op], left, right)
+
+    def statements(self, body):
+        for node in body:
+            self.statement(node)
+
+    def statement(self, node):
+        if isinstance(node, Assign):
+            slot = self.variable(node.symbol, node.name)
+            value = self.expression(node.value, target=slot)
+            if value != slot:
+                self.emit(MOVE, slot, value)
+        elif isinstance(node, If):
+            jump_else = self.condition(node.condition, JUMP_IF_FALSE)
+            self.statements(node.then_body)
+            if node.else_body:
+                jump_end = self.emit(JUMP)
+                self.patch(jump_else, len(self.code))
+                self.statements(node.else_body)
+                self.patch(jump_end, len(self.code))
+            else:
+                self.patch(jump_else, len(self.code))
+        elif isinstance(node, While):
+            # проверка перед входом и в конце тела: одна инструкция перехода на итерацию
+            jump_exit = self.condition(node.condition, JUMP_IF_FALSE)
+            start = len(self.code)
+            self.statements(node.body)
+            jump_back = self.condition(node.condition, JUMP_IF_TRUE)
+            self.patch(jump_back, start)
+            self.patch(jump_exit, len(self.code))
+        elif isinstance(node, Write):
+            value = self.expression(node.value)
+            self.release_temp(value)
+            self.emit(WRITE, value)
+        else:
+            raise ValueError(f"Неизвестный узел: {node}")
+
+
+def compile_program(program):
+    return Compiler().compile(program)
+
+
+def format_value(value):
+    return f"{value}\n"
+
+
+class VM:
+    def __init__(self, compiled, out=None):
+        self.compiled = compiled
+        self.out = out if out is not None else sys.stdout
+        self.registers = None
+
+    def run(self):
+        code = self.compiled.code
+        regs = list(self.compiled.registers)
+        self.registers = regs
+        write = self.out.write
+        pc = 0
+        while True:
+            op, a, b, c = code[pc]
+            pc += 1
+            if op == ADD:
+                regs[a] = regs[b] + regs[c]
+            elif op == JLT:
+                if regs[a] < regs[b]:
+                    pc = c
+            elif op == JGE:
+                if regs[a] >= regs[b]:
+                    pc = c
+            elif op == SUB:
+                regs[a] = regs[b] - regs[c]
+            elif op == MUL:
+                regs[a] = regs[b] * regs[c]
+            elif op == MOVE:
+                regs[a] = regs[b]
+            elif op == JGT:
+                if regs[a] > regs[b]:
+                    pc = c
+            elif op == JLE:
+                if regs[a] <= regs[b]:
+                    pc = c
+            elif op == DIV:
+                regs[a] = regs[b] / regs[c]
+            elif op == JUMP:
+                pc = a
+            elif op == JEQ:
+                if regs[a] == regs[b]:
+                    pc = c
+            elif op == JNE:
+                if regs[a] != regs[b]:
+                    pc = c
+            elif op == WRITE:
+                write(format_value(regs[a]))
+            else:
+                break
+        return {name: regs[slot] for name, slot in self.compiled.variables.items()}
+
+
+def run_program(program, out=None):
+    return VM(compile_program(program), out).run()
+
+
+# Наивный обход дерева: эталон для проверки VM и точка отсчёта в бенчмарке
+
+COMPARE = {
+    '<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b, '=': lambda a, b: a == b,
+}
+OPERATIONS = {
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b, '/': lambda a, b: a / b,
+}
+
+
+def evaluate(program, out=None):
+    out = out if out is not None else sys.stdout
+    env = {name: 0 for name in program.declarations}
+    evaluate_statements(program.body, env, out)
+    return env
+
+
+def evaluate_statements(body, env, out):
+    for node in body:
+        if isinstance(node, Assign):
+            env[node.name] = evaluate_expression(node.value, env)
+        elif isinstance(node, If):
+            if evaluate_condition(node.condition, env):
+                evaluate_statements(node.then_body, env, out)
+            else:
+                evaluate_statements(node.else_body, env, out)
+        elif isinstance(node, While):
+            while evaluate_condition(node.condition, env):
+                evaluate_statements(node.body, env, out)
+        elif isinstance(node, Write):
+            out.write(format_value(evaluate_expression(node.value, env)))
+
+
+def evaluate_condition(node, env):
+    return COMPARE[node.op](evaluate_expression(node.left, env), evaluate_expression(node.right, env))
+
+
+def evaluate_expression(node, env):
+    if isinstance(node, Num):
+        if node.value is None:
+            raise ValueError(f"Неожиданное число: {node.text}")
+        return node.value
+    if isinstance(node, Var):
+        return env.get(node.name, 0)
+    return OPERATIONS[node.op](evaluate_expression(node.left, env), evaluate_expression(node.right, env))